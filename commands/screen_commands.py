@@ -12,15 +12,26 @@ from typing import Dict, List, Tuple, Optional, Union, Any
 from utils.screen_vision import (
     capture_screenshot,
     extract_text_from_screenshot,
-    find_element_by_text,
     click_element_by_text,
     type_text,
-    analyze_screen
+    analyze_screen,
+    read_screen,
+    HAS_GUI
 )
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Импорт pyautogui с учетом наличия графического интерфейса
+if "DISPLAY" in os.environ and os.environ["DISPLAY"]:
+    try:
+        import pyautogui
+    except ImportError:
+        logger.warning("pyautogui не установлен")
+        from utils.mock_modules import mock_pyautogui as pyautogui
+else:
+    from utils.mock_modules import mock_pyautogui as pyautogui
+
 def take_screenshot(region: Optional[str] = None) -> Dict[str, Any]:
     """
     Делает скриншот экрана или указанной области.
@@ -238,6 +249,13 @@ def find_text_field(field_name: str, double_click: bool = False) -> Dict[str, An
     Returns:
         Словарь с результатом операции.
     """
+    if not HAS_GUI:
+        logger.warning("Нет доступа к графическому интерфейсу, поиск поля ввода недоступен")
+        return {
+            "status": "error",
+            "message": "Поиск поля ввода недоступен: нет графического интерфейса или не установлены cv2/pytesseract."
+        }
+    
     try:
         # Делаем скриншот
         screenshot = capture_screenshot()
@@ -247,6 +265,9 @@ def find_text_field(field_name: str, double_click: bool = False) -> Dict[str, An
                 "message": "Не удалось сделать скриншот."
             }
         
+        # Распознаем экран один раз: все метки ищутся в одной таблице слов
+        screen = read_screen(screenshot)
+        
         # Список возможных меток для полей ввода
         field_labels = [
             field_name,
@@ -259,10 +280,10 @@ def find_text_field(field_name: str, double_click: bool = False) -> Dict[str, An
         
         # Ищем поле по меткам
         for label in field_labels:
-            element = find_element_by_text(screenshot, label)
-            if element:
+            match = screen.find(label, min_conf=0.7, fuzzy=False)
+            if match:
                 # Нашли метку поля, кликаем немного правее и ниже (где обычно находится поле ввода)
-                x, y, w, h = element
+                x, y, w, h = match.box
                 # Смещаемся вправо от метки и немного вниз
                 click_x = x + w + 20
                 click_y = y + h // 2
@@ -295,10 +316,10 @@ def find_text_field(field_name: str, double_click: bool = False) -> Dict[str, An
         
         for placeholder in placeholders:
             if field_name.lower() in placeholder.lower() or placeholder.lower() in field_name.lower():
-                element = find_element_by_text(screenshot, placeholder)
-                if element:
+                match = screen.find(placeholder, min_conf=0.7, fuzzy=False)
+                if match:
                     # Нашли placeholder, кликаем прямо по нему
-                    x, y, w, h = element
+                    x, y, w, h = match.box
                     click_x = x + w // 2
                     click_y = y + h // 2
                     
@@ -28,6 +28,8 @@ except ImportError:
     logger.warning("cv2, numpy или pytesseract не установлены")
     CV_AVAILABLE = False
 
+from utils.ocr import ocr_cache
+
 # Импорт pyautogui с учетом наличия графического интерфейса
 if has_display:
     try:
@@ -94,80 +96,68 @@ def sanitize_filename(filename: str) -> str:
     """
     return "".join(c if c.isalnum() or c in (" ", "_", "-") else "_" for c in filename)
 
-def get_active_window_screenshot() -> Optional[str]:
+def get_active_window_frame() -> Optional["np.ndarray"]:
     """
-    Делает скриншот активного окна и сохраняет его.
+    Захватывает активное окно в память, без записи на диск.
     
     Returns:
-        Путь к сохраненному скриншоту или None в случае ошибки
+        Кадр BGR (numpy array) или None в случае ошибки
     """
     # Проверяем доступность необходимых библиотек
     if not all([PYAUTOGUI_AVAILABLE, PYWINCTL_AVAILABLE]):
-        logger.error("Не все необходимые библиотеки установлены для функции get_active_window_screenshot")
+        logger.error("Не все необходимые библиотеки установлены для функции get_active_window_frame")
         return None
-    
+
+    from utils.screen_capture import screen_capture
+
     try:
-        # Создаем директорию для кэша, если она не существует
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        
         active_window = gw.getActiveWindow()
         if not active_window:
-            logger.warning("Не удалось получить активное окно")
-            
-            # Альтернативный вариант - скриншот всего экрана
-            try:
-                screenshot_path = os.path.join(CACHE_DIR, f"fullscreen_{int(time.time())}.png")
-                img = pyautogui.screenshot()
-                img.save(screenshot_path)
-                logger.info(f"Сделан скриншот всего экрана: {screenshot_path}")
-                return screenshot_path
-            except Exception as e:
-                logger.error(f"Ошибка при создании скриншота всего экрана: {e}")
-                return None
-
-        # Фильтруем имя файла, убирая неподдерживаемые символы
-        window_title = sanitize_filename(active_window.title)
-        
-        screenshot_path = os.path.join(CACHE_DIR, f"{window_title}_{int(time.time())}.png")
-
-        logger.info(f"Делаем скриншот окна: {window_title}")
+            logger.warning("Не удалось получить активное окно, захватываем весь экран")
+            return screen_capture.grab()
 
         # Проверяем размеры окна
         if active_window.width == 0 or active_window.height == 0:
             logger.error("Окно имеет нулевые размеры")
             return None
 
-        # Делаем скриншот
+        logger.info(f"Захватываем окно: {active_window.title}")
         try:
-            img = pyautogui.screenshot(region=(
+            return screen_capture.grab((
                 active_window.left,
                 active_window.top,
                 active_window.width,
                 active_window.height
             ))
         except Exception as e:
-            logger.error(f"Ошибка при создании скриншота окна: {e}")
-            
-            # Пробуем сделать скриншот всего экрана
-            try:
-                screenshot_path = os.path.join(CACHE_DIR, f"fullscreen_{int(time.time())}.png")
-                img = pyautogui.screenshot()
-                img.save(screenshot_path)
-                logger.info(f"Сделан скриншот всего экрана: {screenshot_path}")
-                return screenshot_path
-            except Exception as e2:
-                logger.error(f"Ошибка при создании скриншота всего экрана: {e2}")
-                return None
-
-        # Сохраняем скриншот
-        try:
-            img.save(screenshot_path)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении скриншота: {e}")
-            return None
+            logger.error(f"Ошибка при захвате окна: {e}")
+            # Пробуем захватить весь экран
+            return screen_capture.grab()
 
-        # Проверяем, создался ли файл
-        if not os.path.exists(screenshot_path):
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка при захвате окна: {e}")
+        return None
+
+def get_active_window_screenshot() -> Optional[str]:
+    """
+    Делает скриншот активного окна и сохраняет его.
+    
+    Returns:
+        Путь к сохраненному скриншоту или None в случае ошибки
+    """
+    frame = get_active_window_frame()
+    if frame is None:
+        return None
+
+    try:
+        # Создаем директорию для кэша, если она не существует
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+        active_window = gw.getActiveWindow()
+        window_title = sanitize_filename(active_window.title) if active_window else "fullscreen"
+        screenshot_path = os.path.join(CACHE_DIR, f"{window_title}_{int(time.time())}.png")
+
+        if not cv2.imwrite(screenshot_path, frame):
             logger.error(f"Файл {screenshot_path} не создан")
             return None
 
@@ -175,7 +165,7 @@ def get_active_window_screenshot() -> Optional[str]:
         return screenshot_path
 
     except Exception as e:
-        logger.error(f"Неожиданная ошибка при создании скриншота: {e}")
+        logger.error(f"Ошибка при сохранении скриншота: {e}")
         return None
 
 try:
@@ -231,7 +221,7 @@ def extract_text_elements(image_path: str) -> Dict[str, Tuple[int, int]]:
 
         # Используем pytesseract для распознавания текста
         try:
-            data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
+            data = ocr_cache.image_to_data(gray, lang="eng")
         except Exception as e:
             logger.error(f"Ошибка при распознавании текста: {e}")
             return {}
@@ -317,12 +307,6 @@ def click_button(button_text: str) -> str:
         logger.error("Не все необходимые библиотеки установлены для функции click_button")
         return "Не удалось выполнить операцию: отсутствуют необходимые библиотеки"
     
-    try:
-        from PIL import Image
-    except ImportError:
-        logger.error("Библиотека PIL не установлена")
-        return "Не удалось выполнить операцию: отсутствует библиотека PIL"
-
     try:
         # Проверяем активное окно
         if not PYWINCTL_AVAILABLE:
@@ -333,47 +317,30 @@ def click_button(button_text: str) -> str:
             logger.warning("Не удалось определить активное окно")
             return "Не удалось определить активное окно"
 
-        # 1. Делаем скриншот активного окна
-        screenshot_path = get_active_window_screenshot()
-        if not screenshot_path:
+        # 1. Захватываем активное окно сразу в массив BGR (без PNG на диске)
+        img_cv = get_active_window_frame()
+        if img_cv is None:
             logger.error("Не удалось сделать скриншот окна")
             return "Ошибка: не удалось сделать скриншот окна"
 
-        # 2. Открываем скриншот
-        img = Image.open(screenshot_path)
-        img_cv = np.array(img)
-        img_cv = cv2.cvtColor(img_cv, cv2.COLOR_RGB2BGR)
+        # 2. Распознаём окно одним проходом OCR: общая таблица слов с индексом
+        #    (повторяющиеся слова не затирают друг друга, фразы ищутся по соседним словам)
+        from utils.screen_vision import read_screen
+        screen = read_screen(img_cv)
+        logger.info(f"Найдено слов: {len(screen)}")
 
-        # 3. С помощью pytesseract распознаём слова
-        data = pytesseract.image_to_data(img_cv, lang="rus+eng", output_type=pytesseract.Output.DICT)
-        elements = {}
-        n_boxes = len(data['level'])
-        for i in range(n_boxes):
-            raw_word = data['text'][i].strip()
-            if raw_word:
-                x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-                cx, cy = x + w // 2, y + h // 2
-                # Используем функцию normalize_text, чтобы убрать кавычки и т.д.
-                norm_word = normalize_text(raw_word)
-                if norm_word:
-                    elements[norm_word] = (cx, cy)
-
-        logger.info(f"Найденные (нормализованные) слова: {', '.join(elements.keys())}")
-
-        # 4. Сопоставляем нужное слово
-        search_key = normalize_text(button_text)
-        if search_key in elements:
-            x, y = elements[search_key]
+        # 3. Сопоставляем нужное слово или фразу
+        match = screen.find(button_text)
+        if match is not None:
+            x, y = match.center
             pyautogui.click(x, y)
-            logger.info(f"Нажата кнопка '{button_text}' по координатам ({x}, {y})")
-            return f"✅ Нажал кнопку '{button_text}'"
-        
-        # 5. Если точное совпадение не найдено, ищем частичное
-        for key, (x, y) in elements.items():
-            if search_key in key or key in search_key:
-                pyautogui.click(x, y)
-                logger.info(f"Нажата кнопка '{key}' (частичное совпадение с '{button_text}') по координатам ({x}, {y})")
-                return f"✅ Нажал кнопку '{key}' (похожа на '{button_text}')"
+            # Точное совпадение, в том числе после свертки похожих букв и разбитых слов
+            if match.score == 1.0:
+                logger.info(f"Нажата кнопка '{button_text}' по координатам ({x}, {y})")
+                return f"✅ Нажал кнопку '{button_text}'"
+            # 4. Частичное или нечеткое совпадение
+            logger.info(f"Нажата кнопка '{match.text}' ({match.kind}, похожа на '{button_text}') по координатам ({x}, {y})")
+            return f"✅ Нажал кнопку '{match.text}' (похожа на '{button_text}')"
 
         logger.warning(f"Кнопка '{button_text}' не найдена")
         return f"❌ Кнопка '{button_text}' не найдена. Убедитесь, что она видна на экране"
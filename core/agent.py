@@ -3,33 +3,53 @@ import os
 import asyncio
 import elevenlabs as eleven
 from concurrent.futures import ThreadPoolExecutor
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import json
+import time
 import threading
 
-from utils.tts import generate_audio
+from types import SimpleNamespace
+
+from utils.tts import tts_worker, SpeechStream
 from core.conversation import Conversation
-from core.config import prompt, GPT_MODEL, GPT_TEMPERATURE, GPT_MAX_TOKENS, SECOND_OPENAI_API_KEY
+from core.metrics import gpt_metrics
+from core.scheduler import RequestCancelled, check_cancelled
+from core.config import prompt, GPT_MODEL, GPT_TEMPERATURE, GPT_MAX_TOKENS, GPT_STREAM, CONVERSATION_TOKEN_BUDGET, SECOND_OPENAI_API_KEY
 from commands.commands_as_json import commands
 
 # Устанавливаем API ключ
 try:
     from core.config import OPENAI_API_KEY
     client = OpenAI(api_key=OPENAI_API_KEY)
+    # Асинхронный клиент для запросов с общего фонового цикла событий
+    async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
     if not OPENAI_API_KEY:
         print("ВНИМАНИЕ: API ключ OpenAI не установлен. Функциональность будет ограничена.")
 except Exception as e:
     print(f"Ошибка при инициализации OpenAI API: {e}")
     # Создаем заглушку для тестирования
     client = None
+    async_client = None
 
-# Создаем глобальный пул потоков
+# Пул потоков для блокирующих команд (GUI, сеть), чтобы не занимать цикл событий
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Общая история диалога: последующие запросы видят предыдущие реплики
+# История вытесняется с запасом (до 3/4 бюджета), чтобы префикс запроса
+# не менялся на каждой реплике и оставался в кэше провайдера
+conversation = Conversation(prompt, max_tokens=CONVERSATION_TOKEN_BUDGET,
+                            low_watermark=CONVERSATION_TOKEN_BUDGET * 3 // 4)
+
+# Команды без управления мышью и клавиатурой: их можно выполнять параллельно
+PARALLEL_SAFE_COMMANDS = {"get_news", "get_weather", "read_screen_text"}
+# Остальные команды управляют мышью и клавиатурой и выполняются по одной
+gui_lock = threading.Lock()
+
 # Блок для команд
 from commands import commands as cmd_functions
 from commands.commands_as_json import commands  # это список описаний команд
-tools = [{"type": "function", "function": cmd} for cmd in commands]
+# Схемы команд замораживаются при импорте: префикс запроса не меняется между запросами
+tools = json.loads(json.dumps([{"type": "function", "function": cmd} for cmd in commands], ensure_ascii=False))
 available_commands = {}
 for command in commands:
     command_name = command["name"]
@@ -110,10 +130,153 @@ except Exception as e:
 
 
 
-async def async_chat_completion(user_text: str) -> dict:
+def run_command(fn_name: str, arguments: str) -> str:
+    """
+    Выполняет команду по имени с аргументами в формате JSON.
+    
+    Args:
+        fn_name: Имя команды из commands_as_json
+        arguments: Аргументы вызова (JSON-строка от модели)
+        
+    Returns:
+        Результат команды в виде строки
+    """
+    if fn_name not in available_commands:
+        return f"Функция {fn_name} не найдена."
+    try:
+        fn_args = json.loads(arguments or "{}")
+        if fn_name in PARALLEL_SAFE_COMMANDS:
+            result = available_commands[fn_name](**fn_args)
+        else:
+            # Мышь и клавиатура одни на всех: GUI-команды выполняются строго по одной
+            with gui_lock:
+                result = available_commands[fn_name](**fn_args)
+    except Exception as e:
+        result = f"Ошибка при выполнении {fn_name}: {e}"
+    return "" if result is None else str(result)
+
+async def execute_tool_calls(tool_calls: list) -> list:
+    """
+    Выполняет все вызовы функций из ответа модели.
+    
+    Команды только для чтения (PARALLEL_SAFE_COMMANDS) выполняются в пуле
+    потоков параллельно, GUI-команды — последовательно в порядке вызовов.
+    
+    Args:
+        tool_calls: Вызовы функций из ответа модели
+        
+    Returns:
+        Список результатов в порядке tool_calls
+    """
+    loop = asyncio.get_running_loop()
+    
+    def run_in_executor(call):
+        return loop.run_in_executor(executor, run_command, call.function.name, call.function.arguments)
+    
+    async def run_gui_calls(calls):
+        return [await run_in_executor(call) for call in calls]
+    
+    safe = [call for call in tool_calls if call.function.name in PARALLEL_SAFE_COMMANDS]
+    gui = [call for call in tool_calls if call.function.name not in PARALLEL_SAFE_COMMANDS]
+    gui_results, *safe_results = await asyncio.gather(run_gui_calls(gui), *map(run_in_executor, safe))
+    
+    results = dict(zip(map(id, gui), gui_results))
+    results.update(zip(map(id, safe), safe_results))
+    return [results[id(call)] for call in tool_calls]
+
+def build_chat_request(messages: list, tool_choice: str = "auto", stream: bool = False) -> dict:
+    """
+    Собирает параметры запроса к GPT со стабильным префиксом.
+    
+    Провайдер кэширует общий префикс запросов, поэтому его части идут
+    всегда в одном порядке и не меняются между запросами: системный промпт
+    (первое сообщение истории), схемы команд (tools, заморожены при импорте),
+    затем история диалога. Переменные параметры (tool_choice, stream)
+    на префикс не влияют.
+    
+    Args:
+        messages: Сообщения диалога (системный промпт — первым)
+        tool_choice: "auto" — модель может вызывать функции, "none" — только текст
+        stream: Потоковый ответ
+        
+    Returns:
+        Словарь параметров для chat.completions.create
+    """
+    request = {
+        "model": GPT_MODEL,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": tool_choice,
+        "temperature": GPT_TEMPERATURE,
+        "max_tokens": GPT_MAX_TOKENS
+    }
+    if stream:
+        # Без include_usage поток не возвращает количество токенов
+        request["stream"] = True
+        request["stream_options"] = {"include_usage": True}
+    return request
+
+async def stream_chat_completion(messages: list, on_delta=None, tool_choice: str = "auto") -> SimpleNamespace:
+    """
+    Потоковый вызов GPT (stream=True): текст отдается по мере генерации.
+    
+    Args:
+        messages: Сообщения диалога
+        on_delta: Функция, которая получает каждую новую часть текста
+        tool_choice: "auto" — модель может вызывать функции, "none" — только текст
+        
+    Returns:
+        Объект с полями content и tool_calls (как у ChatCompletionMessage) и usage
+        
+    Raises:
+        RequestCancelled: Если запрос планировщика отменен во время генерации
+    """
+    stream = await async_client.chat.completions.create(
+        **build_chat_request(messages, tool_choice=tool_choice, stream=True)
+    )
+    
+    content = ""
+    calls = {}
+    usage = None
+    async for chunk in stream:
+        # Вытесненный запрос перестает читать поток и озвучивать ответ
+        check_cancelled()
+        # Последний фрагмент потока содержит только usage (stream_options.include_usage)
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content += delta.content
+            if on_delta:
+                on_delta(delta.content)
+        # Вызовы функций приходят по частям: имя и аргументы склеиваются по индексу
+        for part in delta.tool_calls or []:
+            call = calls.setdefault(part.index, {"id": None, "name": "", "arguments": ""})
+            if part.id:
+                call["id"] = part.id
+            if part.function:
+                call["name"] += part.function.name or ""
+                call["arguments"] += part.function.arguments or ""
+    
+    tool_calls = [
+        SimpleNamespace(id=call["id"], function=SimpleNamespace(name=call["name"], arguments=call["arguments"]))
+        for _, call in sorted(calls.items())
+    ]
+    return SimpleNamespace(content=content or None, tool_calls=tool_calls or None, usage=usage)
+
+async def async_chat_completion(user_text: str, on_delta=None) -> dict:
     """
     Один вызов GPT‑4o‑mini + поддержка tool_calls.
     Возвращает словарь {status, gptMessage, …}
+    
+    В потоковом режиме (GPT_STREAM) части ответа передаются в on_delta,
+    а завершенные предложения сразу уходят в озвучку. Отмена запроса
+    планировщика проверяется на каждой части ответа и перед раундом команд.
+    
+    Raises:
+        RequestCancelled: Если запрос вытеснен новой репликой
     """
     # Для тестирования без API ключа
     if client is None:
@@ -121,12 +284,7 @@ async def async_chat_completion(user_text: str) -> dict:
         test_response = f"Это тестовый ответ на запрос: {user_text}"
         
         # Запускаем TTS для тестового ответа
-        threading.Thread(
-            target=lambda: asyncio.run(
-                generate_audio(test_response, "audio/message.mp3", "ru-RU-SvetlanaNeural")
-            ),
-            daemon=True
-        ).start()
+        tts_worker.speak(test_response, voice="ru-RU-SvetlanaNeural")
         
         return {
             "status": 200,
@@ -135,76 +293,94 @@ async def async_chat_completion(user_text: str) -> dict:
             "statusMessage": "Test mode - no API key"
         }
     
-    # готовим контекст
-    local_conv = Conversation(prompt)
-    local_conv.add_message(role="user", content=user_text)
+    # готовим контекст: реплика собирается отдельно и попадает в общую историю
+    # диалога целиком и только после успешного ответа (запросы идут параллельно)
+    turn = conversation.begin_turn()
+    turn.add_message(role="user", content=user_text)
 
-    loop = asyncio.get_running_loop()
-    try:
-        rsp = await loop.run_in_executor(
-            executor,
-            lambda: client.chat.completions.create(
-                model       = GPT_MODEL,
-                messages    = local_conv.get_messages(),
-                tools       = tools,          # ← вместо functions
-                tool_choice = "auto",
-                temperature = GPT_TEMPERATURE,
-                max_tokens  = GPT_MAX_TOKENS
+    # Озвучка ответа; фразы-шаблоны с {name} не озвучиваются
+    speech = SpeechStream(voice="ru-RU-SvetlanaNeural", accept=lambda sentence: "{name}" not in sentence)
+    
+    def push_delta(delta: str):
+        if on_delta:
+            on_delta(delta)
+        speech.feed(delta)
+    
+    async def request_completion(tool_choice: str = "auto"):
+        check_cancelled()
+        started = time.monotonic()
+        if GPT_STREAM:
+            message = await stream_chat_completion(turn.get_messages(), on_delta=push_delta,
+                                                   tool_choice=tool_choice)
+            usage = message.usage
+        else:
+            rsp = await async_client.chat.completions.create(
+                **build_chat_request(turn.get_messages(), tool_choice=tool_choice)
             )
+            # главный ответ
+            message = rsp.choices[0].message          # ChatCompletionMessage object
+            usage = rsp.usage
+            speech.feed(message.content or "")
+        gpt_metrics.record_usage(
+            usage, model=GPT_MODEL, round=2 if tool_choice == "none" else 1,
+            streamed=GPT_STREAM, latency=time.monotonic() - started,
+            history_tokens=turn.token_count
         )
+        return message
+    
+    names = []
+    try:
+        msg = await request_completion()
+        
+        # ───────── если GPT вызвал функции ─────────
+        if msg.tool_calls:
+            names = [call.function.name for call in msg.tool_calls]
+            print(f"Вызовы функций: {names}")
+            check_cancelled()
+            results = await execute_tool_calls(msg.tool_calls)
+            
+            # Результаты всех команд возвращаются модели за один дополнительный запрос
+            turn.add_tool_calls(msg.tool_calls, content=msg.content)
+            for call, result in zip(msg.tool_calls, results):
+                turn.add_message(role="tool", content=result, tool_call_id=call.id)
+            
+            speech.discard_pending()
+            msg = await request_completion(tool_choice="none")
+    except (RequestCancelled, asyncio.CancelledError):
+        # Отмененная реплика не попадает в историю и не озвучивает ни хвост, ни ошибку
+        speech.close(speak_tail=False)
+        raise
     except Exception as e:
+        speech.close(speak_tail=False)
+        # Неудачная реплика не попадает в историю
         error_msg = f"Ошибка при обращении к OpenAI API: {str(e)}"
         print(error_msg)
         
         # Запускаем TTS для сообщения об ошибке
-        threading.Thread(
-            target=lambda: asyncio.run(
-                generate_audio(error_msg, "audio/message.mp3", "ru-RU-SvetlanaNeural")
-            ),
-            daemon=True
-        ).start()
+        tts_worker.speak(error_msg, voice="ru-RU-SvetlanaNeural")
         
         return {"status": 500, "gptMessage": error_msg, "statusMessage": str(e)}
 
-    # главный ответ
-    msg = rsp.choices[0].message          # ChatCompletionMessage object
-
-    # ───────── если GPT вызвал функцию ─────────
-    if msg.tool_calls:
-        call       = msg.tool_calls[0]
-        fn_name    = call.function.name
-        fn_args    = json.loads(call.function.arguments or "{}")
-
-        if fn_name in available_commands:
-            try:
-                result = available_commands[fn_name](**fn_args)
-            except Exception as e:
-                result = f"Ошибка при выполнении {fn_name}: {e}"
-        else:
-            result = f"Функция {fn_name} не найдена."
-
-        msg.content = str(result)
-
-    # сохраняем сообщение в истории
-    local_conv.add_message(role="assistant", content=msg.content)
+    msg.content = msg.content or ""
+    # сохраняем реплику в истории одним шагом
+    turn.add_message(role="assistant", content=msg.content)
+    turn.commit()
 
     # ───────── пост‑обработка «Открой …» ─────────
     if "{name}" in msg.content:
         app_name   = user_text.replace("Открой", "").strip()
         msg.content = "Открываю " + app_name
+        speech.discard_pending()
+        speech.feed(msg.content)
 
-    # TTS (только для обычных ответов)
-    if "{name}" not in msg.content:
-        threading.Thread(
-            target=lambda: asyncio.run(
-                generate_audio(msg.content, "audio/message.mp3", "ru-RU-SvetlanaNeural")
-            ),
-            daemon=True
-        ).start()
+    # TTS: дочитываем то, что еще не озвучено по ходу генерации
+    speech.close()
 
     return {
         "status": 200,
         "gptMessage": msg.content,
         "go_to_sleep": False,
-        "statusMessage": "Success"
+        "statusMessage": "Success",
+        # Выполненные команды (ответы с ними не кэшируются)
+        "commands": names
     }
\ No newline at end of file
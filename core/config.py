@@ -22,17 +22,96 @@ SECOND_OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # Для обратной 
 GPT_MODEL = "gpt-4o-mini"
 GPT_TEMPERATURE = 1.0
 GPT_MAX_TOKENS = 2000
+# Потоковые ответы: части текста сразу показываются в интерфейсе и озвучиваются
+GPT_STREAM = os.getenv("GPT_STREAM", "1").lower() in ("1", "true", "yes")
+# Бюджет истории диалога в токенах: старые реплики вытесняются, системный промпт остается
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "4000"))
 
 # === ElevenLabs ===
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY") or ""
 TTS_DEFAULT_VOICE = "ru-RU-SvetlanaNeural"
 TTS_MODEL = "eleven_multilingual_v1"
+# Конвейерная озвучка: длинный ответ режется на предложения, которые синтезируются
+# параллельно (не более TTS_PIPELINE_LOOKAHEAD наперед) и проигрываются без пауз
+TTS_PIPELINE = os.getenv("TTS_PIPELINE", "1").lower() in ("1", "true", "yes")
+TTS_PIPELINE_LOOKAHEAD = int(os.getenv("TTS_PIPELINE_LOOKAHEAD", "2"))
+# Дисковый кэш синтезированных фраз (audio/cache) с вытеснением давно не использованных
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "50"))
+TTS_CACHE_MAX_TEXT_LEN = int(os.getenv("TTS_CACHE_MAX_TEXT_LEN", "300"))
+
+# === Локальное распознавание команд ===
+# Простые команды ("назад", "открой калькулятор") выполняются без запроса к LLM
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "1").lower() in ("1", "true", "yes")
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.85"))
+# Дополнительные названия приложений для "открой/закрой {name}" (через запятую)
+INTENT_EXTRA_APPS = [name.strip() for name in os.getenv("INTENT_EXTRA_APPS", "").split(",") if name.strip()]
+
+# === Кэш ответов ===
+# Повторные информационные вопросы ("погода в Алматы") отвечаются из кэша без запроса к GPT
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+# Поиск похожих вопросов по символьным триграммам (0 — только точное совпадение)
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.88"))
+# Срок жизни ответов по категориям в секундах
+RESPONSE_CACHE_TTL_WEATHER = int(os.getenv("RESPONSE_CACHE_TTL_WEATHER", "900"))
+RESPONSE_CACHE_TTL_NEWS = int(os.getenv("RESPONSE_CACHE_TTL_NEWS", "600"))
+RESPONSE_CACHE_TTL_FACTUAL = int(os.getenv("RESPONSE_CACHE_TTL_FACTUAL", "86400"))
+# Реплика в течение этого времени после предыдущей может быть уточнением — кэш не используется
+RESPONSE_CACHE_FOLLOWUP_SECONDS = int(os.getenv("RESPONSE_CACHE_FOLLOWUP_SECONDS", "120"))
+
+# === Подготовка аудио к распознаванию ===
+# Обрезка тишины (VAD), сведение в моно и передискретизация в 16 кГц перед отправкой в Whisper
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+# Запись с микрофона (listen) до конца речи: максимум длины, ожидание начала и пауза в конце
+LISTEN_MAX_SECONDS = float(os.getenv("LISTEN_MAX_SECONDS", "15"))
+LISTEN_START_TIMEOUT = float(os.getenv("LISTEN_START_TIMEOUT", "5"))
+LISTEN_END_SILENCE_MS = int(os.getenv("LISTEN_END_SILENCE_MS", "700"))
+
+# === Потоковое распознавание речи ===
+# Части записи распознаются перекрывающимися окнами, пока пользователь говорит
+STREAMING_STT = os.getenv("STREAMING_STT", "1").lower() in ("1", "true", "yes")
+STREAMING_STT_WINDOW_CHUNKS = int(os.getenv("STREAMING_STT_WINDOW_CHUNKS", "4"))
+STREAMING_STT_OVERLAP_CHUNKS = int(os.getenv("STREAMING_STT_OVERLAP_CHUNKS", "2"))
+
+# === Захват экрана ===
+# Способ захвата: auto (mss, при ошибке pyautogui), mss или pyautogui
+SCREEN_CAPTURE_BACKEND = os.getenv("SCREEN_CAPTURE_BACKEND", "auto").lower()
+# Сохранение кадров для отладки: выключено по умолчанию, сохраняется каждый N-й кадр в фоне
+SCREENSHOT_DEBUG_SAVE = os.getenv("SCREENSHOT_DEBUG_SAVE", "0").lower() in ("1", "true", "yes")
+SCREENSHOT_DEBUG_EVERY = int(os.getenv("SCREENSHOT_DEBUG_EVERY", "10"))
+SCREENSHOT_DEBUG_DIR = os.getenv("SCREENSHOT_DEBUG_DIR", "screenshots")
+
+# === Кэш распознавания текста (OCR) ===
+# Повторное распознавание неизменного экрана берется из кэша по хэшу кадра
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "32"))
+# Хэш кадра считается по каждой N-й строке пикселей. Больше 1 — быстрее, но
+# изменение в пропущенных строках (курсор, подчеркивание) не сбросит кэш
+OCR_CACHE_ROW_STRIDE = int(os.getenv("OCR_CACHE_ROW_STRIDE", "1"))
+# Инкрементальный OCR: повторно распознаются только изменившиеся плитки кадра
+INCREMENTAL_OCR = os.getenv("INCREMENTAL_OCR", "1").lower() in ("1", "true", "yes")
+INCREMENTAL_OCR_TILE = int(os.getenv("INCREMENTAL_OCR_TILE", "64"))
+# Движок OCR: tesseract (один процесс на кадр) или parallel (полосы кадра распознаются параллельно)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "tesseract").lower()
+# Количество параллельных распознаваний (0 — по числу ядер), перекрытие полос и вид пула (thread/process)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+OCR_BAND_OVERLAP = int(os.getenv("OCR_BAND_OVERLAP", "64"))
+OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "thread").lower()
+
+# === Планировщик запросов от интерфейса ===
+# Запросы выполняются на пуле потоков, чтобы медленный запрос не блокировал остальные
+SCHEDULER_MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", "2"))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "16"))
 
 # === Настройки для браузерного чата ===
 USE_BROWSER_FOR_ALL_REQUESTS = os.getenv("USE_BROWSER_FOR_ALL_REQUESTS", "1").lower() in ("1", "true", "yes")
 CHATGPT_URL = os.getenv("CHATGPT_URL", "https://chat.openai.com/")
 HEADLESS_BROWSER = os.getenv("HEADLESS_BROWSER", "1").lower() in ("1", "true", "yes")
 ENHANCE_PROMPTS = os.getenv("ENHANCE_PROMPTS", "1").lower() in ("1", "true", "yes")
+# Пул прогретых браузеров: размер и количество запросов до пересоздания драйвера
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+BROWSER_POOL_MAX_QUERIES = int(os.getenv("BROWSER_POOL_MAX_QUERIES", "20"))
 
 # === Системный промпт для GPT ===
 prompt = """
@@ -69,10 +148,27 @@ Jarvis - персональный ИИ-ассистент, который мож
     - agent.py: основной агент, обрабатывающий запросы пользователя
     - config.py: конфигурация приложения
     - conversation.py: управление диалогом
+    - metrics.py: метрики запросов к GPT (токены, кэш префикса)
+    - intents.py: локальное распознавание простых команд без LLM
+    - response_cache.py: кэш ответов на повторяющиеся вопросы
+    - scheduler.py: планировщик запросов от интерфейса (пул потоков, отмена)
     - gpt_service.py: сервис для работы с GPT
 - utils/: утилиты
     - tts.py: синтез и распознавание речи
+    - stt.py: распознавание речи из аудио в памяти (Whisper API)
+    - streaming_stt.py: потоковое распознавание речи перекрывающимися окнами
+    - vad.py: определение речи, обрезка тишины и передискретизация в 16 кГц
+    - recorder.py: запись реплики с микрофона до конца речи (кольцевой буфер)
+    - screen_capture.py: захват экрана в массив NumPy (mss, запасной вариант pyautogui)
+    - screen_vision.py: анализ экрана и поиск текста (OCR)
+    - ocr.py: кэш результатов OCR по хэшу кадра
+    - ocr_result.py: таблица слов кадра с индексом (точный, нечеткий поиск, фразы)
+    - text_match.py: нечеткое сравнение с OCR (похожие буквы, расстояние Левенштейна)
+    - incremental_ocr.py: OCR только изменившихся областей экрана
+    - parallel_ocr.py: параллельный OCR кадра горизонтальными полосами
     - event_manager.py: управление событиями
+    - audio_output.py: постоянный вывод звука (микшер pygame, очередь клипов)
+    - async_loop.py: общий фоновый цикл событий asyncio
     - window_manager.py: управление окнами
     - mock_modules.py: заглушки для GUI-зависимых библиотек
 - commands/: команды для управления компьютером
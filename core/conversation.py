@@ -1,22 +1,60 @@
-
 """
-This class stores the messages sent between the user and 
+This class stores the messages sent between the user and
 ChatGPT to help rememeber the context of the conversation.
+
+The conversation lives for the whole session, so follow-up requests
+("а теперь закрой его") see previous turns. To keep requests small it has a
+token budget: every message is measured once when it is added, and when the
+total exceeds the budget the oldest turns are evicted. The system prompt is
+always pinned at the start.
+
+Requests can run concurrently, so a request builds its messages in a Turn
+and appends them to the shared history in one step only when it succeeds.
+Turns never interleave, and a failed turn leaves no trace in the history.
 """
-from typing import List, Dict
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
 
-class Conversation:
-    def __init__(self, prompt: str =""):
-        
-        self.messages = [
-            {
-                "role": "system",
-                "content": prompt
-            }
-        ]
-        self.is_awake = False
-    
-    def add_message(self, role: str, content: str, function_name: str =""):
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # tiktoken is optional: without it tokens are estimated from the text length
+    _encoding = None
+
+# Approximate per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Average number of characters per token for mixed Russian/English text
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(message: Dict) -> int:
+    """
+    Estimate how many prompt tokens a message takes.
+
+    Parameters:
+    - message : dict
+        - A chat message (role, content and optionally tool_calls).
+    """
+    text = message.get("content") or ""
+    if message.get("tool_calls"):
+        text += json.dumps(message["tool_calls"], ensure_ascii=False)
+    if _encoding is not None:
+        tokens = len(_encoding.encode(text))
+    else:
+        tokens = (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+class MessageLog(ABC):
+    """
+    Builds chat messages; subclasses decide where a new message is stored.
+    """
+
+    def add_message(self, role: str, content: str, function_name: str ="", tool_call_id: str =""):
         """
         Add a new message to the conversation
 
@@ -27,6 +65,8 @@ class Conversation:
             - The contents of the message to be added to the conversation.
         - function_name : str (optional)
             - The name of the function if there is a function that needs to be called.
+        - tool_call_id : str (optional)
+            - The id of the tool call this "tool" message answers.
         """
 
         if (role == "function"):
@@ -35,16 +75,196 @@ class Conversation:
                 "name": function_name,
                 "content": content
             }
+        elif (role == "tool"):
+            message = {
+                "role": "tool",
+                "tool_call_id": tool_call_id,
+                "content": content
+            }
         else:
             message = {
                 "role": role,
                 "content": content
             }
 
-        self.messages.append(message)
-    
+        self._append(message)
+
+    def add_tool_calls(self, tool_calls: list, content: str = None):
+        """
+        Add the assistant message that requested tool calls
+
+        Parameters:
+        - tool_calls : list
+            - Tool calls from the model response (objects with id and function.name/arguments).
+        - content : str (optional)
+            - Text the model produced alongside the calls.
+        """
+        self._append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {
+                        "name": call.function.name,
+                        "arguments": call.function.arguments or "{}"
+                    }
+                }
+                for call in tool_calls
+            ]
+        })
+
+    @abstractmethod
+    def _append(self, message: Dict):
+        """Store a built message."""
+
+
+class Conversation(MessageLog):
+    def __init__(self, prompt: str ="", max_tokens: Optional[int] = None, low_watermark: Optional[int] = None):
+        """
+        Parameters:
+        - prompt : str
+            - The system prompt, always kept as the first message.
+        - max_tokens : int (optional)
+            - Token budget for the whole history. None means unlimited.
+        - low_watermark : int (optional)
+            - Once the budget is exceeded, evict until the history fits this size.
+              Evicting in larger steps keeps the request prefix unchanged (and cached
+              by the provider) for several turns. Defaults to max_tokens.
+        """
+        self.messages = [
+            {
+                "role": "system",
+                "content": prompt
+            }
+        ]
+        self._tokens = [estimate_tokens(self.messages[0])]
+        self._total = self._tokens[0]
+        self.max_tokens = max_tokens
+        self.low_watermark = low_watermark if low_watermark is not None else max_tokens
+        self.evicted_turns = 0
+        self.is_awake = False
+        self.last_turn_at = None
+        self._lock = threading.RLock()
+
+    def begin_turn(self) -> "Turn":
+        """
+        Start a turn whose messages are added to the history only by Turn.commit().
+        """
+        return Turn(self)
+
+    def _append(self, message: Dict):
+        self.extend([message])
+
+    def extend(self, messages: List[Dict]):
+        """
+        Append several messages in one step (budget is enforced once, after all of them).
+
+        Parameters:
+        - messages : list
+            - Chat messages, e.g. a whole Turn.
+        """
+        with self._lock:
+            for message in messages:
+                self.messages.append(message)
+                self._tokens.append(estimate_tokens(message))
+                self._total += self._tokens[-1]
+            self.last_turn_at = time.monotonic()
+            self._enforce_budget()
+
+    def _enforce_budget(self):
+        """
+        Evict the oldest turns until the history fits the budget.
+
+        A turn starts with a user message and includes the tool calls, tool
+        results and answers that follow it, so tool messages are never left
+        without the assistant message that requested them. The system prompt
+        and the latest turn are never evicted.
+        """
+        if self.max_tokens is None or self._total <= self.max_tokens:
+            return
+        while self._total > self.low_watermark:
+            turn_starts = [i for i, message in enumerate(self.messages) if i > 0 and message["role"] == "user"]
+            if len(turn_starts) < 2:
+                return
+            end = turn_starts[1]
+            self._total -= sum(self._tokens[1:end])
+            del self.messages[1:end]
+            del self._tokens[1:end]
+            self.evicted_turns += 1
+
+    @property
+    def token_count(self) -> int:
+        """
+        Returns the estimated number of prompt tokens of the whole history.
+        """
+        with self._lock:
+            return self._total
+
+    def seconds_since_last_turn(self) -> float:
+        """
+        Returns how long ago the last message was added (infinity for an empty history).
+        """
+        with self._lock:
+            if self.last_turn_at is None or len(self.messages) == 1:
+                return float("inf")
+            return time.monotonic() - self.last_turn_at
+
+    def clear(self):
+        """
+        Forget the history, keeping only the system prompt.
+        """
+        with self._lock:
+            del self.messages[1:]
+            del self._tokens[1:]
+            self._total = self._tokens[0]
+
     def get_messages(self) -> List[Dict[str, str]]:
         """
         Returns a list of the messages in the current conversation.
         """
-        return self.messages
+        with self._lock:
+            return list(self.messages)
+
+
+class Turn(MessageLog):
+    """
+    Messages of one request (user message, tool calls and results, answer).
+
+    They are kept apart from the shared history until commit(), so concurrent
+    requests never interleave their messages and a failed request is simply
+    dropped.
+
+    Parameters:
+    - conversation : Conversation
+        - The history the turn is added to.
+    """
+
+    def __init__(self, conversation: Conversation):
+        self.conversation = conversation
+        self.messages: List[Dict] = []
+        self._tokens = 0
+
+    def _append(self, message: Dict):
+        self.messages.append(message)
+        self._tokens += estimate_tokens(message)
+
+    @property
+    def token_count(self) -> int:
+        """
+        Returns the estimated number of prompt tokens of the history with this turn.
+        """
+        return self.conversation.token_count + self._tokens
+
+    def get_messages(self) -> List[Dict[str, str]]:
+        """
+        Returns the current history followed by the messages of this turn.
+        """
+        return self.conversation.get_messages() + self.messages
+
+    def commit(self):
+        """
+        Append the messages of the turn to the history in one step.
+        """
+        self.conversation.extend(self.messages)
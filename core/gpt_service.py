@@ -1,13 +1,22 @@
-import asyncio
 import json
+import time
 import logging
 import traceback
 import os
-from typing import Dict, Any, Optional
+import concurrent.futures
+from typing import Dict, Any, Callable, Optional
 
-from core.agent import async_chat_completion
+from core.agent import async_chat_completion, run_command, conversation
+from core.intents import match_intent
+from core.response_cache import response_cache
+from core.scheduler import RequestCancelled, current_request
 from integrations.orchestrator import orchestrate_browser_chat
-from core.config import USE_BROWSER_FOR_ALL_REQUESTS
+from core.config import (
+    USE_BROWSER_FOR_ALL_REQUESTS, INTENT_FAST_PATH, INTENT_MIN_CONFIDENCE, RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_FOLLOWUP_SECONDS
+)
+from utils.tts import tts_worker
+from utils.async_loop import background_loop
 
 # Настройка логирования
 logging.basicConfig(
@@ -24,13 +33,17 @@ logger = logging.getLogger("gpt_service")
 # По умолчанию используем браузер для всех запросов, если не указано иное
 USE_BROWSER = os.environ.get("USE_BROWSER_FOR_ALL_REQUESTS", "1").lower() in ("1", "true", "yes")
 
-def handle_user_input(user_text: str) -> str:
+def handle_user_input(user_text: str, on_delta: Optional[Callable[[str], None]] = None,
+                      use_cache: bool = True) -> str:
     """
     Обрабатывает пользовательский ввод и определяет, нужно ли использовать
     браузерный чат или обычный GPT.
     
     Args:
         user_text: Текст от пользователя
+        on_delta: Функция для частей потокового ответа (вызывается из фонового цикла или
+            рабочего потока; браузерный чат передает и ResponseRewrite с полным текстом)
+        use_cache: Разрешить ответ из кэша (RESPONSE_CACHE_ENABLED отключает кэш целиком)
         
     Returns:
         Строка с ответом в формате JSON
@@ -42,7 +55,7 @@ def handle_user_input(user_text: str) -> str:
             query = user_text[len(trigger):].strip()
             if query:
                 logger.info(f"Обнаружен явный триггер, запрос для браузерного чата: {query}")
-                return process_browser_chat(query)
+                return process_browser_chat(query, on_delta=on_delta)
             else:
                 logger.warning("Не указан текст запроса после 'обратись к gpt'.")
                 return json.dumps({
@@ -50,14 +63,33 @@ def handle_user_input(user_text: str) -> str:
                     "gptMessage": "Пожалуйста, укажите запрос после 'обратись к gpt'."
                 })
         else:
+            # Простые команды выполняются локально, без запроса к LLM
+            match = match_intent(user_text) if INTENT_FAST_PATH else None
+            if match is not None and match.confidence >= INTENT_MIN_CONFIDENCE:
+                return dispatch_intent(user_text, match)
+            decision = {"dispatched": False, **(match.to_dict() if match else {})}
+            
+            # Повторный вопрос отвечается из кэша без обращения к GPT. Команды, уточнения
+            # и реплики сразу после предыдущей зависят от контекста и кэш не используют
+            use_cache = (use_cache and RESPONSE_CACHE_ENABLED and response_cache.cacheable(user_text)
+                         and conversation.seconds_since_last_turn() >= RESPONSE_CACHE_FOLLOWUP_SECONDS)
+            if use_cache:
+                cached = answer_from_cache(user_text)
+                if cached is not None:
+                    return attach_intent_decision(cached, decision)
+            
             # Если нет явного триггера, но настроено использование браузера для всех запросов
             if USE_BROWSER:
                 logger.info(f"Используем браузер для запроса: {user_text[:50]}...")
-                return process_browser_chat(user_text)
+                response = process_browser_chat(user_text, on_delta=on_delta)
             else:
                 # Используем прямой API-вызов
                 logger.info(f"Используем API для запроса: {user_text[:50]}...")
-                return generate_gpt_response(user_text)
+                response = generate_gpt_response(user_text, on_delta=on_delta)
+            
+            if use_cache:
+                store_in_cache(user_text, response)
+            return attach_intent_decision(response, decision)
     except Exception as e:
         logger.error(f"Неожиданная ошибка в handle_user_input: {e}")
         logger.error(traceback.format_exc())
@@ -66,19 +98,120 @@ def handle_user_input(user_text: str) -> str:
             "gptMessage": "Произошла неожиданная ошибка при обработке запроса."
         })
 
-def process_browser_chat(query: str) -> str:
+def dispatch_intent(user_text: str, match) -> str:
+    """
+    Выполняет распознанную локально команду без обращения к LLM.
+    
+    Args:
+        user_text: Текст от пользователя
+        match: Результат match_intent()
+        
+    Returns:
+        Строка с ответом в формате JSON
+    """
+    started = time.monotonic()
+    logger.info(f"Локальная команда {match.command} {match.arguments} (уверенность {match.confidence:.2f})")
+    result = run_command(match.command, json.dumps(match.arguments, ensure_ascii=False))
+    
+    # Реплика попадает в историю, чтобы последующие запросы понимали контекст
+    turn = conversation.begin_turn()
+    turn.add_message(role="user", content=user_text)
+    turn.add_message(role="assistant", content=result)
+    turn.commit()
+    if result:
+        tts_worker.speak(result, voice="ru-RU-SvetlanaNeural")
+    
+    return json.dumps({
+        "status": 200,
+        "gptMessage": result,
+        "source": "intent",
+        "intent": {
+            "dispatched": True,
+            **match.to_dict(),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+    })
+
+def answer_from_cache(user_text: str) -> Optional[str]:
+    """
+    Отвечает на вопрос из кэша ответов и озвучивает ответ.
+    
+    Args:
+        user_text: Текст от пользователя
+        
+    Returns:
+        Строка с ответом в формате JSON или None, если ответа в кэше нет
+    """
+    started = time.monotonic()
+    data = response_cache.get(user_text)
+    if data is None:
+        return None
+    
+    message = data.get("gptMessage", "")
+    # Реплика попадает в историю, как и ответ GPT
+    turn = conversation.begin_turn()
+    turn.add_message(role="user", content=user_text)
+    turn.add_message(role="assistant", content=message)
+    turn.commit()
+    if message:
+        tts_worker.speak(message, voice="ru-RU-SvetlanaNeural")
+    
+    data["cached"] = True
+    data["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return json.dumps(data)
+
+def store_in_cache(user_text: str, response: str):
+    """
+    Сохраняет успешный ответ в кэш ответов.
+    
+    Ответы, при которых выполнялись команды, не сохраняются: повтор вопроса
+    должен снова выполнить команду. Браузерный чат не сообщает о командах,
+    поэтому реплики-команды отсекает сам кэш (ResponseCache.cacheable).
+    
+    Args:
+        user_text: Текст от пользователя
+        response: Ответ в формате JSON
+    """
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return
+    if data.get("status") != 200 or data.get("commands") or not data.get("gptMessage"):
+        return
+    response_cache.put(user_text, {key: value for key, value in data.items() if key != "commands"})
+
+def attach_intent_decision(response: str, decision: Dict[str, Any]) -> str:
+    """
+    Добавляет в JSON-ответ решение локального матчера команд.
+    
+    Args:
+        response: Ответ в формате JSON
+        decision: Решение матчера (dispatched и лучший кандидат, если был)
+        
+    Returns:
+        Строка с ответом в формате JSON
+    """
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return response
+    data["intent"] = decision
+    return json.dumps(data)
+
+def process_browser_chat(query: str, on_delta: Optional[Callable[[Any], None]] = None) -> str:
     """
     Обрабатывает запрос через браузерный чат.
     
     Args:
         query: Текст запроса
+        on_delta: Функция для частей ответа по мере печати (str или ResponseRewrite)
         
     Returns:
         Строка с ответом в формате JSON
     """
     try:
         # Вызываем оркестратор для обработки запроса через браузер
-        result = orchestrate_browser_chat(query, enhance=True, headless=True)
+        result = orchestrate_browser_chat(query, enhance=True, headless=True, on_delta=on_delta)
         
         if result["status"] == 200:
             logger.info("Результат оркестрации: успешно")
@@ -101,21 +234,35 @@ def process_browser_chat(query: str) -> str:
             "gptMessage": f"Произошла ошибка при обращении к браузеру: {str(e)}"
         })
 
-def generate_gpt_response(text: str) -> str:
+def generate_gpt_response(text: str, on_delta: Optional[Callable[[str], None]] = None) -> str:
     """
     Генерирует ответ от GPT на основе пользовательского ввода через API.
     
     Args:
         text: Текст запроса
+        on_delta: Функция для частей потокового ответа (вызывается из фонового цикла)
         
     Returns:
         Строка с ответом в формате JSON
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
     try:
-        result = loop.run_until_complete(async_chat_completion(text))
+        # Запрос выполняется на общем фоновом цикле событий, без создания нового цикла
+        future = background_loop.submit(async_chat_completion(text, on_delta=on_delta))
+        # Отмена запроса планировщика отменяет и корутину: поток ответа и команды прерываются
+        request = current_request()
+        if request is not None:
+            request.add_cancel_callback(future.cancel)
+        try:
+            result = future.result()
+        except concurrent.futures.CancelledError:
+            raise RequestCancelled("Запрос к GPT отменен")
         return json.dumps(result)
+    except RequestCancelled as e:
+        logger.info(f"Запрос к GPT прерван: {e}")
+        return json.dumps({
+            "status": 499,
+            "gptMessage": "Запрос отменен"
+        })
     except Exception as e:
         logger.error(f"Ошибка в generate_gpt_response: {e}")
         logger.error(traceback.format_exc())
@@ -123,5 +270,3 @@ def generate_gpt_response(text: str) -> str:
             "status": 500, 
             "gptMessage": f"Извините, произошла ошибка при обработке вашего запроса: {str(e)}"
         })
-    finally:
-        loop.close()
@@ -0,0 +1,296 @@
+"""
+Локальное распознавание простых команд без обращения к LLM.
+
+Фразы вида "открой калькулятор", "назад", "прокрути вниз", "вкладка 3"
+однозначно соответствуют одной команде из commands_as_json. Для них
+полный круг через GPT (или браузерный ChatGPT) не нужен: матчер сравнивает
+запрос с таблицей шаблонов фраз и, если уверен, сразу возвращает команду
+и аргументы.
+
+Шаблоны компилируются вместе со схемами команд: шаблон для команды,
+которой нет в commands_as_json, отбрасывается, а значения слотов
+проверяются по типам параметров из схемы. Сравнение слов нечеткое, чтобы
+переживать ошибки распознавания Whisper ("прокути вниз", "обнови страничку").
+
+Открытый слот {name} в "открой/закрой/запусти {name}" совпадает почти с любой
+фразой ("открой новую вкладку", "запусти таймер на 5 минут"), поэтому полная
+уверенность дается только известным приложениям (KNOWN_SLOT_VALUES).
+Остальные значения получают уверенность ниже порога быстрого пути, и такие
+запросы разбирает LLM.
+"""
+
+import re
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("intents")
+
+# Шаблоны фраз: слова-литералы и слоты {параметр} из схемы команды
+INTENT_PHRASES = {
+    "open_app": ["открой {name}", "запусти {name}"],
+    "close_app": ["закрой {name}"],
+    "open_website": ["открой сайт {url}", "зайди на сайт {url}", "перейди на сайт {url}"],
+    "go_back": ["назад", "вернись назад", "перейди назад", "вернись"],
+    "go_forward": ["вперед", "перейди вперед"],
+    "scroll_down": ["прокрути вниз", "пролистай вниз", "листай вниз", "вниз"],
+    "scroll_up": ["прокрути вверх", "пролистай вверх", "листай вверх", "вверх"],
+    "refresh_page": ["обнови страницу", "перезагрузи страницу", "обнови"],
+    "switch_tab_by_number": [
+        "вкладка {tab_number}", "открой вкладку {tab_number}",
+        "перейди на вкладку {tab_number}", "переключись на вкладку {tab_number}"
+    ],
+    "play_pause_media": ["пауза", "поставь на паузу", "продолжи воспроизведение"],
+    "get_weather": ["погода в {city}", "какая погода в {city}"],
+    "get_news": ["новости", "какие новости", "последние новости"],
+}
+
+# Известные значения открытых слотов: названия приложений и их синонимы
+KNOWN_SLOT_VALUES = {
+    "name": {
+        "калькулятор", "блокнот", "браузер", "хром", "гугл хром", "chrome", "google chrome",
+        "firefox", "файрфокс", "edge", "проводник", "explorer", "терминал", "terminal",
+        "командная строка", "cmd", "powershell", "диспетчер задач", "панель управления",
+        "настройки", "параметры", "paint", "пэинт", "word", "ворд", "excel", "эксель",
+        "powerpoint", "outlook", "телеграм", "telegram", "whatsapp", "ватсап", "discord",
+        "дискорд", "skype", "скайп", "zoom", "зум", "spotify", "спотифай", "steam", "стим",
+        "vlc", "obs", "notepad", "calculator", "vs code", "vscode", "visual studio code",
+        "pycharm", "камера", "календарь", "почта", "музыка", "фото", "часы"
+    }
+}
+
+# Множитель уверенности за каждое слово неизвестного значения открытого слота:
+# одно слово дает 0.8, два — 0.64, то есть ниже порога быстрого пути
+UNKNOWN_SLOT_FACTOR = 0.8
+
+# Слова, которые не меняют смысл команды
+FILLER_WORDS = {"пожалуйста", "джарвис", "jarvis", "ка", "мне", "давай"}
+
+# Местоимения в слоте ("закрой его") требуют контекста диалога — такие запросы разбирает LLM
+PRONOUNS = {"его", "ее", "их", "него", "нее", "них", "это", "эту", "этот", "то", "там"}
+
+# Признаки составного запроса — такие запросы разбирает LLM
+COMPOUND_MARKERS = {"и", "потом", "затем", "после"}
+
+# Количественные и порядковые числительные (основы) для номеров вкладок
+NUMBER_WORDS = {
+    "один": 1, "одна": 1, "перв": 1, "два": 2, "две": 2, "втор": 2, "три": 3, "трет": 3,
+    "четыр": 4, "четвер": 4, "пят": 5, "шест": 6, "сем": 7, "седьм": 7, "восем": 8, "восьм": 8,
+    "девят": 9, "десят": 10
+}
+
+# Нечеткое сравнение слов: минимальная похожесть слова и длина, с которой она разрешена
+MIN_WORD_SIMILARITY = 0.75
+MIN_FUZZY_WORD_LENGTH = 4
+# Слот с большим числом слов скорее означает свободный запрос, а не команду
+MAX_SLOT_WORDS = 4
+
+TOKEN_RE = re.compile(r"[\w.:/]+", re.UNICODE)
+
+
+class IntentMatch:
+    """
+    Результат распознавания команды.
+
+    Args:
+        command: Имя команды из commands_as_json
+        arguments: Аргументы вызова
+        confidence: Уверенность от 0 до 1
+        phrase: Шаблон фразы, по которому найдено совпадение
+    """
+
+    def __init__(self, command: str, arguments: Dict[str, Any], confidence: float, phrase: str):
+        self.command = command
+        self.arguments = arguments
+        self.confidence = confidence
+        self.phrase = phrase
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "command": self.command,
+            "arguments": self.arguments,
+            "confidence": round(self.confidence, 3),
+            "phrase": self.phrase
+        }
+
+    def __repr__(self):
+        return f"IntentMatch({self.command}, {self.arguments}, {self.confidence:.2f})"
+
+
+def normalize_tokens(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Разбивает запрос на слова, приводит к нижнему регистру и убирает слова-паразиты.
+
+    Args:
+        text: Текст запроса
+
+    Returns:
+        Пара списков: нормализованные слова и исходные слова (для значений слотов)
+    """
+    original = [token.strip(".") for token in TOKEN_RE.findall(text)]
+    pairs = [(token.lower().replace("ё", "е"), token) for token in original if token]
+    pairs = [pair for pair in pairs if pair[0] not in FILLER_WORDS]
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+
+def word_similarity(expected: str, actual: str) -> float:
+    """
+    Похожесть слова из шаблона и слова из запроса (0 — разные, 1 — совпадают).
+
+    Короткие слова ("в", "на") должны совпадать точно.
+    """
+    if expected == actual:
+        return 1.0
+    if min(len(expected), len(actual)) < MIN_FUZZY_WORD_LENGTH:
+        return 0.0
+    return SequenceMatcher(None, expected, actual).ratio()
+
+
+def parse_number(words: List[str]) -> Optional[int]:
+    """Разбирает номер из цифр или числительного ("3", "третья", "три")."""
+    if len(words) != 1:
+        return None
+    word = words[0]
+    if word.isdigit():
+        return int(word)
+    for stem in sorted(NUMBER_WORDS, key=len, reverse=True):
+        if word.startswith(stem):
+            return NUMBER_WORDS[stem]
+    return None
+
+
+class IntentMatcher:
+    """
+    Матчер команд, скомпилированный из таблицы фраз и схем команд.
+
+    Args:
+        schemas: Описания команд (commands_as_json.commands)
+        phrases: Таблица {команда: [шаблоны]}
+        slot_values: Известные значения открытых слотов {слот: значения}
+    """
+
+    def __init__(self, schemas: List[Dict], phrases: Dict[str, List[str]] = None,
+                 slot_values: Dict[str, set] = None):
+        phrases = phrases if phrases is not None else INTENT_PHRASES
+        slot_values = slot_values if slot_values is not None else KNOWN_SLOT_VALUES
+        self._slot_values = {
+            slot: {" ".join(normalize_tokens(value)[0]) for value in values}
+            for slot, values in slot_values.items()
+        }
+        by_name = {schema["name"]: schema for schema in schemas}
+
+        self._patterns = []
+        for command, templates in phrases.items():
+            schema = by_name.get(command)
+            if schema is None:
+                logger.warning(f"Команда {command} из таблицы фраз отсутствует в commands_as_json")
+                continue
+            properties = schema.get("parameters", {}).get("properties", {})
+            required = set(schema.get("parameters", {}).get("required", []))
+            for template in templates:
+                words = template.split()
+                slots = [word[1:-1] for word in words if word.startswith("{")]
+                if any(slot not in properties for slot in slots) or not required <= set(slots):
+                    logger.warning(f"Шаблон '{template}' не соответствует схеме команды {command}")
+                    continue
+                literals = [word for word in words if not word.startswith("{")]
+                slot = slots[0] if slots else None
+                slot_type = properties[slot].get("type", "string") if slot else None
+                self._patterns.append((command, template, literals, slot, slot_type))
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        """
+        Находит команду для запроса.
+
+        Args:
+            text: Текст запроса пользователя
+
+        Returns:
+            Лучшее совпадение или None, если запрос не похож на простую команду
+        """
+        tokens, original = normalize_tokens(text)
+        if not tokens or any(token in COMPOUND_MARKERS for token in tokens[1:]):
+            return None
+
+        best = None
+        best_key = None
+        for command, template, literals, slot, slot_type in self._patterns:
+            candidate = self._match_pattern(tokens, original, command, template, literals, slot, slot_type)
+            if candidate is None:
+                continue
+            # При равной уверенности выигрывает более конкретный шаблон
+            key = (candidate.confidence, len(literals))
+            if best_key is None or key > best_key:
+                best, best_key = candidate, key
+        return best
+
+    def _match_pattern(self, tokens, original, command, template, literals, slot, slot_type) -> Optional[IntentMatch]:
+        if slot is None:
+            if len(tokens) != len(literals):
+                return None
+        elif len(tokens) <= len(literals) or len(tokens) - len(literals) > MAX_SLOT_WORDS:
+            return None
+
+        scores = [word_similarity(expected, actual) for expected, actual in zip(literals, tokens)]
+        if not scores or min(scores) < MIN_WORD_SIMILARITY:
+            return None
+        confidence = sum(scores) / len(scores)
+
+        arguments = {}
+        if slot is not None:
+            slot_words = tokens[len(literals):]
+            if all(word in PRONOUNS for word in slot_words):
+                return None
+            if slot_type == "integer":
+                value = parse_number(slot_words)
+                if value is None:
+                    return None
+            else:
+                value = " ".join(original[len(literals):])
+                if slot in self._slot_values:
+                    confidence *= self._known_value_score(slot, slot_words)
+            arguments[slot] = value
+        return IntentMatch(command, arguments, confidence, template)
+
+    def _known_value_score(self, slot: str, words: List[str]) -> float:
+        """
+        Множитель уверенности для значения открытого слота.
+
+        Известное значение (или похожее на него) сохраняет уверенность,
+        неизвестное снижает ее тем сильнее, чем больше в нем слов.
+        """
+        value = " ".join(words)
+        known = self._slot_values[slot]
+        if value in known:
+            return 1.0
+        similarity = max((word_similarity(name, value) for name in known), default=0.0)
+        if similarity >= MIN_WORD_SIMILARITY:
+            return similarity
+        return UNKNOWN_SLOT_FACTOR ** len(words)
+
+
+_intent_matcher = None
+
+
+def get_intent_matcher() -> IntentMatcher:
+    """Возвращает общий матчер, скомпилированный из commands_as_json (при первом вызове)."""
+    global _intent_matcher
+    if _intent_matcher is None:
+        from commands.commands_as_json import commands
+        from core.config import INTENT_EXTRA_APPS
+        slot_values = dict(KNOWN_SLOT_VALUES, name=KNOWN_SLOT_VALUES["name"] | set(INTENT_EXTRA_APPS))
+        _intent_matcher = IntentMatcher(commands, slot_values=slot_values)
+    return _intent_matcher
+
+
+def match_intent(text: str) -> Optional[IntentMatch]:
+    """
+    Распознает простую команду в запросе.
+
+    Args:
+        text: Текст запроса пользователя
+
+    Returns:
+        IntentMatch или None
+    """
+    return get_intent_matcher().match(text)
@@ -0,0 +1,88 @@
+"""
+Метрики запросов к GPT.
+
+Для каждого запроса сохраняется запись с количеством токенов запроса и
+ответа и числом токенов, взятых из кэша префикса у провайдера
+(usage.prompt_tokens_details.cached_tokens). По сводке видно долю попаданий
+в кэш и стоимость каждой реплики.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List
+
+logger = logging.getLogger("metrics")
+
+
+class MetricsRecorder:
+    """
+    Хранит записи о последних запросах к GPT.
+
+    Args:
+        max_records: Сколько последних записей хранить
+    """
+
+    def __init__(self, max_records: int = 200):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def record_usage(self, usage: Any, **fields) -> Dict[str, Any]:
+        """
+        Сохраняет запись по объекту usage из ответа OpenAI.
+
+        Args:
+            usage: Поле usage ответа (может быть None, если провайдер его не вернул)
+            **fields: Дополнительные поля записи (модель, раунд, задержка и т.п.)
+
+        Returns:
+            Сохраненная запись
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+
+        with self._lock:
+            record = {
+                "request_id": self._next_id,
+                "timestamp": time.time(),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens,
+                "cache_hit_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+                **fields
+            }
+            self._next_id += 1
+            self._records.append(record)
+
+        logger.info(
+            f"Запрос #{record['request_id']}: prompt={prompt_tokens}, cached={cached_tokens}, "
+            f"completion={completion_tokens}"
+        )
+        return record
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Возвращает копию сохраненных записей (от старых к новым)."""
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> Dict[str, Any]:
+        """Возвращает суммарные токены и долю токенов запроса, взятых из кэша."""
+        with self._lock:
+            records = list(self._records)
+        prompt_tokens = sum(record["prompt_tokens"] for record in records)
+        cached_tokens = sum(record["cached_tokens"] for record in records)
+        return {
+            "requests": len(records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(record["completion_tokens"] for record in records),
+            "cached_tokens": cached_tokens,
+            "cache_hit_rate": cached_tokens / prompt_tokens if prompt_tokens else 0.0
+        }
+
+
+# Общий сборщик метрик запросов к GPT
+gpt_metrics = MetricsRecorder()
@@ -0,0 +1,342 @@
+"""
+Кэш ответов на повторяющиеся вопросы.
+
+Информационные вопросы ("погода в Алматы", "какие новости") часто
+повторяются, а каждый ответ через браузерный ChatGPT или API занимает
+секунды. Кэш сначала ищет точное совпадение нормализованного текста,
+затем (по желанию) похожий вопрос по косинусной близости векторов
+хэшированных символьных триграмм, которые считаются локально.
+
+У каждой категории свой срок жизни: погода и новости быстро устаревают,
+фактические ответы живут долго. Кэшируются только явно информационные
+вопросы: команды ("включи свет"), уточнения ("почему", "расскажи подробнее")
+и короткие реплики без вопросительного слова зависят от контекста и не
+сохраняются. Похожий вопрос принимается только при совпадении слов по
+основам и одинаковом отрицании, чтобы "выключи" не совпало с "включи".
+Размер кэша ограничен, при переполнении вытесняются давно не
+использованные записи (LRU).
+"""
+
+import re
+import math
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("response_cache")
+
+# Срок жизни ответа по категориям (в секундах)
+DEFAULT_TTLS = {
+    "weather": 15 * 60,
+    "news": 10 * 60,
+    "time": 0,             # "который час", "что сегодня" — не кэшируются
+    "factual": 24 * 60 * 60,
+    "command": 0,          # действия должны выполняться каждый раз
+    "context": 0,          # уточнения к предыдущим репликам
+    "other": 0             # реплики без признаков информационного вопроса
+}
+
+# Признаки категорий: основа слова -> категория (проверяются по порядку)
+CATEGORY_KEYWORDS = (
+    ("погод", "weather"), ("температур", "weather"), ("прогноз", "weather"),
+    ("новост", "news"), ("курс", "news"),
+    ("сейчас", "time"), ("сегодня", "time"), ("час", "time"), ("время", "time"), ("завтра", "time")
+)
+
+# Основы повелительных глаголов: такие реплики — команды, а не вопросы
+COMMAND_STEMS = (
+    "включи", "выключи", "вруби", "выруби", "открой", "закрой", "запусти", "останови",
+    "найди", "нажми", "перейди", "прокрути", "пролистай", "напиши", "отправь", "сделай",
+    "поставь", "удали", "создай", "скачай", "установи", "сохрани", "покажи", "переключи",
+    "обнови", "напомни", "позвони", "набери", "громче", "тише", "убавь", "прибавь", "выполни"
+)
+
+# Слова, которые отсылают к предыдущим репликам
+CONTEXT_WORDS = {
+    "почему", "зачем", "подробнее", "подробней", "подробно", "еще", "дальше", "продолжи",
+    "продолжай", "он", "она", "оно", "они", "его", "ее", "их", "ему", "ей", "им", "нем", "ней",
+    "них", "этот", "эта", "это", "эти", "этого", "этой", "тот", "та", "те", "там", "тогда",
+    "тоже", "также"
+}
+
+# Вопросительные слова: без них реплика не считается фактическим вопросом
+QUESTION_WORDS = {
+    "кто", "что", "где", "куда", "откуда", "когда", "сколько", "какой", "какая", "какое",
+    "какие", "каков", "какова", "чей", "чья", "чье", "чем", "чему", "кого", "кому", "ли"
+}
+
+# Слова отрицания: вопросы с разным отрицанием не считаются похожими
+NEGATION_WORDS = {"не", "ни", "нет", "без"}
+
+# Фактический вопрос короче этого числа слов (после нормализации) скорее всего уточнение
+MIN_FACTUAL_WORDS = 2
+
+# Слова, которые не меняют смысл вопроса
+STOP_WORDS = {
+    "а", "ну", "и", "пожалуйста", "джарвис", "jarvis", "скажи", "расскажи", "подскажи",
+    "какая", "какой", "какие", "какое", "мне", "о", "об", "про", "ка"
+}
+
+# Размерность хэшированного вектора триграмм
+VECTOR_DIM = 1024
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+NUMBER_RE = re.compile(r"\d+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Приводит вопрос к нормальной форме: нижний регистр, без знаков препинания и стоп-слов.
+
+    Args:
+        text: Текст вопроса
+
+    Returns:
+        Нормализованная строка
+    """
+    words = WORD_RE.findall(text.lower().replace("ё", "е"))
+    return " ".join(word for word in words if word not in STOP_WORDS)
+
+
+def classify_query(normalized: str, text: str = None) -> str:
+    """
+    Определяет категорию вопроса для выбора срока жизни ответа.
+
+    Args:
+        normalized: Нормализованный текст вопроса
+        text: Исходный текст (вопросительные слова ищутся в нем: часть из них — стоп-слова)
+
+    Returns:
+        Имя категории из DEFAULT_TTLS
+    """
+    words = normalized.split()
+    raw_words = WORD_RE.findall((text if text is not None else normalized).lower().replace("ё", "е"))
+    if any(word.startswith(stem) for word in raw_words for stem in COMMAND_STEMS):
+        return "command"
+    if any(word in CONTEXT_WORDS for word in raw_words):
+        return "context"
+    for stem, category in CATEGORY_KEYWORDS:
+        if any(word.startswith(stem) for word in words):
+            return category
+    if len(words) >= MIN_FACTUAL_WORDS and any(word in QUESTION_WORDS for word in raw_words):
+        return "factual"
+    return "other"
+
+
+def same_stem(a: str, b: str) -> bool:
+    """Слова с общей основой ("войну" и "войне"), но не "включи" и "выключи"."""
+    if a == b:
+        return True
+    common = 0
+    for char_a, char_b in zip(a, b):
+        if char_a != char_b:
+            break
+        common += 1
+    return common >= max(4, min(len(a), len(b)) - 2)
+
+
+def same_terms(a: str, b: str) -> bool:
+    """
+    Проверяет, что похожие по триграммам вопросы говорят об одном и том же.
+
+    Отрицания должны совпадать, каждое слово короткого вопроса должно иметь
+    слово с той же основой в длинном, а в длинном допускается одно лишнее слово.
+
+    Args:
+        a: Нормализованный текст первого вопроса
+        b: Нормализованный текст второго вопроса
+
+    Returns:
+        True, если вопросы можно считать одинаковыми
+    """
+    words_a, words_b = a.split(), b.split()
+    if {w for w in words_a if w in NEGATION_WORDS} != {w for w in words_b if w in NEGATION_WORDS}:
+        return False
+    if len(words_a) > len(words_b):
+        words_a, words_b = words_b, words_a
+    if len(words_b) - len(words_a) > 1:
+        return False
+    unmatched = list(words_b)
+    for word in words_a:
+        match = next((other for other in unmatched if same_stem(word, other)), None)
+        if match is None:
+            return False
+        unmatched.remove(match)
+    return len(unmatched) <= 1
+
+
+def text_vector(normalized: str) -> Tuple[Dict[int, float], float]:
+    """
+    Вектор хэшированных символьных триграмм и его норма.
+
+    Args:
+        normalized: Нормализованный текст вопроса
+
+    Returns:
+        Пара (разреженный вектор {индекс: вес}, евклидова норма)
+    """
+    padded = f" {normalized} "
+    vector = {}
+    for i in range(len(padded) - 2):
+        index = zlib.crc32(padded[i:i + 3].encode("utf-8")) % VECTOR_DIM
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return vector, norm
+
+
+def cosine_similarity(a: Tuple[Dict[int, float], float], b: Tuple[Dict[int, float], float]) -> float:
+    """Косинусная близость двух векторов из text_vector()."""
+    (vector_a, norm_a), (vector_b, norm_b) = a, b
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(vector_a) > len(vector_b):
+        vector_a, vector_b = vector_b, vector_a
+    dot = sum(value * vector_b.get(index, 0.0) for index, value in vector_a.items())
+    return dot / (norm_a * norm_b)
+
+
+class ResponseCache:
+    """
+    Кэш ответов с поиском похожих вопросов, сроками жизни по категориям и LRU.
+
+    Args:
+        max_entries: Максимальное количество записей
+        ttls: Срок жизни по категориям (в секундах), 0 — не кэшировать
+        similarity_threshold: Минимальная близость для похожего вопроса
+            (None — только точное совпадение)
+    """
+
+    def __init__(self, max_entries: int = 256, ttls: Dict[str, float] = None,
+                 similarity_threshold: Optional[float] = 0.88):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._similar_hits = 0
+        self._misses = 0
+
+    def cacheable(self, text: str) -> bool:
+        """True, если ответ на такую реплику можно брать из кэша и сохранять в него."""
+        normalized = normalize_query(text)
+        return bool(normalized) and self.ttls.get(classify_query(normalized, text), 0) > 0
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Ищет сохраненный ответ на вопрос.
+
+        Args:
+            text: Текст вопроса
+
+        Returns:
+            Копия сохраненного ответа или None
+        """
+        normalized = normalize_query(text)
+        if not normalized or not self.cacheable(text):
+            return None
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(normalized)
+            similar = False
+            if entry is None and self.similarity_threshold is not None:
+                entry = self._find_similar(normalized, now)
+                similar = entry is not None
+            if entry is None or entry["expires_at"] <= now:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(entry["key"])
+            self._hits += 1
+            if similar:
+                self._similar_hits += 1
+            logger.info(f"Ответ взят из кэша ({entry['category']}): {text[:50]}")
+            return dict(entry["response"])
+
+    def _find_similar(self, normalized: str, now: float) -> Optional[Dict[str, Any]]:
+        numbers = NUMBER_RE.findall(normalized)
+        vector = text_vector(normalized)
+        best, best_score = None, self.similarity_threshold
+        for entry in self._entries.values():
+            # Вопросы с разными числами ("2 плюс 2" и "3 плюс 2") не считаются похожими
+            if entry["expires_at"] <= now or entry["numbers"] != numbers:
+                continue
+            score = cosine_similarity(vector, entry["vector"])
+            if score >= best_score and same_terms(normalized, entry["key"]):
+                best, best_score = entry, score
+        return best
+
+    def put(self, text: str, response: Dict[str, Any]) -> bool:
+        """
+        Сохраняет ответ на вопрос.
+
+        Args:
+            text: Текст вопроса
+            response: Ответ (словарь, который вернется из get())
+
+        Returns:
+            True, если ответ сохранен (категории с нулевым сроком жизни не кэшируются)
+        """
+        normalized = normalize_query(text)
+        if not normalized:
+            return False
+        category = classify_query(normalized, text)
+        ttl = self.ttls.get(category, 0)
+        if ttl <= 0:
+            return False
+
+        with self._lock:
+            self._entries.pop(normalized, None)
+            self._entries[normalized] = {
+                "key": normalized,
+                "category": category,
+                "response": dict(response),
+                "expires_at": time.monotonic() + ttl,
+                "numbers": NUMBER_RE.findall(normalized),
+                "vector": text_vector(normalized)
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        """Удаляет все записи."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику попаданий и промахов кэша."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "similar_hits": self._similar_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries)
+            }
+
+
+def _create_response_cache() -> ResponseCache:
+    from core.config import (
+        RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_SIMILARITY, RESPONSE_CACHE_TTL_WEATHER,
+        RESPONSE_CACHE_TTL_NEWS, RESPONSE_CACHE_TTL_FACTUAL
+    )
+    return ResponseCache(
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        ttls={
+            "weather": RESPONSE_CACHE_TTL_WEATHER,
+            "news": RESPONSE_CACHE_TTL_NEWS,
+            "factual": RESPONSE_CACHE_TTL_FACTUAL
+        },
+        similarity_threshold=RESPONSE_CACHE_SIMILARITY or None
+    )
+
+
+# Общий кэш ответов сервиса GPT
+response_cache = _create_response_cache()
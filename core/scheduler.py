@@ -0,0 +1,320 @@
+"""
+Планировщик запросов от интерфейса.
+
+Функции, вызываемые из eel, выполняются в gevent-воркере: если обрабатывать
+запрос прямо в нем, медленный браузерный чат блокирует все остальное, включая
+остановку звука. Планировщик выполняет запросы на ограниченном пуле потоков,
+а вызывающая функция ждет результат через eel.sleep.
+
+У каждого запроса есть номер. Новая реплика пользователя вытесняет устаревшую:
+запрос в очереди отменяется сразу, а выполняющийся помечается отмененным —
+его результат отбрасывается, а озвучка не запускается (см. request_cancelled).
+Долгие операции (опрос браузерного чата, поток ответа GPT) сами проверяют
+отмену через check_cancelled() и прерываются, освобождая рабочий поток и
+браузер; ожидание корутины на фоновом цикле снимается через
+add_cancel_callback().
+Управляющие запросы (остановка, отмена) идут в очереди первыми.
+"""
+
+import time
+import queue
+import logging
+import itertools
+import threading
+import contextvars
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("scheduler")
+
+# Приоритеты запросов (меньше — раньше)
+PRIORITY_CONTROL = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+
+# Запрос, в контексте которого выполняется код (переходит и в корутины фонового цикла)
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class QueueFullError(RuntimeError):
+    """Очередь планировщика переполнена."""
+
+
+class RequestCancelled(Exception):
+    """Текущий запрос планировщика отменен или вытеснен."""
+
+
+class ScheduledRequest:
+    """
+    Запрос в планировщике.
+
+    Args:
+        request_id: Номер запроса
+        kind: Тип запроса ("chat", "stt" и т.п.)
+        fn: Функция, которая выполняет запрос
+        priority: Приоритет (PRIORITY_*)
+    """
+
+    def __init__(self, request_id: int, kind: str, fn: Callable[[], Any], priority: int):
+        self.request_id = request_id
+        self.kind = kind
+        self.priority = priority
+        self.future = concurrent.futures.Future()
+        self.cancel_reason = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self._fn = fn
+        self._cancelled = threading.Event()
+        self._cancel_callbacks: List[Callable[[], Any]] = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """True, если запрос отменен или вытеснен."""
+        return self._cancelled.is_set()
+
+    @property
+    def state(self) -> str:
+        """Состояние запроса: queued, running, cancelled или done."""
+        if self.cancelled:
+            return "cancelled"
+        if self.future.done():
+            return "done"
+        return "running" if self.started_at is not None else "queued"
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        Отменяет запрос. Запрос из очереди не будет выполнен, у выполняющегося
+        запроса отбрасывается результат.
+
+        Args:
+            reason: Причина отмены ("cancelled" или "superseded")
+
+        Returns:
+            True, если запрос еще не был завершен
+        """
+        if self.future.done() or self.cancelled:
+            return False
+        self.cancel_reason = reason
+        with self._callbacks_lock:
+            self._cancelled.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        self.future.cancel()
+        logger.info(f"Запрос #{self.request_id} ({self.kind}) отменен: {reason}")
+        for callback in callbacks:
+            self._call(callback)
+        return True
+
+    def add_cancel_callback(self, callback: Callable[[], Any]):
+        """
+        Регистрирует функцию, которая вызывается при отмене запроса
+        (например, отмена future корутины на фоновом цикле). Если запрос
+        уже отменен, функция вызывается сразу.
+
+        Args:
+            callback: Функция без аргументов
+        """
+        with self._callbacks_lock:
+            if not self.cancelled:
+                self._cancel_callbacks.append(callback)
+                return
+        self._call(callback)
+
+    def _call(self, callback: Callable[[], Any]):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Ошибка в обработчике отмены запроса #{self.request_id}: {e}")
+
+    def done(self) -> bool:
+        """True, если запрос завершен или отменен."""
+        return self.future.done() or self.cancelled
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Ждет и возвращает результат запроса."""
+        return self.future.result(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requestId": self.request_id,
+            "kind": self.kind,
+            "state": self.state,
+            "age": round(time.monotonic() - self.submitted_at, 3)
+        }
+
+    def _run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        self.started_at = time.monotonic()
+        token = _current_request.set(self)
+        try:
+            self.future.set_result(self._fn())
+        except BaseException as e:
+            self.future.set_exception(e)
+        finally:
+            _current_request.reset(token)
+
+
+class RequestScheduler:
+    """
+    Выполняет запросы на ограниченном пуле потоков с приоритетами и отменой.
+
+    Args:
+        max_workers: Количество рабочих потоков
+        max_queue: Максимальное количество запросов, ожидающих выполнения
+        name: Префикс имен рабочих потоков
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, name: str = "scheduler"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._active: Dict[int, ScheduledRequest] = {}
+        self._ids = itertools.count(1)
+        self._workers: List[threading.Thread] = []
+        # Отмена запроса из очереди сразу вызывает _finish под той же блокировкой
+        self._lock = threading.RLock()
+        self._completed = 0
+        self._cancelled = 0
+
+    def _ensure_workers(self):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"{self.name}-{len(self._workers)}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, kind: str, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+               supersede: bool = False, **kwargs) -> ScheduledRequest:
+        """
+        Ставит запрос в очередь.
+
+        Args:
+            kind: Тип запроса
+            fn: Функция запроса
+            *args: Позиционные аргументы функции
+            priority: Приоритет (PRIORITY_*)
+            supersede: Отменить незавершенные запросы того же типа
+            **kwargs: Именованные аргументы функции
+
+        Returns:
+            ScheduledRequest с номером и результатом запроса
+
+        Raises:
+            QueueFullError: Если в очереди уже max_queue запросов
+        """
+        with self._lock:
+            if supersede:
+                for request in list(self._active.values()):
+                    if request.kind == kind and request.cancel("superseded"):
+                        self._cancelled += 1
+            if self._queued_locked() >= self.max_queue:
+                raise QueueFullError(f"Очередь запросов переполнена ({self.max_queue})")
+
+            request = ScheduledRequest(next(self._ids), kind, lambda: fn(*args, **kwargs), priority)
+            self._active[request.request_id] = request
+            request.future.add_done_callback(lambda _, request_id=request.request_id: self._finish(request_id))
+            self._ensure_workers()
+            self._queue.put((priority, request.request_id, request))
+        logger.info(f"Запрос #{request.request_id} ({kind}) поставлен в очередь")
+        return request
+
+    def _work(self):
+        while True:
+            _, _, request = self._queue.get()
+            if request is None:
+                return
+            request._run()
+
+    def _finish(self, request_id: int):
+        with self._lock:
+            request = self._active.pop(request_id, None)
+            if request is not None and not request.cancelled:
+                self._completed += 1
+
+    def cancel(self, request_id: Optional[int] = None, kind: Optional[str] = None) -> int:
+        """
+        Отменяет запросы по номеру или типу (без аргументов — все незавершенные).
+
+        Args:
+            request_id: Номер запроса
+            kind: Тип запросов
+
+        Returns:
+            Количество отмененных запросов
+        """
+        count = 0
+        with self._lock:
+            for request in list(self._active.values()):
+                if request_id is not None and request.request_id != request_id:
+                    continue
+                if kind is not None and request.kind != kind:
+                    continue
+                if request.cancel():
+                    count += 1
+            self._cancelled += count
+        return count
+
+    def _queued_locked(self) -> int:
+        return sum(1 for request in self._active.values() if request.state == "queued")
+
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих выполнения."""
+        with self._lock:
+            return self._queued_locked()
+
+    def status(self) -> Dict[str, Any]:
+        """Возвращает состояние очереди и незавершенные запросы."""
+        with self._lock:
+            requests = [request.to_dict() for request in self._active.values()]
+            return {
+                "queued": sum(1 for request in requests if request["state"] == "queued"),
+                "running": sum(1 for request in requests if request["state"] == "running"),
+                "workers": self.max_workers,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "requests": requests
+            }
+
+    def shutdown(self):
+        """Останавливает рабочие потоки после завершения текущих запросов."""
+        self.cancel()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put((PRIORITY_CONTROL - 1, 0, None))
+        for worker in workers:
+            worker.join(timeout=5)
+
+
+def current_request() -> Optional[ScheduledRequest]:
+    """Запрос планировщика, в контексте которого выполняется код (или None)."""
+    return _current_request.get()
+
+
+def request_cancelled() -> bool:
+    """True, если текущий запрос планировщика отменен или вытеснен."""
+    request = _current_request.get()
+    return request is not None and request.cancelled
+
+
+def check_cancelled():
+    """
+    Прерывает текущий запрос, если он отменен или вытеснен.
+
+    Raises:
+        RequestCancelled: Если текущий запрос отменен
+    """
+    request = _current_request.get()
+    if request is not None and request.cancelled:
+        raise RequestCancelled(f"Запрос #{request.request_id} отменен: {request.cancel_reason}")
+
+
+def _create_scheduler() -> RequestScheduler:
+    from core.config import SCHEDULER_MAX_WORKERS, SCHEDULER_MAX_QUEUE
+    return RequestScheduler(max_workers=SCHEDULER_MAX_WORKERS, max_queue=SCHEDULER_MAX_QUEUE)
+
+
+# Общий планировщик запросов от интерфейса
+request_scheduler = _create_scheduler()
@@ -2,6 +2,7 @@
 import logging
 import time
 import os
+import atexit
 import traceback
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -10,10 +11,13 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 # Импортируем модуль для улучшения промптов
 from integrations.prompt_enhancer import enhance_prompt
+from integrations.driver_pool import ChromeDriverPool, PooledDriver
+from core.config import BROWSER_POOL_SIZE, BROWSER_POOL_MAX_QUERIES
+from core.scheduler import RequestCancelled, check_cancelled
 
 # Настройка логирования
 logger = logging.getLogger("browser_chat")
@@ -134,18 +138,301 @@ def wait_for_chatgpt_ready(driver, timeout=30):
         logger.error(f"Ошибка при ожидании готовности ChatGPT: {e}")
         return None
 
-def send_query_to_chatgpt(query: str, enhance=True, headless=False, timeout=60) -> str:
+def prepare_chatgpt_session(session: PooledDriver, timeout=30):
     """
-    Отправляет запрос в ChatGPT через браузер и возвращает ответ.
+    Открывает ChatGPT в драйвере из пула и запоминает поле ввода.
+    
+    Args:
+        session: Драйвер из пула
+        timeout: Время ожидания загрузки страницы в секундах
+    """
+    logger.info(f"Открываем {CHATGPT_URL}")
+    session.driver.get(CHATGPT_URL)
+    session.input_element = wait_for_chatgpt_ready(session.driver, timeout=timeout)
+    if not session.input_element:
+        raise RuntimeError("Не удалось найти поле ввода на странице ChatGPT")
+
+def get_input_element(session: PooledDriver):
+    """
+    Возвращает поле ввода прогретой страницы. Если сохраненный элемент устарел,
+    ищет его заново, а в крайнем случае перезагружает ChatGPT.
+    
+    Args:
+        session: Драйвер из пула
+        
+    Returns:
+        Элемент ввода или None, если не удалось найти
+    """
+    if session.input_element is not None:
+        try:
+            if session.input_element.is_displayed() and session.input_element.is_enabled():
+                return session.input_element
+        except WebDriverException:
+            logger.debug("Сохраненное поле ввода устарело, ищем заново")
+
+    session.input_element = wait_for_chatgpt_ready(session.driver, timeout=10)
+    if session.input_element:
+        return session.input_element
+
+    logger.info("Поле ввода не найдено, перезагружаем страницу ChatGPT")
+    session.driver.get(CHATGPT_URL)
+    session.input_element = wait_for_chatgpt_ready(session.driver, timeout=30)
+    return session.input_element
+
+# Пулы драйверов (отдельно для фонового и видимого режима)
+_driver_pools = {}
+
+def get_driver_pool(headless=False) -> ChromeDriverPool:
+    """
+    Возвращает общий пул прогретых драйверов для указанного режима браузера.
+    
+    Args:
+        headless: Запускать ли браузер в фоновом режиме
+        
+    Returns:
+        Экземпляр ChromeDriverPool
+    """
+    pool = _driver_pools.get(headless)
+    if pool is None:
+        pool = ChromeDriverPool(
+            create_driver=lambda: create_chrome_driver(headless=headless),
+            prepare_driver=prepare_chatgpt_session,
+            size=BROWSER_POOL_SIZE,
+            max_queries=BROWSER_POOL_MAX_QUERIES
+        )
+        _driver_pools[headless] = pool
+    return pool
+
+def close_driver_pools():
+    """Закрывает все браузеры из пулов (при завершении приложения)."""
+    for pool in list(_driver_pools.values()):
+        pool.close()
+    _driver_pools.clear()
+
+atexit.register(close_driver_pools)
+
+# Селекторы индикаторов генерации ответа
+LOADING_INDICATORS = [
+    "div.result-streaming",
+    "div.result-thinking",
+    "div.animate-pulse",
+    "button.stop-generating",
+    "button[data-testid='stop-button']"
+]
+
+# Кнопки остановки генерации ответа
+STOP_BUTTONS = [
+    "button[data-testid='stop-button']",
+    "button.stop-generating"
+]
+
+# Скрипт нажимает кнопку остановки, если ответ еще генерируется
+STOP_GENERATION_SCRIPT = """
+for (const sel of arguments[0]) {
+    const button = document.querySelector(sel);
+    if (button) {
+        button.click();
+        return true;
+    }
+}
+return false;
+"""
+
+# Селекторы блоков с ответами
+RESPONSE_SELECTORS = [
+    "div.markdown",
+    "div.prose",
+    "div.chat-message-content",
+    "div.message-body",
+    "div.text-message__content"
+]
+
+# Скрипт одним вызовом возвращает число ответов, текст последнего и признак генерации
+READ_RESPONSE_SCRIPT = """
+const selectors = arguments[0];
+const indicators = arguments[1];
+const streaming = indicators.some(sel => document.querySelector(sel) !== null);
+for (const sel of selectors) {
+    const nodes = document.querySelectorAll(sel);
+    if (nodes.length > 0) {
+        return {selector: sel, count: nodes.length, text: nodes[nodes.length - 1].innerText, streaming: streaming};
+    }
+}
+return {selector: null, count: 0, text: "", streaming: streaming};
+"""
+
+def read_response_state(driver) -> dict:
+    """
+    Считывает текущее состояние ответов на странице ChatGPT.
+    
+    Args:
+        driver: Экземпляр webdriver
+        
+    Returns:
+        Словарь {selector, count, text, streaming}
+    """
+    state = driver.execute_script(READ_RESPONSE_SCRIPT, RESPONSE_SELECTORS, LOADING_INDICATORS)
+    return state or {"selector": None, "count": 0, "text": "", "streaming": False}
+
+class ResponseRewrite:
+    """
+    Событие потока ответа: ChatGPT не дописал, а переписал уже выданный текст
+    (например, перерисовал markdown или блок кода).
+    
+    Args:
+        text: Полный текст ответа на данный момент — заменяет все выданное ранее
+        prefix: Длина общего начала старого и нового текста
+    """
+    
+    def __init__(self, text: str, prefix: int):
+        self.text = text
+        self.prefix = prefix
+    
+    def __repr__(self):
+        return f"ResponseRewrite({self.text!r}, prefix={self.prefix})"
+
+def apply_chunk(answer: str, chunk) -> str:
+    """
+    Применяет часть потока ответа к уже собранному тексту.
+    
+    Args:
+        answer: Собранный текст ответа
+        chunk: Новый фрагмент (str) или ResponseRewrite
+        
+    Returns:
+        Текст ответа с учетом части
+    """
+    if isinstance(chunk, ResponseRewrite):
+        return chunk.text
+    return answer + chunk
+
+def stop_generation(driver, timeout=2.0, poll_interval=0.1) -> bool:
+    """
+    Останавливает генерацию ответа, чтобы страницу можно было отдать следующему запросу.
+    
+    Args:
+        driver: Экземпляр webdriver
+        timeout: Сколько ждать исчезновения индикатора генерации в секундах
+        poll_interval: Интервал опроса страницы в секундах
+        
+    Returns:
+        True, если страница больше не генерирует ответ
+    """
+    try:
+        if driver.execute_script(STOP_GENERATION_SCRIPT, STOP_BUTTONS):
+            logger.info("Генерация ответа остановлена")
+        deadline = time.monotonic() + timeout
+        while read_response_state(driver)["streaming"]:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+    except Exception as e:
+        logger.warning(f"Не удалось остановить генерацию ответа: {e}")
+        return False
+
+def stream_chatgpt_response(driver, baseline: dict, timeout=60, poll_interval=0.15, settle_polls=3):
+    """
+    Генератор, который выдает ответ ChatGPT по частям, пока он еще печатается.
+    
+    Опрашивает последний блок ответа и отдает только добавившийся текст.
+    Если страница переписала уже выданный текст, выдается ResponseRewrite
+    с полным текстом, и поток продолжается от него (см. apply_chunk).
+    Ответ считается завершенным, когда индикатор генерации исчез и текст
+    не меняется settle_polls опросов подряд — без фиксированных пауз.
+    На каждом опросе проверяется отмена запроса планировщика.
+    
+    Args:
+        driver: Экземпляр webdriver
+        baseline: Состояние страницы до отправки запроса (read_response_state)
+        timeout: Максимальное время ожидания ответа в секундах
+        poll_interval: Интервал опроса страницы в секундах
+        settle_polls: Сколько опросов подряд текст должен не меняться
+        
+    Yields:
+        Новые фрагменты текста ответа или ResponseRewrite
+        
+    Raises:
+        RequestCancelled: Если запрос вытеснен новой репликой
+    """
+    deadline = time.monotonic() + timeout
+    emitted = ""
+    last_text = None
+    stable = 0
+    started = False
+    
+    while time.monotonic() < deadline:
+        check_cancelled()
+        state = read_response_state(driver)
+        
+        # Ждем появления нового блока ответа (или изменения последнего, если селектор тот же)
+        if not started:
+            if state["count"] > baseline["count"] or (
+                    state["count"] and state["selector"] != baseline["selector"]) or (
+                    state["count"] == baseline["count"] and state["text"] and state["text"] != baseline["text"]):
+                started = True
+                logger.info(f"Начат прием ответа (селектор: {state['selector']})")
+            else:
+                time.sleep(poll_interval)
+                continue
+        
+        text = state["text"] or ""
+        if text and text != emitted:
+            if text.startswith(emitted):
+                delta = text[len(emitted):]
+                emitted = text
+                yield delta
+            else:
+                # Текст переписан, а не дописан — синхронизируемся с ним целиком
+                prefix = len(os.path.commonprefix([emitted, text]))
+                logger.info(f"Ответ переписан на странице с позиции {prefix}, синхронизируем")
+                emitted = text
+                yield ResponseRewrite(text, prefix)
+        
+        if text == last_text and not state["streaming"]:
+            stable += 1
+            if stable >= settle_polls:
+                logger.info(f"Ответ получен полностью ({len(text)} символов)")
+                return
+        else:
+            stable = 0
+        last_text = text
+        time.sleep(poll_interval)
+    
+    if not started:
+        # Ответ не найден по селекторам — пробуем последнее сообщение по XPath
+        try:
+            messages = driver.find_elements(By.XPATH, "//div[contains(@class, 'message') or contains(@class, 'chat-message')]")
+            if messages and messages[-1].text:
+                logger.info("Найден ответ по XPath")
+                yield messages[-1].text
+                return
+        except Exception as e:
+            logger.debug(f"Не удалось найти ответ по XPath: {e}")
+        raise TimeoutError("Не удалось найти ответ на странице ChatGPT")
+    
+    logger.warning("Тайм-аут при ожидании окончания ответа, возвращаем полученную часть")
+
+def stream_query_to_chatgpt(query: str, enhance=True, headless=False, timeout=60, pool=None):
+    """
+    Отправляет запрос в ChatGPT через браузер и выдает ответ по частям.
+    
+    Браузер берется из пула прогретых драйверов: страница ChatGPT уже загружена,
+    поле ввода найдено, поэтому запрос не платит за холодный старт Chrome.
     
     Args:
         query: Запрос пользователя
         enhance: Улучшать ли запрос с помощью prompt_enhancer
         headless: Запускать ли браузер в фоновом режиме
         timeout: Максимальное время ожидания ответа в секундах
+        pool: Пул драйверов (по умолчанию общий пул для режима headless)
         
-    Returns:
-        Ответ от ChatGPT или сообщение об ошибке
+    Yields:
+        Фрагменты ответа по мере того, как ChatGPT их печатает, или ResponseRewrite
+        
+    Raises:
+        RuntimeError, TimeoutError, WebDriverException при ошибках взаимодействия
+        RequestCancelled: Если запрос вытеснен новой репликой
     """
     # Улучшаем запрос, если требуется
     if enhance:
@@ -155,23 +442,29 @@ def send_query_to_chatgpt(query: str, enhance=True, headless=False, timeout=60)
         enhanced_query = query
         logger.info(f"Запрос без улучшения: {enhanced_query[:100]}...")
     
-    driver = None
+    if pool is None:
+        pool = get_driver_pool(headless=headless)
+    
+    # Берем прогретый драйвер из пула
+    session = pool.acquire(timeout=timeout)
+    broken = False
     try:
-        # Создаем драйвер Chrome
-        driver = create_chrome_driver(headless=headless)
+        driver = session.driver
         
-        # Открываем ChatGPT
-        logger.info(f"Открываем {CHATGPT_URL}")
-        driver.get(CHATGPT_URL)
-        
-        # Ждем, пока страница загрузится и будет готова к вводу
-        input_element = wait_for_chatgpt_ready(driver, timeout=30)
+        # Поле ввода уже найдено при подготовке драйвера
+        input_element = get_input_element(session)
         if not input_element:
-            return "Ошибка: Не удалось найти поле ввода на странице ChatGPT"
+            broken = True
+            raise RuntimeError("Не удалось найти поле ввода на странице ChatGPT")
+        
+        # Запрос могли вытеснить, пока он ждал драйвер
+        check_cancelled()
+        
+        # Запоминаем состояние страницы, чтобы отличить новый ответ от предыдущих
+        baseline = read_response_state(driver)
         
         # Прокручиваем к элементу ввода
         driver.execute_script("arguments[0].scrollIntoView(true);", input_element)
-        time.sleep(1)
         
         # Очищаем поле ввода
         input_element.clear()
@@ -185,89 +478,55 @@ def send_query_to_chatgpt(query: str, enhance=True, headless=False, timeout=60)
         input_element.send_keys(Keys.RETURN)
         logger.info("Запрос отправлен, ожидаем ответа...")
         
-        # Ждем, пока появится ответ
-        wait = WebDriverWait(driver, timeout)
-        
-        # Ожидаем, пока исчезнет индикатор загрузки или появится ответ
-        try:
-            # Сначала проверяем наличие индикатора загрузки
-            loading_indicators = [
-                "div.result-streaming",
-                "div.result-thinking",
-                "div.animate-pulse",
-                "button.stop-generating"
-            ]
-            
-            for indicator in loading_indicators:
-                try:
-                    loading_element = driver.find_element(By.CSS_SELECTOR, indicator)
-                    logger.info(f"Найден индикатор загрузки: {indicator}")
-                    
-                    # Ждем, пока индикатор загрузки исчезнет
-                    wait.until(EC.invisibility_of_element_located((By.CSS_SELECTOR, indicator)))
-                    logger.info("Индикатор загрузки исчез, ответ готов")
-                    break
-                except NoSuchElementException:
-                    continue
-            
-            # Даем дополнительное время для полной загрузки ответа
-            time.sleep(2)
-        except TimeoutException:
-            logger.warning("Тайм-аут при ожидании исчезновения индикатора загрузки")
-        
-        # Пытаемся найти ответ
-        response_selectors = [
-            "div.markdown",
-            "div.prose",
-            "div.chat-message-content",
-            "div.message-body",
-            "div.text-message__content"
-        ]
-        
-        response_text = None
-        for selector in response_selectors:
-            try:
-                # Находим все элементы с ответами
-                response_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if response_elements:
-                    # Берем последний элемент (самый новый ответ)
-                    response_text = response_elements[-1].text
-                    logger.info(f"Найден ответ с селектором: {selector}")
-                    break
-            except Exception as e:
-                logger.debug(f"Не удалось найти ответ с селектором {selector}: {e}")
-                continue
+        yield from stream_chatgpt_response(driver, baseline, timeout=timeout)
+    except (GeneratorExit, RequestCancelled):
+        # Запрос вытеснен или потребитель прекратил чтение: останавливаем генерацию,
+        # чтобы драйвер сразу достался следующему запросу (не вышло — драйвер пересоздается)
+        broken = not stop_generation(driver)
+        raise
+    except Exception:
+        # Сбой браузера — драйвер будет пересоздан пулом
+        broken = True
+        raise
+    finally:
+        pool.release(session, broken=broken)
+
+def send_query_to_chatgpt(query: str, enhance=True, headless=False, timeout=60, pool=None) -> str:
+    """
+    Отправляет запрос в ChatGPT через браузер и возвращает ответ.
+    
+    Args:
+        query: Запрос пользователя
+        enhance: Улучшать ли запрос с помощью prompt_enhancer
+        headless: Запускать ли браузер в фоновом режиме
+        timeout: Максимальное время ожидания ответа в секундах
+        pool: Пул драйверов (по умолчанию общий пул для режима headless)
         
-        if not response_text:
-            # Если не нашли по селекторам, пробуем найти по XPath
-            try:
-                # Находим все сообщения
-                messages = driver.find_elements(By.XPATH, "//div[contains(@class, 'message') or contains(@class, 'chat-message')]")
-                if messages:
-                    # Берем последнее сообщение (самый новый ответ)
-                    response_text = messages[-1].text
-                    logger.info("Найден ответ по XPath")
-            except Exception as e:
-                logger.debug(f"Не удалось найти ответ по XPath: {e}")
+    Returns:
+        Ответ от ChatGPT или сообщение об ошибке
         
+    Raises:
+        RequestCancelled: Если запрос вытеснен новой репликой
+    """
+    try:
+        response_text = ""
+        for chunk in stream_query_to_chatgpt(query, enhance=enhance, headless=headless,
+                                             timeout=timeout, pool=pool):
+            response_text = apply_chunk(response_text, chunk)
         if response_text:
             logger.info(f"Получен ответ длиной {len(response_text)} символов")
             return response_text
         else:
             logger.error("Не удалось найти ответ на странице")
             return "Ошибка: Не удалось найти ответ на странице ChatGPT"
+    except RequestCancelled:
+        # Отмена — не ошибка браузера: результат вытесненного запроса никому не нужен
+        raise
     except Exception as e:
         error_msg = f"Ошибка при взаимодействии с ChatGPT: {str(e)}"
         logger.error(error_msg)
         logger.error(traceback.format_exc())
         return f"Ошибка: {error_msg}"
-    finally:
-        if driver:
-            try:
-                driver.quit()
-                logger.info("Браузер закрыт")
-            except Exception as e:
-                logger.error(f"Ошибка при закрытии браузера: {e}")
 
 # Пример использования
 if __name__ == "__main__":
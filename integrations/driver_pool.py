@@ -0,0 +1,237 @@
+# integrations/driver_pool.py
+"""
+Пул долгоживущих экземпляров браузера для browser_chat.py.
+
+Вместо того чтобы запускать Chrome и загружать ChatGPT на каждый запрос,
+пул держит несколько "прогретых" драйверов с уже открытой страницей и
+найденным полем ввода. Драйвер проверяется перед выдачей и пересоздается
+после заданного числа запросов или после сбоя.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("driver_pool")
+
+
+class PooledDriver:
+    """Драйвер из пула вместе с его состоянием между запросами."""
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.input_element = None
+        self.queries = 0
+        self.created_at = time.time()
+
+
+def default_health_check(driver: Any) -> bool:
+    """
+    Проверяет, что браузер жив и отвечает на команды.
+
+    Args:
+        driver: Экземпляр webdriver
+
+    Returns:
+        True, если драйвер пригоден для работы
+    """
+    try:
+        driver.execute_script("return document.readyState")
+        return True
+    except Exception as e:
+        logger.warning(f"Драйвер не прошел проверку здоровья: {e}")
+        return False
+
+
+class ChromeDriverPool:
+    """
+    Потокобезопасный пул драйверов браузера.
+
+    Args:
+        create_driver: Функция без аргументов, создающая новый драйвер
+        prepare_driver: Функция, подготавливающая PooledDriver (открывает страницу, ищет поле ввода)
+        size: Максимальное количество одновременно живых драйверов
+        max_queries: Количество запросов, после которого драйвер пересоздается
+        health_check: Функция проверки драйвера перед выдачей
+    """
+
+    def __init__(self,
+                 create_driver: Callable[[], Any],
+                 prepare_driver: Optional[Callable[[PooledDriver], None]] = None,
+                 size: int = 1,
+                 max_queries: int = 20,
+                 health_check: Callable[[Any], bool] = default_health_check):
+        self._create_driver = create_driver
+        self._prepare_driver = prepare_driver
+        self._health_check = health_check
+        self.size = max(1, size)
+        self.max_queries = max(1, max_queries)
+
+        self._lock = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._total = 0
+        self._closed = False
+
+        self._stats = {"created": 0, "reused": 0, "recycled": 0, "broken": 0}
+
+    def _spawn(self) -> PooledDriver:
+        """Создает и подготавливает новый драйвер (вызывается вне блокировки)."""
+        driver = self._create_driver()
+        session = PooledDriver(driver)
+        try:
+            if self._prepare_driver:
+                self._prepare_driver(session)
+        except Exception:
+            self._quit(session)
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        logger.info("В пул добавлен новый драйвер браузера")
+        return session
+
+    def _quit(self, session: PooledDriver):
+        """Закрывает драйвер, не пробрасывая ошибки."""
+        try:
+            session.driver.quit()
+            logger.info("Браузер закрыт")
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии браузера: {e}")
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """
+        Выдает рабочий драйвер из пула, при необходимости создавая новый.
+
+        Args:
+            timeout: Максимальное время ожидания свободного драйвера в секундах
+
+        Returns:
+            Экземпляр PooledDriver
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Пул драйверов закрыт")
+                while not self._idle and self._total >= self.size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Нет свободных драйверов браузера")
+                    self._lock.wait(remaining)
+                    if self._closed:
+                        raise RuntimeError("Пул драйверов закрыт")
+                session = self._idle.pop() if self._idle else None
+                if session is None:
+                    # Резервируем место под новый драйвер
+                    self._total += 1
+
+            if session is None:
+                try:
+                    return self._spawn()
+                except Exception:
+                    self._discard_slot()
+                    raise
+
+            if self._health_check(session.driver):
+                with self._lock:
+                    self._stats["reused"] += 1
+                return session
+
+            # Драйвер упал, пока лежал в пуле — выбрасываем и пробуем снова
+            with self._lock:
+                self._stats["broken"] += 1
+            self._quit(session)
+            self._discard_slot()
+
+    def release(self, session: PooledDriver, broken: bool = False):
+        """
+        Возвращает драйвер в пул.
+
+        Args:
+            session: Драйвер, полученный через acquire()
+            broken: True, если во время работы произошел сбой браузера
+        """
+        session.queries += 1
+        recycle = broken or session.queries >= self.max_queries
+        with self._lock:
+            if not recycle and not self._closed:
+                self._idle.append(session)
+                self._lock.notify()
+                return
+            if broken:
+                self._stats["broken"] += 1
+            else:
+                self._stats["recycled"] += 1
+
+        logger.info(f"Драйвер пересоздается (запросов: {session.queries}, сбой: {broken})")
+        self._quit(session)
+        self._discard_slot()
+
+    def _discard_slot(self):
+        with self._lock:
+            self._total -= 1
+            self._lock.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """
+        Контекстный менеджер для работы с драйвером из пула.
+        При исключении внутри блока драйвер считается сломанным.
+        """
+        session = self.acquire(timeout=timeout)
+        try:
+            yield session
+        except Exception:
+            self.release(session, broken=True)
+            raise
+        else:
+            self.release(session)
+
+    def warm_up(self, background: bool = True):
+        """
+        Заранее создает драйверы до размера пула, чтобы первый запрос
+        не платил за холодный старт браузера.
+        """
+        def _fill():
+            while True:
+                with self._lock:
+                    if self._closed or self._total >= self.size:
+                        return
+                    self._total += 1
+                try:
+                    session = self._spawn()
+                except Exception as e:
+                    logger.error(f"Не удалось прогреть драйвер браузера: {e}")
+                    self._discard_slot()
+                    return
+                with self._lock:
+                    closed = self._closed
+                    if not closed:
+                        self._idle.append(session)
+                        self._lock.notify()
+                if closed:
+                    # Пул закрыли, пока драйвер запускался: close() его уже не увидит
+                    self._quit(session)
+                    self._discard_slot()
+                    return
+
+        if background:
+            threading.Thread(target=_fill, daemon=True).start()
+        else:
+            _fill()
+
+    def close(self):
+        """Закрывает все свободные драйверы и запрещает выдачу новых."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._lock.notify_all()
+        for session in idle:
+            self._quit(session)
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику работы пула."""
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle), total=self._total)
@@ -1,35 +1,42 @@
 # integrations/orchestrator.py
 import logging
-import threading
-import asyncio
-import os
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional
+from contextlib import closing
 
-from integrations.browser_chat import send_query_to_chatgpt
-from utils.tts import generate_audio, stop_audio
+from integrations.browser_chat import stream_query_to_chatgpt, get_driver_pool, apply_chunk, ResponseRewrite
+from core.scheduler import RequestCancelled, check_cancelled
+from utils.tts import SpeechStream, stop_audio
 
 # Настройка логирования
 logger = logging.getLogger("orchestrator")
 
-# Директория для аудиофайлов
-AUDIO_DIR = "audio"
-
-def ensure_audio_dir():
-    """Проверяет и создает директорию для аудиофайлов, если она не существует."""
-    if not os.path.exists(AUDIO_DIR):
-        os.makedirs(AUDIO_DIR)
-        logger.info(f"Создана директория для аудиофайлов: {AUDIO_DIR}")
+def warm_up_browser(headless: bool = True):
+    """
+    Заранее запускает браузеры из пула и открывает в них ChatGPT,
+    чтобы первый запрос пользователя не ждал холодного старта Chrome.
+    
+    Args:
+        headless: Режим браузера, для которого прогревается пул
+    """
+    logger.info("Прогрев пула браузеров для ChatGPT...")
+    get_driver_pool(headless=headless).warm_up()
 
-def orchestrate_browser_chat(query: str, enhance: bool = True, headless: bool = True) -> Dict[str, Any]:
+def orchestrate_browser_chat(query: str, enhance: bool = True, headless: bool = True,
+                             on_delta: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
     """
-    Выполняет запрос к ChatGPT через браузер, получает ответ,
-    затем запускает TTS для озвучки и возвращает ответ.
+    Выполняет запрос к ChatGPT через браузер и возвращает ответ.
+    
+    Ответ читается по мере того, как ChatGPT его печатает: каждое завершенное
+    предложение сразу уходит в TTS, не дожидаясь конца ответа, а каждая
+    часть ответа — в on_delta (для интерфейса).
     
     Args:
         query: Запрос пользователя
         enhance: Улучшать ли запрос с помощью prompt_enhancer
         headless: Запускать ли браузер в фоновом режиме
+        on_delta: Функция для частей ответа: дописанный текст (str) или
+            ResponseRewrite с полным текстом, если страница переписала ответ
         
     Returns:
         Словарь с результатами запроса
@@ -39,54 +46,60 @@ def orchestrate_browser_chat(query: str, enhance: bool = True, headless: bool =
     # Останавливаем предыдущее аудио, если оно воспроизводится
     stop_audio()
     
-    # Проверяем и создаем директорию для аудиофайлов
-    ensure_audio_dir()
-    
-    # Формируем имя файла для аудио
-    timestamp = int(time.time())
-    audio_file = f"{AUDIO_DIR}/message_{timestamp}.mp3"
-    
+    # Предложения для озвучки передаются в TTS по мере появления в ответе
+    speech = SpeechStream(voice="ru-RU-SvetlanaNeural")
+    answer = ""
     try:
-        # Отправляем запрос в ChatGPT через браузер
+        # Отправляем запрос в ChatGPT через браузер и читаем ответ по мере печати
         logger.info("Отправка запроса в ChatGPT через браузер...")
-        answer = send_query_to_chatgpt(query, enhance=enhance, headless=headless)
+        started = time.monotonic()
+        # closing: при отмене генератор закрывается сразу и возвращает драйвер в пул
+        with closing(stream_query_to_chatgpt(query, enhance=enhance, headless=headless,
+                                             pool=get_driver_pool(headless=headless))) as chunks:
+            for chunk in chunks:
+                answer = apply_chunk(answer, chunk)
+                # Вытесненный запрос не озвучивает остаток ответа и сразу отпускает браузер
+                check_cancelled()
+                if on_delta:
+                    on_delta(chunk)
+                was_started = speech.started
+                # Переписанный ответ озвучивается с места, до которого текст уже передан в TTS
+                spoken = speech.rewrite(chunk.text) if isinstance(chunk, ResponseRewrite) else speech.feed(chunk)
+                if spoken and not was_started:
+                    logger.info(f"Первое предложение получено через {time.monotonic() - started:.2f} с")
         
-        if answer.startswith("Ошибка:"):
-            logger.error(f"Ошибка при получении ответа от ChatGPT: {answer}")
-            return {
-                "status": 500,
-                "message": "Произошла ошибка при обращении к ChatGPT",
-                "error": answer,
-                "source": "browser_chat"
-            }
+        if not answer.strip():
+            raise RuntimeError("Не удалось найти ответ на странице ChatGPT")
         
         logger.info(f"Получен ответ от ChatGPT длиной {len(answer)} символов")
         
-        # Запускаем TTS в отдельном потоке
-        def run_tts():
-            try:
-                logger.info(f"Запуск генерации аудио для ответа в файл {audio_file}")
-                asyncio.run(generate_audio(answer, output_file=audio_file, voice="ru-RU-SvetlanaNeural"))
-                logger.info("Аудио успешно сгенерировано")
-            except Exception as e:
-                logger.error(f"Ошибка при генерации аудио: {e}")
-        
-        tts_thread = threading.Thread(target=run_tts, daemon=True)
-        tts_thread.start()
+        # Озвучиваем хвост ответа без завершающего знака препинания
+        speech.close()
         
         return {
             "status": 200,
             "message": answer,
-            "audio_file": audio_file,
+            "source": "browser_chat"
+        }
+    except RequestCancelled as e:
+        logger.info(f"Запрос к ChatGPT прерван: {e}")
+        return {
+            "status": 499,
+            "message": "Запрос отменен",
             "source": "browser_chat"
         }
     except Exception as e:
-        logger.error(f"Ошибка при оркестрации запроса: {e}")
+        error = f"Ошибка: Ошибка при взаимодействии с ChatGPT: {str(e)}"
+        logger.error(f"Ошибка при получении ответа от ChatGPT: {error}")
         return {
             "status": 500,
-            "message": f"Произошла ошибка при обработке запроса: {str(e)}",
+            "message": "Произошла ошибка при обращении к ChatGPT",
+            "error": error,
             "source": "browser_chat"
         }
+    finally:
+        # Сообщаем конвейеру TTS, что новых предложений не будет
+        speech.close(speak_tail=False)
 
 # Пример вызова:
 if __name__ == "__main__":
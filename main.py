@@ -5,15 +5,23 @@ import logging
 import traceback
 import sys
 import json
+import queue
 
-import elevenlabs as eleven
 import webbrowser
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
-from utils.tts import stop_audio as tts_stop_audio
-from core.gpt_service import generate_gpt_response, handle_user_input
-from core.config import SECOND_OPENAI_API_KEY, ELEVENLABS_API_KEY
-import tempfile
+from utils.tts import stop_audio as tts_stop_audio, pause_audio as tts_pause_audio, resume_audio as tts_resume_audio
+from core.gpt_service import handle_user_input
+from core.metrics import gpt_metrics
+from core.scheduler import request_scheduler, QueueFullError, PRIORITY_INTERACTIVE
+from utils.stt import transcribe_bytes, MAX_AUDIO_BYTES
+from utils.streaming_stt import StreamingTranscriber
+from utils.vad import prepare_for_transcription
+from core.config import (
+    SECOND_OPENAI_API_KEY, ELEVENLABS_API_KEY, USE_BROWSER_FOR_ALL_REQUESTS,
+    STREAMING_STT, STREAMING_STT_WINDOW_CHUNKS, STREAMING_STT_OVERLAP_CHUNKS, VAD_ENABLED
+)
+from integrations.orchestrator import warm_up_browser
+from integrations.browser_chat import ResponseRewrite
 import base64
 
 from openai import OpenAI
@@ -73,14 +81,42 @@ except Exception as e:
     client = None
 
 # ✅ Глобальные переменные
-executor = ThreadPoolExecutor(max_workers=1)
 isRecognizing = False
+# Как часто части потокового ответа отправляются в интерфейс (в секундах)
+STREAM_FLUSH_INTERVAL = 0.05
+# Сколько ждать опоздавшие части записи при завершении потокового распознавания
+STREAMING_STT_CHUNK_TIMEOUT = 10
+
+def wait_for_request(request, on_idle=None):
+    """
+    Ждет запрос планировщика, не блокируя gevent-воркер eel.
+    
+    Пока запрос выполняется на пуле потоков, eel обрабатывает другие вызовы
+    из интерфейса (например, остановку звука).
+    
+    Args:
+        request: ScheduledRequest из request_scheduler.submit()
+        on_idle: Функция, которая вызывается на каждом шаге ожидания
+        
+    Returns:
+        Результат запроса или None, если запрос отменен
+    """
+    while not request.done():
+        if on_idle:
+            on_idle()
+        eel.sleep(STREAM_FLUSH_INTERVAL)
+    if request.cancelled:
+        return None
+    return request.result()
 
 # ✅ Функция для обработки аудио
 @eel.expose
 def transcribe_audio(b64_audio: str) -> str:
     """
-    Преобразует аудио в текст с помощью Whisper API.
+    Преобразует аудио в текст с помощью Whisper API (на пуле потоков планировщика).
+    
+    Оставлена для совместимости: интерфейс отправляет аудио на /api/transcribe
+    в двоичном виде, без base64.
     
     Args:
         b64_audio: Аудио в формате base64
@@ -91,6 +127,157 @@ def transcribe_audio(b64_audio: str) -> str:
     if not b64_audio:
         logger.warning("Получен пустой аудио-файл")
         return ""
+    try:
+        request = request_scheduler.submit("stt", recognize_audio, base64.b64decode(b64_audio),
+                                           priority=PRIORITY_INTERACTIVE)
+        return wait_for_request(request) or ""
+    except QueueFullError as e:
+        logger.warning(f"Запрос на распознавание отклонен: {e}")
+        return ""
+
+@eel.btl.route("/api/transcribe", method="POST")
+def transcribe_upload():
+    """
+    Принимает аудио в теле POST-запроса (audio/webm и т.п.) и возвращает распознанный текст.
+    
+    Тело читается прямо из wsgi.input: bottle.request.body сохранил бы
+    большое тело во временный файл.
+    
+    Returns:
+        JSON {"text": ...} или {"error": ...}
+    """
+    request = eel.btl.request
+    response = eel.btl.response
+    data = read_upload()
+    if data is None:
+        return json.dumps({"error": "Пустое или слишком большое аудио"})
+    try:
+        job = request_scheduler.submit("stt", recognize_audio, data, content_type=request.content_type,
+                                       priority=PRIORITY_INTERACTIVE)
+    except QueueFullError as e:
+        logger.warning(f"Запрос на распознавание отклонен: {e}")
+        response.status = 429
+        return json.dumps({"error": str(e)})
+    return json.dumps({"text": wait_for_request(job) or "", "bytes": len(data)})
+
+def read_upload(max_bytes: int = MAX_AUDIO_BYTES) -> bytes:
+    """
+    Читает тело POST-запроса прямо из wsgi.input (без временного файла bottle).
+    
+    Returns:
+        Тело запроса или None, если оно пустое или слишком большое
+        (код ответа уже выставлен)
+    """
+    request = eel.btl.request
+    response = eel.btl.response
+    response.content_type = "application/json"
+    length = request.content_length
+    if length <= 0:
+        response.status = 400
+        return None
+    if length > max_bytes:
+        response.status = 413
+        return None
+    return request.environ["wsgi.input"].read(length)
+
+def whisper_backend(data: bytes, content_type: str = "audio/webm") -> str:
+    """
+    Распознаватель для потоковых сессий: Whisper API или тестовый текст без ключа.
+    """
+    if client is None:
+        return "Тестовый текст"
+    return transcribe_bytes(client, data, content_type=content_type)
+
+# Сессии потокового распознавания (части записи приходят во время речи)
+streaming_stt = StreamingTranscriber(
+    whisper_backend,
+    window_chunks=STREAMING_STT_WINDOW_CHUNKS,
+    overlap_chunks=STREAMING_STT_OVERLAP_CHUNKS
+)
+
+@eel.btl.route("/api/transcribe/chunk", method="POST")
+def transcribe_chunk():
+    """
+    Принимает очередную часть записи (?session=...&seq=N) и возвращает частичный текст.
+    
+    Returns:
+        JSON {"partial": ...}; 404, если потоковое распознавание отключено
+    """
+    request = eel.btl.request
+    response = eel.btl.response
+    if not STREAMING_STT:
+        response.status = 404
+        return json.dumps({"error": "Потоковое распознавание отключено"})
+    
+    data = read_upload()
+    session_id = request.query.get("session")
+    if data is None or not session_id:
+        response.status = 400
+        return json.dumps({"error": "Нужны session и непустое тело запроса"})
+    try:
+        job = request_scheduler.submit("stt", streaming_stt.add_chunk, session_id,
+                                       int(request.query.get("seq", 0)), data,
+                                       content_type=request.content_type or "audio/webm",
+                                       priority=PRIORITY_INTERACTIVE)
+        return json.dumps({"partial": wait_for_request(job) or ""})
+    except QueueFullError as e:
+        response.status = 429
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        logger.error(f"Ошибка потокового распознавания: {e}")
+        response.status = 500
+        return json.dumps({"error": str(e)})
+
+@eel.btl.route("/api/transcribe/finish", method="POST")
+def transcribe_finish():
+    """
+    Завершает потоковую сессию (?session=...&chunks=N): распознает последнее окно.
+    
+    Returns:
+        JSON {"text": ...}; 404, если сессии нет
+    """
+    request = eel.btl.request
+    response = eel.btl.response
+    response.content_type = "application/json"
+    session_id = request.query.get("session")
+    if not session_id:
+        response.status = 400
+        return json.dumps({"error": "Нужен session"})
+    # Опоздавшие части ждем здесь, а не в рабочем потоке: они сами идут через планировщик
+    chunks = int(request.query.get("chunks") or 0)
+    session = streaming_stt.get(session_id)
+    deadline = time.monotonic() + STREAMING_STT_CHUNK_TIMEOUT
+    while (session is None or session.chunk_count < chunks) and chunks and time.monotonic() < deadline:
+        eel.sleep(STREAM_FLUSH_INTERVAL)
+        session = streaming_stt.get(session_id)
+    if session is None:
+        response.status = 404
+        return json.dumps({"error": f"Неизвестная сессия: {session_id}"})
+    try:
+        job = request_scheduler.submit("stt", streaming_stt.finish, session_id, priority=PRIORITY_INTERACTIVE)
+        return json.dumps({"text": wait_for_request(job) or ""})
+    except QueueFullError as e:
+        response.status = 429
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        logger.error(f"Ошибка потокового распознавания: {e}")
+        response.status = 500
+        return json.dumps({"error": str(e)})
+
+def recognize_audio(data: bytes, content_type: str = "audio/webm") -> str:
+    """
+    Преобразует аудио в текст с помощью Whisper API.
+    
+    Args:
+        data: Аудио в двоичном виде
+        content_type: MIME-тип аудио
+        
+    Returns:
+        Распознанный текст
+    """
+    if not data:
+        logger.warning("Получен пустой аудио-файл")
+        return ""
         
     # Для тестирования без API ключа
     if client is None:
@@ -98,42 +285,21 @@ def transcribe_audio(b64_audio: str) -> str:
         return "Тестовый текст для демонстрации работы без API ключа"
         
     try:
-        # Декодируем base64 в бинарные данные
-        data = base64.b64decode(b64_audio)
-        
-        # Создаем временный файл
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp:
-            tmp.write(data)
-            tmp_path = tmp.name
-        
-        logger.info(f"Аудио сохранено во временный файл: {tmp_path}")
-        
-        # Отправляем на распознавание
-        try:
-            with open(tmp_path, "rb") as audio_file:
-                rsp = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-            logger.info(f"Распознан текст: {rsp[:50]}...")
-            return rsp
-        except Exception as e:
-            logger.error(f"Ошибка при распознавании речи: {e}")
-            logger.error(traceback.format_exc())
-            return "Не удалось распознать речь. Пожалуйста, попробуйте еще раз."
+        # Тишина по краям обрезается, аудио сводится в моно 16 кГц
+        if VAD_ENABLED:
+            data, content_type, report = prepare_for_transcription(data, content_type)
+            if not data:
+                logger.info("Речь в записи не найдена")
+                return ""
         
+        # Аудио передается в Whisper из памяти, без временного файла
+        rsp = transcribe_bytes(client, data, content_type=content_type)
+        logger.info(f"Распознан текст: {rsp[:50]}...")
+        return rsp
     except Exception as e:
-        logger.error(f"Ошибка в transcribe_audio: {e}")
+        logger.error(f"Ошибка при распознавании речи: {e}")
         logger.error(traceback.format_exc())
-        return "Произошла ошибка при обработке аудио."
-    finally:
-        # Удаляем временный файл
-        try:
-            if 'tmp_path' in locals():
-                os.unlink(tmp_path)
-        except:
-            pass
+        return "Не удалось распознать речь. Пожалуйста, попробуйте еще раз."
 
 # ✅ Eel интерфейсные функции
 @eel.expose
@@ -151,6 +317,72 @@ def stop_audio_ui():
         logger.error(f"Ошибка при остановке аудио: {e}")
         return "Ошибка при остановке аудио"
 
+@eel.expose
+def pause_audio_ui():
+    """
+    Ставит воспроизведение аудио на паузу по запросу из UI.
+    
+    Returns:
+        Сообщение о результате операции
+    """
+    try:
+        return tts_pause_audio()
+    except Exception as e:
+        logger.error(f"Ошибка при паузе аудио: {e}")
+        return "Ошибка при паузе аудио"
+
+@eel.expose
+def resume_audio_ui():
+    """
+    Продолжает воспроизведение аудио по запросу из UI.
+    
+    Returns:
+        Сообщение о результате операции
+    """
+    try:
+        return tts_resume_audio()
+    except Exception as e:
+        logger.error(f"Ошибка при продолжении аудио: {e}")
+        return "Ошибка при продолжении аудио"
+
+@eel.expose
+def cancel_request_ui(request_id: int = None) -> str:
+    """
+    Отменяет запрос к ассистенту (без номера — все незавершенные) и останавливает озвучку.
+    
+    Выполняется сразу, не дожидаясь очереди планировщика.
+    
+    Args:
+        request_id: Номер запроса из ответа process_input
+        
+    Returns:
+        Состояние планировщика в формате JSON
+    """
+    count = request_scheduler.cancel(request_id=request_id, kind=None if request_id else "chat")
+    tts_stop_audio()
+    logger.info(f"Отменено запросов: {count}")
+    return json.dumps({"cancelled": count, **request_scheduler.status()})
+
+@eel.expose
+def get_scheduler_status() -> str:
+    """
+    Возвращает глубину очереди и незавершенные запросы планировщика.
+    
+    Returns:
+        Состояние планировщика в формате JSON
+    """
+    return json.dumps(request_scheduler.status())
+
+@eel.expose
+def get_gpt_metrics() -> str:
+    """
+    Возвращает сводку по токенам и попаданиям в кэш префикса для запросов к GPT.
+    
+    Returns:
+        Сводка и последние записи в формате JSON
+    """
+    return json.dumps({"summary": gpt_metrics.summary(), "records": gpt_metrics.records()[-20:]})
+
 @eel.expose
 def process_input(text: str) -> str:
     """
@@ -171,9 +403,54 @@ def process_input(text: str) -> str:
             })
             
         logger.info(f"Обработка запроса: {text[:50]}...")
-        response = handle_user_input(text)
+        
+        # Части потокового ответа приходят из рабочего потока, а в интерфейс
+        # отправляются отсюда, между короткими eel.sleep
+        deltas = queue.Queue()
+        
+        # Новая реплика вытесняет незавершенную: ее ответ уже не нужен
+        request = request_scheduler.submit("chat", handle_user_input, text, on_delta=deltas.put,
+                                           priority=PRIORITY_INTERACTIVE, supersede=True)
+        
+        def flush_deltas():
+            while not request.cancelled:
+                try:
+                    delta = deltas.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    if isinstance(delta, ResponseRewrite):
+                        # Браузерный чат переписал ответ: текст сообщения заменяется целиком
+                        eel.onAssistantDelta(delta.text, request.request_id, True)
+                    else:
+                        eel.onAssistantDelta(delta, request.request_id)
+                except Exception as e:
+                    logger.debug(f"Не удалось передать часть ответа в интерфейс: {e}")
+        
+        response = wait_for_request(request, on_idle=flush_deltas)
+        if response is None:
+            logger.info(f"Запрос #{request.request_id} вытеснен новым запросом")
+            return json.dumps({
+                "status": 409,
+                "gptMessage": "",
+                "superseded": True,
+                "requestId": request.request_id
+            })
+        flush_deltas()
         logger.info(f"Получен ответ от обработчика")
+        try:
+            data = json.loads(response)
+            data["requestId"] = request.request_id
+            response = json.dumps(data)
+        except (TypeError, ValueError):
+            pass
         return response
+    except QueueFullError as e:
+        logger.warning(f"Запрос отклонен: {e}")
+        return json.dumps({
+            "status": 429,
+            "gptMessage": "Слишком много запросов, попробуйте через несколько секунд."
+        })
     except Exception as e:
         logger.error(f"Ошибка в process_input: {e}")
         logger.error(traceback.format_exc())
@@ -251,6 +528,13 @@ def main():
             logger.error(traceback.format_exc())
             sys.exit(1)
         
+        # Прогреваем браузер для ChatGPT, пока загружается интерфейс
+        if USE_BROWSER_FOR_ALL_REQUESTS:
+            try:
+                warm_up_browser(headless=True)
+            except Exception as e:
+                logger.warning(f"Не удалось прогреть браузер: {e}")
+        
         # Пауза для загрузки интерфейса
         time.sleep(2)
         
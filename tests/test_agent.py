@@ -4,8 +4,12 @@
 
 import os
 import sys
+import json
+import time
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Добавляем корневую директорию проекта в путь
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -55,6 +59,99 @@ class TestAgent(unittest.TestCase):
         # Команды могут быть в виде списка или словаря
         self.assertTrue(isinstance(commands, dict) or isinstance(commands, list))
 
+    
+    @patch('core.agent.async_client')
+    def test_stream_chat_completion_collects_deltas(self, mock_async_client):
+        """Тест потокового ответа: части текста и вызовы функций собираются по мере прихода"""
+        def chunk(content=None, tool_calls=None):
+            delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        
+        def tool_part(index, name=None, arguments=None, id=None):
+            return SimpleNamespace(index=index, id=id,
+                                   function=SimpleNamespace(name=name, arguments=arguments))
+        
+        async def stream():
+            for item in [chunk("Сейчас "), chunk("открою."),
+                         chunk(tool_calls=[tool_part(0, name="open_app", id="call_1")]),
+                         chunk(tool_calls=[tool_part(0, arguments='{"app_name": ')]),
+                         chunk(tool_calls=[tool_part(0, arguments='"notepad"}')])]:
+                yield item
+        
+        mock_async_client.chat.completions.create = AsyncMock(return_value=stream())
+        deltas = []
+        
+        msg = asyncio.run(agent.stream_chat_completion([], on_delta=deltas.append))
+        
+        self.assertEqual(deltas, ["Сейчас ", "открою."])
+        self.assertEqual(msg.content, "Сейчас открою.")
+        self.assertEqual(msg.tool_calls[0].function.name, "open_app")
+        self.assertEqual(msg.tool_calls[0].function.arguments, '{"app_name": "notepad"}')
+        self.assertTrue(mock_async_client.chat.completions.create.call_args.kwargs["stream"])
+
+    
+    @patch('core.agent.async_client')
+    def test_stream_chat_completion_stops_when_cancelled(self, mock_async_client):
+        """Тест: отмененный запрос перестает читать поток ответа"""
+        async def stream():
+            for text in ["Первое. ", "Второе. ", "Третье."]:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text, tool_calls=None))])
+        
+        mock_async_client.chat.completions.create = AsyncMock(return_value=stream())
+        deltas = []
+        
+        with patch('core.agent.check_cancelled', side_effect=[None, agent.RequestCancelled("отменен")]):
+            with self.assertRaises(agent.RequestCancelled):
+                asyncio.run(agent.stream_chat_completion([], on_delta=deltas.append))
+        
+        self.assertEqual(deltas, ["Первое. "])
+
+    
+    def test_execute_tool_calls_runs_all_calls(self):
+        """Тест: выполняются все вызовы, чтение — параллельно, GUI — по порядку"""
+        order = []
+        
+        def slow_read(city=""):
+            time.sleep(0.3)
+            return f"погода {city}"
+        
+        def gui(name):
+            order.append(name)
+            return f"открыто {name}"
+        
+        def call(name, arguments):
+            return SimpleNamespace(id=f"call_{len(order)}_{name}",
+                                   function=SimpleNamespace(name=name, arguments=arguments))
+        
+        commands = {"get_weather": slow_read, "get_news": lambda: slow_read("новости"), "open_app": gui}
+        calls = [call("open_app", '{"name": "a"}'), call("get_weather", '{"city": "Астана"}'),
+                 call("get_news", ""), call("open_app", '{"name": "b"}'), call("unknown", "{}")]
+        
+        with patch.dict(agent.available_commands, commands, clear=True):
+            started = time.monotonic()
+            results = asyncio.run(agent.execute_tool_calls(calls))
+            elapsed = time.monotonic() - started
+        
+        self.assertEqual(results, ["открыто a", "погода Астана", "погода новости", "открыто b",
+                                   "Функция unknown не найдена."])
+        self.assertEqual(order, ["a", "b"])
+        # Два медленных запроса на чтение выполнялись одновременно
+        self.assertLess(elapsed, 0.55)
+
+    
+    def test_build_chat_request_stable_prefix(self):
+        """Тест: системный промпт и схемы команд одинаковы во всех запросах"""
+        history = [{"role": "system", "content": "Системный промпт"}, {"role": "user", "content": "Привет"}]
+        first = agent.build_chat_request(history[:2])
+        second = agent.build_chat_request(history + [{"role": "assistant", "content": "Здравствуйте"}],
+                                          tool_choice="none", stream=True)
+        
+        self.assertEqual(json.dumps(first["tools"], ensure_ascii=False),
+                         json.dumps(second["tools"], ensure_ascii=False))
+        self.assertEqual(first["messages"][0], second["messages"][0])
+        self.assertEqual(list(first)[:3], ["model", "messages", "tools"])
+        self.assertEqual(second["stream_options"], {"include_usage": True})
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Тесты для модуля async_loop.py
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.async_loop import BackgroundLoop
+
+
+class TestBackgroundLoop(unittest.TestCase):
+    """Тесты для общего фонового цикла событий"""
+    
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.background = BackgroundLoop(name="test-loop")
+    
+    def tearDown(self):
+        """Остановка цикла после каждого теста"""
+        self.background.stop()
+    
+    def test_same_loop_for_all_requests(self):
+        """Все запросы выполняются на одном долгоживущем цикле"""
+        async def current_loop():
+            return asyncio.get_running_loop(), threading.current_thread().name
+        
+        first = self.background.run(current_loop())
+        second = self.background.run(current_loop())
+        
+        self.assertIs(first[0], second[0])
+        self.assertEqual(first[1], "test-loop")
+    
+    def test_submitted_coroutines_run_concurrently(self):
+        """Корутины, отправленные из разных потоков, выполняются одновременно"""
+        started = []
+        both_started = asyncio.Event()
+        
+        async def job(name):
+            started.append(name)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+            return name
+        
+        futures = [self.background.submit(job("stt")), self.background.submit(job("llm"))]
+        self.assertEqual([f.result(timeout=3) for f in futures], ["stt", "llm"])
+    
+    def test_run_from_loop_thread_is_rejected(self):
+        """Синхронное ожидание из потока цикла запрещено (иначе цикл зависнет)"""
+        async def nested():
+            return 1
+        
+        async def outer():
+            with self.assertRaises(RuntimeError):
+                self.background.run(nested())
+            return True
+        
+        self.assertTrue(self.background.run(outer()))
+
+
+if __name__ == '__main__':
+    unittest.main()
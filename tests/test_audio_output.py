@@ -0,0 +1,81 @@
+"""
+Тесты для модуля audio_output.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.audio_output import AudioOutput
+
+
+class TestAudioOutput(unittest.TestCase):
+    """Тесты для постоянного сервиса вывода звука"""
+    
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.mixer = MagicMock()
+        self.mixer.get_init.return_value = False
+        self.channel = self.mixer.Channel.return_value
+        self.channel.get_busy.return_value = False
+        self.channel.get_queue.return_value = None
+        self.output = AudioOutput(self.mixer)
+    
+    def test_mixer_initialized_once(self):
+        """Микшер открывается один раз, повторные вызовы его не трогают"""
+        self.assertTrue(self.output.ensure_init())
+        self.mixer.get_init.return_value = True
+        self.output.play("clip-1")
+        self.output.stop()
+        self.output.play("clip-2")
+        
+        self.mixer.init.assert_called_once()
+        self.mixer.set_reserved.assert_called_once_with(1)
+        self.mixer.quit.assert_not_called()
+    
+    def test_clips_queued_without_gaps(self):
+        """Второй клип ставится в очередь канала, третий ждет места"""
+        self.output.play("clip-1")
+        self.channel.play.assert_called_once_with("clip-1")
+        
+        self.channel.get_busy.return_value = True
+        self.output.play("clip-2")
+        self.channel.queue.assert_called_once_with("clip-2")
+        
+        self.channel.get_queue.return_value = "clip-2"
+        self.output.play("clip-3")
+        self.assertEqual(self.output.pending_count(), 1)
+        
+        # Канал перешел ко второму клипу — третий занимает освободившуюся очередь
+        self.channel.get_queue.return_value = None
+        self.output.pump()
+        self.assertEqual(self.output.pending_count(), 0)
+        self.channel.queue.assert_called_with("clip-3")
+    
+    def test_stop_pause_resume(self):
+        """Остановка очищает очередь, пауза задерживает новые клипы"""
+        self.channel.get_busy.return_value = True
+        self.channel.get_queue.return_value = "queued"
+        self.output.play("clip-1")
+        self.output.play("clip-2")
+        self.output.stop()
+        self.assertEqual(self.output.pending_count(), 0)
+        self.channel.stop.assert_called()
+        
+        self.channel.get_busy.return_value = False
+        self.output.pause()
+        self.output.play("clip-3")
+        self.channel.play.assert_not_called()
+        self.assertTrue(self.output.is_busy())
+        
+        self.output.resume()
+        self.channel.unpause.assert_called_once()
+        self.channel.play.assert_called_once_with("clip-3")
+
+
+if __name__ == '__main__':
+    unittest.main()
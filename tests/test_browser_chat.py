@@ -0,0 +1,200 @@
+"""
+Тесты для модуля browser_chat.py
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from selenium.webdriver.common.keys import Keys
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from integrations.browser_chat import (READ_RESPONSE_SCRIPT, STOP_GENERATION_SCRIPT, ResponseRewrite,
+                                       apply_chunk, send_query_to_chatgpt, stream_chatgpt_response)
+from core.scheduler import RequestScheduler
+from integrations.orchestrator import orchestrate_browser_chat
+from utils.tts import SpeechStream
+
+
+def state(text, streaming=True, count=1):
+    """Состояние ответов на странице, как его возвращает READ_RESPONSE_SCRIPT"""
+    return {"selector": "div.markdown", "count": count, "text": text, "streaming": streaming}
+
+
+class FakeDriver:
+    """
+    Замена webdriver: каждый опрос ответа возвращает следующее состояние
+    страницы, последнее повторяется. Ответы из replies появляются на странице
+    после отправки следующих запросов.
+    """
+
+    def __init__(self, states, replies=()):
+        self.states = list(states)
+        self.replies = list(replies)
+        self.polls = 0
+        self.stopped = False
+
+    def submit(self):
+        if self.replies:
+            self.states = [self.replies.pop(0)]
+
+    def execute_script(self, script, *args):
+        if script == STOP_GENERATION_SCRIPT:
+            # Кнопка остановки: страница перестает генерировать ответ
+            self.stopped = True
+            self.states = [dict(self.states[0], streaming=False)]
+            return True
+        if script != READ_RESPONSE_SCRIPT:
+            return None
+        self.polls += 1
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+
+class FakeInput:
+    """Поле ввода прогретой страницы ChatGPT"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.sent = []
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def clear(self):
+        pass
+
+    def click(self):
+        pass
+
+    def send_keys(self, keys):
+        self.sent.append(keys)
+        if keys == Keys.RETURN:
+            self.driver.submit()
+
+
+class FakePool:
+    """Пул из одного драйвера: выдает его по очереди и запоминает, как драйвер был возвращен"""
+
+    def __init__(self, driver):
+        self.session = MagicMock(driver=driver, input_element=FakeInput(driver))
+        self.released = []
+        self._free = threading.Semaphore(1)
+
+    def acquire(self, timeout=None):
+        if not self._free.acquire(timeout=timeout):
+            raise TimeoutError("Нет свободных драйверов браузера")
+        return self.session
+
+    def release(self, session, broken=False):
+        self.released.append(broken)
+        self._free.release()
+
+
+# Страница печатает ответ, затем перерисовывает markdown последнего блока
+REWRITTEN = [
+    state("", count=0),                          # до отправки запроса
+    state("Hello "),
+    state("Hello **wor"),
+    state("Hello world."),
+    state("Hello world. Next part"),
+    state("Hello world. Next part done.", streaming=False),
+]
+
+
+class TestBrowserChat(unittest.TestCase):
+    """Тесты для чтения ответа ChatGPT по мере печати"""
+
+    def collect(self, states):
+        driver = FakeDriver(states)
+        baseline = driver.execute_script(READ_RESPONSE_SCRIPT)
+        return list(stream_chatgpt_response(driver, baseline, timeout=5, poll_interval=0, settle_polls=2))
+
+    def test_appended_text_streams_as_deltas(self):
+        """Дописанный текст выдается только добавившимися частями"""
+        chunks = self.collect([state("", count=0), state("Привет"), state("Привет, мир."),
+                               state("Привет, мир.", streaming=False)])
+        self.assertEqual(chunks, ["Привет", ", мир."])
+
+    def test_rewritten_text_resyncs(self):
+        """Переписанный текст не обрывает поток: ответ собирается целиком"""
+        chunks = self.collect(REWRITTEN)
+        rewrites = [chunk for chunk in chunks if isinstance(chunk, ResponseRewrite)]
+        self.assertEqual(len(rewrites), 1)
+        self.assertEqual(rewrites[0].prefix, len("Hello "))
+
+        answer = ""
+        for chunk in chunks:
+            answer = apply_chunk(answer, chunk)
+        self.assertEqual(answer, "Hello world. Next part done.")
+
+    def test_send_query_returns_full_rewritten_answer(self):
+        """send_query_to_chatgpt возвращает полный ответ и возвращает драйвер в пул исправным"""
+        pool = FakePool(FakeDriver(REWRITTEN))
+        self.assertEqual(send_query_to_chatgpt("вопрос", enhance=False, timeout=5, pool=pool),
+                         "Hello world. Next part done.")
+        self.assertEqual(pool.session.input_element.sent[0], "вопрос")
+        self.assertEqual(pool.released, [False])
+
+    def test_orchestrator_passes_parts_to_interface(self):
+        """Оркестратор передает части ответа в on_delta по мере печати, переписанный ответ — целиком"""
+        pool = FakePool(FakeDriver(REWRITTEN))
+        parts = []
+        with patch("integrations.orchestrator.get_driver_pool", return_value=pool), \
+                patch("integrations.orchestrator.stop_audio"), \
+                patch("integrations.orchestrator.SpeechStream"), \
+                patch("integrations.browser_chat.enhance_prompt", side_effect=lambda query: query):
+            result = orchestrate_browser_chat("вопрос", on_delta=parts.append)
+        
+        self.assertEqual(result["message"], "Hello world. Next part done.")
+        self.assertEqual(parts[:2], ["Hello ", "**wor"])
+        self.assertIsInstance(parts[2], ResponseRewrite)
+        self.assertEqual(parts[2].text, "Hello world.")
+        self.assertEqual(parts[3:], [" Next part", " done."])
+    
+    def test_superseded_request_releases_driver(self):
+        """Вытесненный запрос прерывает опрос страницы, останавливает генерацию и отдает драйвер"""
+        # Первый ответ печатается бесконечно, второй приходит сразу
+        driver = FakeDriver([state("", count=0), state("Очень длинный ответ")],
+                            replies=[state("Очень длинный ответ"), state("Новый ответ", count=2, streaming=False)])
+        pool = FakePool(driver)
+        scheduler = RequestScheduler(max_workers=2)
+        try:
+            old = scheduler.submit("chat", send_query_to_chatgpt, "старый вопрос", enhance=False,
+                                   timeout=30, pool=pool)
+            while driver.polls < 3:
+                time.sleep(0.01)
+            started = time.monotonic()
+            new = scheduler.submit("chat", send_query_to_chatgpt, "новый вопрос", enhance=False,
+                                   timeout=30, pool=pool, supersede=True)
+            self.assertTrue(old.cancelled)
+            self.assertEqual(new.result(timeout=5), "Новый ответ")
+            self.assertLess(time.monotonic() - started, 3)
+        finally:
+            scheduler.shutdown()
+        
+        self.assertTrue(driver.stopped)
+        self.assertEqual(pool.released, [False, False])   # драйвер возвращен в пул, а не пересоздан
+        self.assertEqual(pool.session.input_element.sent[::2], ["старый вопрос", "новый вопрос"])
+    
+    def test_speech_skips_unfinished_rewritten_tail(self):
+        """Озвучка берет переписанный хвост из нового текста, не повторяя сказанное"""
+        worker = MagicMock()
+        speech = SpeechStream(worker=worker)
+        speech.feed("Первое. Hello **wor")
+        speech.rewrite("Первое. Hello world. Next")
+        speech.feed(" part done.")
+        speech.close()
+        sentences = worker.speak_stream.call_args.args[0]
+        self.assertEqual(list(sentences), ["Первое.", "Hello world.", "Next part done."])
+
+
+if __name__ == '__main__':
+    unittest.main()
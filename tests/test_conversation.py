@@ -0,0 +1,129 @@
+"""
+Тесты для модуля conversation.py
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.conversation import Conversation, estimate_tokens
+
+
+class TestConversation(unittest.TestCase):
+    """Тесты для истории диалога с бюджетом токенов"""
+    
+    def add_turn(self, conversation, question, answer):
+        conversation.add_message(role="user", content=question)
+        conversation.add_message(role="assistant", content=answer)
+    
+    def test_history_kept_between_turns(self):
+        """Последующий запрос видит предыдущие реплики"""
+        conversation = Conversation("Системный промпт")
+        self.add_turn(conversation, "Открой блокнот", "Открываю блокнот")
+        conversation.add_message(role="user", content="А теперь закрой его")
+        
+        roles = [message["role"] for message in conversation.get_messages()]
+        self.assertEqual(roles, ["system", "user", "assistant", "user"])
+    
+    def test_token_count_is_incremental(self):
+        """Счетчик токенов равен сумме оценок отдельных сообщений"""
+        conversation = Conversation("Системный промпт")
+        self.add_turn(conversation, "Какая погода?", "Солнечно")
+        expected = sum(estimate_tokens(message) for message in conversation.get_messages())
+        self.assertEqual(conversation.token_count, expected)
+    
+    def test_old_turns_evicted_system_prompt_pinned(self):
+        """При превышении бюджета вытесняются старые реплики, системный промпт остается"""
+        conversation = Conversation("Системный промпт", max_tokens=60)
+        for i in range(10):
+            self.add_turn(conversation, f"Вопрос номер {i} " + "слово " * 5, f"Ответ номер {i}")
+        
+        messages = conversation.get_messages()
+        self.assertEqual(messages[0]["content"], "Системный промпт")
+        self.assertLessEqual(conversation.token_count, 60)
+        self.assertGreater(conversation.evicted_turns, 0)
+        self.assertEqual(messages[-1]["content"], "Ответ номер 9")
+        self.assertEqual(messages[1]["role"], "user")
+    
+    def test_tool_messages_evicted_with_their_turn(self):
+        """Сообщения с результатами команд вытесняются вместе со своей репликой"""
+        conversation = Conversation("Системный промпт", max_tokens=120)
+        conversation.add_message(role="user", content="Открой блокнот")
+        call = SimpleNamespace(id="call_1", function=SimpleNamespace(name="open_app", arguments='{"name": "notepad"}'))
+        conversation.add_tool_calls([call])
+        conversation.add_message(role="tool", content="Приложение notepad успешно открыто", tool_call_id="call_1")
+        conversation.add_message(role="assistant", content="Открыл блокнот")
+        for i in range(5):
+            self.add_turn(conversation, f"Вопрос {i} " + "текст " * 10, f"Ответ {i}")
+        
+        messages = conversation.get_messages()
+        self.assertNotIn("tool", [message["role"] for message in messages])
+        self.assertEqual(messages[1]["role"], "user")
+    
+    def test_turn_added_only_on_commit(self):
+        """Реплика попадает в историю целиком при commit; неудачная не оставляет следов"""
+        conversation = Conversation("Системный промпт")
+        self.add_turn(conversation, "Привет", "Здравствуйте")
+        failed = conversation.begin_turn()
+        failed.add_message(role="user", content="Запрос с ошибкой")
+        self.assertEqual(len(failed.get_messages()), 4)
+        self.assertEqual(len(conversation.get_messages()), 3)
+        
+        turn = conversation.begin_turn()
+        turn.add_message(role="user", content="Который час?")
+        turn.add_message(role="assistant", content="Полдень")
+        self.assertEqual(turn.token_count, conversation.token_count + sum(estimate_tokens(m) for m in turn.messages))
+        turn.commit()
+        
+        self.assertEqual([m["content"] for m in conversation.get_messages()][1:],
+                         ["Привет", "Здравствуйте", "Который час?", "Полдень"])
+        self.assertEqual(conversation.token_count,
+                         sum(estimate_tokens(message) for message in conversation.get_messages()))
+    
+    def test_concurrent_turns_do_not_interleave(self):
+        """Параллельные реплики не перемешивают сообщения: результаты команд идут сразу за вызовом"""
+        conversation = Conversation("Системный промпт")
+        first = conversation.begin_turn()
+        second = conversation.begin_turn()
+        first.add_message(role="user", content="Открой блокнот")
+        second.add_message(role="user", content="Какая погода?")
+        call = SimpleNamespace(id="call_1", function=SimpleNamespace(name="open_app", arguments='{"name": "notepad"}'))
+        first.add_tool_calls([call])
+        second.add_message(role="assistant", content="Солнечно")
+        second.commit()
+        first.add_message(role="tool", content="Приложение notepad успешно открыто", tool_call_id="call_1")
+        first.add_message(role="assistant", content="Открыл блокнот")
+        first.commit()
+        
+        roles = [message["role"] for message in conversation.get_messages()]
+        self.assertEqual(roles, ["system", "user", "assistant", "user", "assistant", "tool", "assistant"])
+
+    def test_seconds_since_last_turn(self):
+        """Время с последней реплики: бесконечность для пустой истории"""
+        conversation = Conversation("Системный промпт")
+        self.assertEqual(conversation.seconds_since_last_turn(), float("inf"))
+        self.add_turn(conversation, "Привет", "Здравствуйте")
+        self.assertLess(conversation.seconds_since_last_turn(), 5)
+        conversation.clear()
+        self.assertEqual(conversation.seconds_since_last_turn(), float("inf"))
+    
+    def test_eviction_down_to_low_watermark(self):
+        """Вытеснение идет до нижней границы, чтобы префикс не менялся каждую реплику"""
+        conversation = Conversation("Системный промпт", max_tokens=100, low_watermark=50)
+        evictions = []
+        for i in range(12):
+            self.add_turn(conversation, f"Вопрос {i} " + "слово " * 4, f"Ответ {i}")
+            evictions.append(conversation.evicted_turns)
+        
+        self.assertLessEqual(conversation.token_count, 100)
+        # Вытеснение происходит пачками, а не на каждой реплике
+        changes = sum(1 for before, after in zip(evictions, evictions[1:]) if after != before)
+        self.assertLess(changes, conversation.evicted_turns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Тесты для модуля driver_pool.py
+"""
+
+import os
+import sys
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from integrations.driver_pool import ChromeDriverPool
+
+
+class FakeDriver:
+    """Простейшая замена webdriver для тестов пула"""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return "complete"
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestDriverPool(unittest.TestCase):
+    """Тесты для пула драйверов браузера"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.created = []
+
+        def create_driver():
+            driver = FakeDriver()
+            self.created.append(driver)
+            return driver
+
+        self.prepared = []
+        self.pool = ChromeDriverPool(create_driver, prepare_driver=self.prepared.append,
+                                     size=1, max_queries=3)
+
+    def test_driver_reused_between_queries(self):
+        """Драйвер не пересоздается между запросами"""
+        with self.pool.session() as first:
+            pass
+        with self.pool.session() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(len(self.prepared), 1)
+
+    def test_recycle_after_max_queries(self):
+        """После max_queries запросов драйвер закрывается и создается новый"""
+        for _ in range(3):
+            with self.pool.session():
+                pass
+        self.assertTrue(self.created[0].quit_called)
+        with self.pool.session():
+            pass
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.pool.stats()["recycled"], 1)
+
+    def test_crashed_driver_replaced(self):
+        """Упавший драйвер не выдается повторно"""
+        with self.pool.session():
+            pass
+        self.created[0].alive = False
+        with self.pool.session() as session:
+            self.assertIs(session.driver, self.created[1])
+        self.assertTrue(self.created[0].quit_called)
+
+    def test_error_inside_session_marks_driver_broken(self):
+        """Исключение внутри сессии приводит к пересозданию драйвера"""
+        with self.assertRaises(ValueError):
+            with self.pool.session():
+                raise ValueError("boom")
+        self.assertTrue(self.created[0].quit_called)
+        self.assertEqual(self.pool.stats()["total"], 0)
+
+    def test_driver_spawned_during_close_is_quit(self):
+        """Драйвер, запущенный прогревом во время close(), закрывается, а не попадает в пул"""
+        def create_driver():
+            driver = FakeDriver()
+            self.created.append(driver)
+            self.pool.close()   # пул закрывают, пока браузер запускается
+            return driver
+
+        self.pool = ChromeDriverPool(create_driver, size=1)
+        self.pool.warm_up(background=False)
+
+        self.assertTrue(self.created[0].quit_called)
+        self.assertEqual(self.pool.stats()["idle"], 0)
+        self.assertEqual(self.pool.stats()["total"], 0)
+
+    def test_acquire_timeout_when_pool_exhausted(self):
+        """Если все драйверы заняты, acquire завершается по тайм-ауту"""
+        session = self.pool.acquire()
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire(timeout=0.05)
+        self.pool.release(session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Тесты для модуля incremental_ocr.py
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.incremental_ocr import IncrementalOCR, changed_tiles, tile_regions, dilate
+from utils.ocr_result import OCRResult
+
+
+class BlobOCR:
+    """
+    Заглушка OCR: каждое "слово" — прямоугольник своей яркости на черном фоне,
+    распознается как w<яркость> с рамкой по пикселям этой яркости. Слова,
+    центры которых в одной полосе высотой 40 пикселей, — одна строка
+    Tesseract в блоке 1.
+    """
+
+    def __init__(self):
+        self.crops = []
+
+    def image_to_data(self, image, lang=None, config=""):
+        self.crops.append(image.shape[:2])
+        data = {"text": [""], "conf": [-1], "left": [0], "top": [0], "width": [0], "height": [0]}
+        for value in np.unique(image[image > 0]):
+            ys, xs = np.nonzero(image == value)
+            data["text"].append(f"w{value}")
+            data["conf"].append(95)
+            data["left"].append(int(xs.min()))
+            data["top"].append(int(ys.min()))
+            data["width"].append(int(xs.max() - xs.min() + 1))
+            data["height"].append(int(ys.max() - ys.min() + 1))
+        bands = [(top + height // 2) // 40 for top, height in zip(data["top"][1:], data["height"][1:])]
+        data["block_num"] = [0] + [1] * len(bands)
+        data["par_num"] = list(data["block_num"])
+        data["line_num"] = [0] + [sorted(set(bands)).index(band) + 1 for band in bands]
+        return data
+
+
+def page():
+    """Страница 720x1280 с несколькими строками слов"""
+    frame = np.zeros((720, 1280), dtype=np.uint8)
+    value = 10
+    for row in range(40, 700, 80):
+        for col in range(20, 1200, 200):
+            frame[row:row + 20, col:col + 120] = value
+            value += 1
+    return frame
+
+
+def boxes(data):
+    return {text: (data["left"][i], data["top"][i], data["width"][i], data["height"][i])
+            for i, text in enumerate(data["text"])}
+
+
+class TestIncrementalOCR(unittest.TestCase):
+    """Тесты для распознавания изменившихся областей кадра"""
+
+    def test_changed_tiles_and_regions(self):
+        """Изменение в одной плитке отмечает только ее; расширение захватывает соседей"""
+        before = np.zeros((130, 200), dtype=np.uint8)
+        after = before.copy()
+        after[70, 100] = 255
+        mask = changed_tiles(before, after, tile=64)
+        self.assertEqual(mask.shape, (3, 4))
+        self.assertEqual(list(zip(*np.nonzero(mask))), [(1, 1)])
+        self.assertEqual(tile_regions(mask, 64, after.shape), [(64, 64, 64, 64)])
+        self.assertEqual(tile_regions(dilate(mask), 64, after.shape), [(0, 0, 192, 130)])
+
+    def test_first_frame_full_then_unchanged_frame_free(self):
+        """Первый кадр распознается целиком, неизменный кадр — без вызова OCR"""
+        ocr = BlobOCR()
+        engine = IncrementalOCR(ocr)
+        frame = page()
+
+        first = engine.image_to_data(frame)
+        second = engine.image_to_data(frame.copy())
+
+        self.assertEqual(ocr.crops, [(720, 1280)])
+        self.assertEqual(first, second)
+        self.assertEqual(len(first["text"]), 54)
+
+    def test_only_changed_region_is_recognized(self):
+        """После изменения одного слова OCR запускается на небольшой области"""
+        ocr = BlobOCR()
+        engine = IncrementalOCR(ocr)
+        frame = page()
+        expected = boxes(engine.image_to_data(frame))
+
+        changed = frame.copy()
+        changed[200:220, 420:540] = 250   # слово w24 заменено на w250
+        result = boxes(engine.image_to_data(changed))
+
+        height, width = ocr.crops[-1]
+        self.assertLess(height * width, 0.2 * 720 * 1280)
+        self.assertNotIn("w24", result)
+        self.assertEqual(result["w250"], (420, 200, 120, 20))
+        del expected["w24"]
+        for text, box in expected.items():
+            self.assertEqual(result[text], box)
+
+    def test_layout_ids_kept_after_update(self):
+        """Номера блоков и строк Tesseract сохраняются: новое слово продолжает свою строку"""
+        engine = IncrementalOCR(BlobOCR())
+        frame = page()
+        engine.image_to_data(frame)
+        
+        changed = frame.copy()
+        changed[200:220, 420:540] = 250   # слово w24 в строке w22..w27
+        changed[600:620, 1220:1260] = 251   # новое слово правее строки w52..w57
+        changed[300:310, 1220:1260] = 252   # новое слово между строками
+        data = engine.image_to_data(changed)
+        
+        layout = {text: (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                  for i, text in enumerate(data["text"])}
+        self.assertEqual(layout["w250"], layout["w22"])
+        self.assertEqual(layout["w251"], layout["w52"])
+        self.assertGreater(layout["w252"][0], 1)   # блок новой области не совпадает с блоком кадра
+        
+        result = OCRResult.from_data(data)
+        self.assertIn("w22 w23 w250 w25 w26 w27", result.text().split("\n"))
+        self.assertEqual(set(result.blocks), {1, layout["w252"][0]})
+    
+    def test_region_grows_to_whole_word(self):
+        """Если изменилась часть слова, область расширяется до всего слова без дублей"""
+        ocr = BlobOCR()
+        engine = IncrementalOCR(ocr, tile=32)
+        frame = page()
+        engine.image_to_data(frame)
+
+        changed = frame.copy()
+        changed[40:60, 100:140] = 0   # у слова w10 (x 20..139) стерт хвост
+        data = engine.image_to_data(changed)
+
+        self.assertEqual(data["text"].count("w10"), 1)
+        self.assertEqual(boxes(data)["w10"], (20, 40, 80, 20))
+
+    def test_large_change_falls_back_to_full(self):
+        """Если изменилась большая часть кадра, он распознается целиком"""
+        ocr = BlobOCR()
+        engine = IncrementalOCR(ocr)
+        frame = page()
+        engine.image_to_data(frame)
+
+        engine.image_to_data(np.roll(frame, 40, axis=0))
+
+        self.assertEqual(ocr.crops, [(720, 1280), (720, 1280)])
+        self.assertEqual(engine.stats()["full"], 2)
+
+    def test_image_to_string_groups_lines(self):
+        """Текст собирается по строкам слева направо"""
+        engine = IncrementalOCR(BlobOCR())
+        frame = np.zeros((100, 300), dtype=np.uint8)
+        frame[10:20, 150:200] = 2
+        frame[12:22, 10:60] = 1
+        frame[60:70, 10:60] = 3
+        self.assertEqual(engine.image_to_string(frame), "w1 w2\nw3")
+
+
+if __name__ == '__main__':
+    unittest.main()
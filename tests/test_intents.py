@@ -0,0 +1,100 @@
+"""
+Тесты для модуля intents.py
+"""
+
+import os
+import sys
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.intents import IntentMatcher
+
+
+def schema(command, **properties):
+    """Описание команды в формате commands_as_json"""
+    return {
+        "name": command,
+        "parameters": {
+            "type": "object",
+            "properties": {key: {"type": value} for key, value in properties.items()},
+            "required": list(properties)
+        }
+    }
+
+
+SCHEMAS = [
+    schema("open_app", name="string"),
+    schema("close_app", name="string"),
+    schema("go_back"),
+    schema("scroll_down"),
+    schema("refresh_page"),
+    schema("switch_tab_by_number", tab_number="integer"),
+    schema("get_weather", city="string"),
+]
+
+
+class TestIntents(unittest.TestCase):
+    """Тесты для локального распознавания команд"""
+    
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.matcher = IntentMatcher(SCHEMAS)
+    
+    def assertIntent(self, text, command, arguments=None):
+        match = self.matcher.match(text)
+        self.assertIsNotNone(match, text)
+        self.assertEqual(match.command, command)
+        self.assertEqual(match.arguments, arguments or {})
+        return match
+    
+    def test_simple_commands(self):
+        """Простые команды распознаются с полной уверенностью"""
+        self.assertEqual(self.assertIntent("Назад", "go_back").confidence, 1.0)
+        self.assertIntent("обнови страницу", "refresh_page")
+        self.assertIntent("Джарвис, открой калькулятор пожалуйста", "open_app", {"name": "калькулятор"})
+        self.assertIntent("какая погода в Алматы?", "get_weather", {"city": "Алматы"})
+    
+    def test_slot_types_from_schema(self):
+        """Номер вкладки разбирается из цифр и числительных по типу integer из схемы"""
+        self.assertIntent("вкладка 3", "switch_tab_by_number", {"tab_number": 3})
+        self.assertIntent("перейди на вкладку третью", "switch_tab_by_number", {"tab_number": 3})
+        # Более конкретный шаблон выигрывает у "открой {name}"
+        self.assertIntent("открой вкладку 2", "switch_tab_by_number", {"tab_number": 2})
+        self.assertIsNone(self.matcher.match("вкладка с погодой"))
+    
+    def test_whisper_misrecognitions(self):
+        """Небольшие ошибки распознавания не мешают совпадению, но снижают уверенность"""
+        match = self.assertIntent("прокути вниз", "scroll_down")
+        self.assertLess(match.confidence, 1.0)
+        self.assertGreaterEqual(match.confidence, 0.85)
+        self.assertIntent("обнови страничку", "refresh_page")
+    
+    def test_free_form_requests_go_to_llm(self):
+        """Свободные, составные и контекстные запросы не распознаются локально"""
+        self.assertIsNone(self.matcher.match("расскажи о Казахстане"))
+        self.assertIsNone(self.matcher.match("открой ютуб и найди котиков"))
+        self.assertIsNone(self.matcher.match("закрой его"))
+        self.assertIsNone(self.matcher.match("открой"))
+    
+    def test_open_slot_limited_to_known_apps(self):
+        """Открытый слот {name} уверенно совпадает только с известными приложениями"""
+        self.assertEqual(self.assertIntent("запусти телеграм", "open_app", {"name": "телеграм"}).confidence, 1.0)
+        self.assertGreaterEqual(self.matcher.match("открой калькулятр").confidence, 0.85)
+        for text in ("открой новую вкладку", "запусти таймер на 5 минут",
+                     "открой для меня инструкцию", "закрой все окна", "открой ютуб"):
+            match = self.matcher.match(text)
+            self.assertTrue(match is None or match.confidence < 0.85, text)
+        matcher = IntentMatcher(SCHEMAS, slot_values={"name": {"ютуб"}})
+        self.assertEqual(matcher.match("открой ютуб").confidence, 1.0)
+    
+    def test_phrases_for_unknown_commands_skipped(self):
+        """Шаблоны команд, которых нет в схемах, не компилируются"""
+        matcher = IntentMatcher([schema("go_back")])
+        self.assertIsNone(matcher.match("открой калькулятор"))
+        self.assertEqual(matcher.match("назад").command, "go_back")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Тесты для модуля metrics.py
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.metrics import MetricsRecorder
+
+
+class TestMetrics(unittest.TestCase):
+    """Тесты для метрик запросов к GPT"""
+    
+    def usage(self, prompt, completion, cached=None):
+        details = SimpleNamespace(cached_tokens=cached) if cached is not None else None
+        return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion,
+                               prompt_tokens_details=details)
+    
+    def test_record_contains_cached_tokens(self):
+        """Запись содержит токены запроса, ответа и кэша"""
+        recorder = MetricsRecorder()
+        record = recorder.record_usage(self.usage(2000, 50, cached=1536), round=1)
+        
+        self.assertEqual(record["prompt_tokens"], 2000)
+        self.assertEqual(record["completion_tokens"], 50)
+        self.assertEqual(record["cached_tokens"], 1536)
+        self.assertAlmostEqual(record["cache_hit_ratio"], 0.768)
+        self.assertEqual(record["round"], 1)
+    
+    def test_missing_usage_details(self):
+        """Отсутствующие usage и prompt_tokens_details считаются нулями"""
+        recorder = MetricsRecorder()
+        self.assertEqual(recorder.record_usage(None)["prompt_tokens"], 0)
+        self.assertEqual(recorder.record_usage(self.usage(100, 10))["cached_tokens"], 0)
+    
+    def test_summary_and_bounded_history(self):
+        """Сводка считает долю попаданий в кэш, хранятся только последние записи"""
+        recorder = MetricsRecorder(max_records=2)
+        recorder.record_usage(self.usage(1000, 10, cached=0))
+        recorder.record_usage(self.usage(1000, 10, cached=1000))
+        recorder.record_usage(self.usage(1000, 20, cached=500))
+        
+        summary = recorder.summary()
+        self.assertEqual(summary["requests"], 2)
+        self.assertEqual(summary["completion_tokens"], 30)
+        self.assertAlmostEqual(summary["cache_hit_rate"], 0.75)
+        self.assertEqual([r["request_id"] for r in recorder.records()], [2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
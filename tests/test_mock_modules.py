@@ -4,6 +4,7 @@
 
 import os
 import sys
+import threading
 import unittest
 
 # Добавляем корневую директорию проекта в путь
@@ -134,6 +135,18 @@ class TestMockModules(unittest.TestCase):
         devices = mock_sounddevice.query_devices()
         self.assertIsInstance(devices, dict)
         self.assertEqual(devices['name'], 'Mock Audio Device')
+        
+        # Проверяем, что InputStream передает блоки в callback
+        blocks = []
+        received = threading.Event()
+        
+        def callback(data, frames, time, status):
+            blocks.append(data)
+            received.set()
+        
+        with mock_sounddevice.InputStream(samplerate=16000, channels=1, blocksize=160, callback=callback):
+            self.assertTrue(received.wait(timeout=5))
+        self.assertEqual(blocks[0].shape, (160, 1))
     
     def test_mock_soundfile(self):
         """Тест заглушки soundfile"""
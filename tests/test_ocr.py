@@ -0,0 +1,134 @@
+"""
+Тесты для модуля ocr.py
+"""
+
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ocr import OCRCache, frame_hash
+
+
+class FakeTesseract:
+    """Заглушка pytesseract, считающая вызовы"""
+
+    class Output:
+        DICT = "dict"
+
+    def __init__(self):
+        self.calls = 0
+
+    def image_to_string(self, image, lang=None, config=""):
+        self.calls += 1
+        return f"текст {int(image.sum())}"
+
+    def image_to_data(self, image, lang=None, config="", output_type=None):
+        self.calls += 1
+        return {"text": ["Файл", "Правка"], "conf": [95, 90], "left": [10, 60], "top": [5, 5],
+                "width": [40, 50], "height": [12, 12]}
+
+
+def screen(height=1080, width=1920, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+class TestOCRCache(unittest.TestCase):
+    """Тесты для кэша OCR по хэшу кадра"""
+
+    def test_unchanged_frame_is_not_recognized_again(self):
+        """Повторный запрос к неизменному кадру берется из кэша"""
+        engine = FakeTesseract()
+        cache = OCRCache(engine)
+        frame = screen()
+
+        first = cache.image_to_string(frame)
+        second = cache.image_to_string(frame.copy())
+
+        self.assertEqual(first, second)
+        self.assertEqual(engine.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_changed_text_row_invalidates(self):
+        """Изменение строки текста (несколько пикселей по высоте) дает новый ключ"""
+        frame = screen()
+        changed = frame.copy()
+        changed[500:510, 300:340] = 0
+        self.assertNotEqual(frame_hash(frame), frame_hash(changed))
+
+        engine = FakeTesseract()
+        cache = OCRCache(engine)
+        cache.image_to_data(frame)
+        cache.image_to_data(changed)
+        self.assertEqual(engine.calls, 2)
+
+    def test_operation_and_language_are_part_of_key(self):
+        """Текст и данные о словах, разные языки кэшируются отдельно"""
+        engine = FakeTesseract()
+        cache = OCRCache(engine)
+        frame = screen(200, 300)
+
+        cache.image_to_string(frame)
+        cache.image_to_data(frame)
+        cache.image_to_data(frame, lang="eng")
+        self.assertEqual(engine.calls, 3)
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованный кадр"""
+        engine = FakeTesseract()
+        cache = OCRCache(engine, max_entries=2)
+        a, b, c = screen(50, 50, 1), screen(50, 50, 2), screen(50, 50, 3)
+
+        cache.image_to_string(a)
+        cache.image_to_string(b)
+        cache.image_to_string(a)   # a становится последним использованным
+        cache.image_to_string(c)   # вытесняет b
+        calls = engine.calls
+        cache.image_to_string(a)
+        self.assertEqual(engine.calls, calls)
+        cache.image_to_string(b)
+        self.assertEqual(engine.calls, calls + 1)
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_cached_data_is_not_shared(self):
+        """Изменение возвращенного словаря не портит запись кэша"""
+        cache = OCRCache(FakeTesseract())
+        frame = screen(100, 100)
+        data = cache.image_to_data(frame)
+        data["text"].clear()
+        self.assertEqual(cache.image_to_data(frame)["text"], ["Файл", "Правка"])
+
+    def test_region_of_frame(self):
+        """Хэш области кадра (строки не непрерывны) совпадает с хэшем ее копии"""
+        frame = screen()
+        region = frame[100:300, 200:900]
+        self.assertEqual(frame_hash(region), frame_hash(region.copy()))
+        self.assertNotEqual(frame_hash(region), frame_hash(frame[100:300, 201:901]))
+
+    def test_single_pixel_row_change_invalidates(self):
+        """Изменение одной строки пикселей (курсор, подчеркивание) дает новый ключ"""
+        frame = screen()
+        for row in (501, 502):
+            changed = frame.copy()
+            changed[row, 300:340] = 0
+            self.assertNotEqual(frame_hash(frame), frame_hash(changed))
+
+    def test_cache_hit_is_fast(self):
+        """Повторный запрос к кадру 1080p заметно быстрее распознавания"""
+        cache = OCRCache(FakeTesseract())
+        frame = screen()
+        cache.image_to_data(frame)
+        started = time.perf_counter()
+        for _ in range(10):
+            cache.image_to_data(frame)
+        self.assertLess((time.perf_counter() - started) / 10, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Тесты для модуля ocr_result.py
+"""
+
+import os
+import sys
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ocr_result import OCRResult, normalize_word
+from utils.text_match import edit_distances, fold_text
+
+
+def toolbar():
+    """Результат image_to_data для окна с меню и кнопками (как возвращает pytesseract)"""
+    rows = [
+        # text, conf, left, top, width, height, block
+        ("", -1, 0, 0, 800, 600, 1),
+        ("Файл", 96, 10, 5, 40, 14, 1),
+        ("Правка", 95, 60, 5, 55, 14, 1),
+        ("«Сохранить»", 91, 130, 6, 90, 14, 1),
+        ("Сохранить", 93, 300, 200, 80, 16, 2),
+        ("как", 90, 386, 200, 30, 16, 2),
+        ("Отмена", 92, 500, 200, 60, 16, 2),
+        ("Сохранить", 88, 300, 400, 80, 16, 3),
+        ("Настройки", 40, 600, 400, 80, 16, 3),
+        ("Поиск:", 89, 20, 300, 50, 14, 4),
+    ]
+    keys = ("text", "conf", "left", "top", "width", "height", "block_num")
+    return {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+
+
+class TestOCRResult(unittest.TestCase):
+    """Тесты для таблицы слов кадра и поиска по ней"""
+
+    def setUp(self):
+        self.result = OCRResult.from_data(toolbar())
+
+    def test_word_table(self):
+        """Пустые строки отброшены, слова нормализованы, строки и блоки пронумерованы"""
+        self.assertEqual(len(self.result), 9)
+        self.assertEqual(normalize_word("«Сохранить»"), "сохранить")
+        self.assertEqual(normalize_word("Поиск:"), "поиск")
+        word = self.result.word(4)
+        self.assertEqual(word["text"], "как")
+        self.assertEqual(word["box"], (386, 200, 30, 16))
+        self.assertEqual(word["block"], 2)
+        self.assertEqual(word["line"], self.result.word(3)["line"])
+        self.assertNotEqual(word["line"], self.result.word(0)["line"])
+
+    def test_duplicate_words_are_kept(self):
+        """Повторяющиеся слова не затирают друг друга; лучшая уверенность первой"""
+        matches = self.result.find_exact("сохранить")
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(matches[0].box, (300, 200, 80, 16))
+
+    def test_prefix_contains_and_fuzzy(self):
+        """Поиск по началу слова, по вхождению и нечеткий"""
+        self.assertEqual(self.result.find_prefix("Отм")[0].text, "Отмена")
+        self.assertEqual(self.result.find_contains("мена")[0].text, "Отмена")
+        self.assertEqual(self.result.find_fuzzy("Правко")[0].text, "Правка")
+        self.assertEqual(self.result.find_fuzzy("Закрыть"), [])
+
+    def test_phrase_across_adjacent_boxes(self):
+        """Фраза находится по соседним словам одной строки с общей рамкой"""
+        match = self.result.find("Сохранить как")
+        self.assertEqual(match.kind, "phrase")
+        self.assertEqual(match.text, "Сохранить как")
+        self.assertEqual(match.box, (300, 200, 116, 16))
+        self.assertEqual(match.center, (358, 208))
+        self.assertEqual(self.result.find_phrase("Файл Отмена"), [])
+
+    def test_find_order_and_confidence(self):
+        """Точное совпадение раньше частичного; слова с низкой уверенностью пропускаются"""
+        self.assertEqual(self.result.find("поиск").kind, "exact")
+        self.assertEqual(self.result.find("Настр").kind, "prefix")
+        self.assertIsNone(self.result.find("Настройки", min_conf=0.7))
+        self.assertIsNone(self.result.find("Настройко", fuzzy=False))
+
+    def test_full_text_by_lines(self):
+        """Полный текст собирается по строкам сверху вниз"""
+        self.assertEqual(
+            self.result.text().split("\n"),
+            ["Файл Правка «Сохранить»", "Сохранить как Отмена", "Поиск:", "Сохранить Настройки"]
+        )
+
+    def test_tesseract_lines_keep_columns_apart(self):
+        """Слова с номерами строк Tesseract группируются по ним: колонки на одной высоте не смешиваются"""
+        data = {
+            "text": ["Имя", "файла", "Размер", "Дата"],
+            "conf": [95, 95, 95, 95],
+            "left": [10, 50, 400, 470],
+            "top": [100, 102, 100, 101],
+            "width": [35, 50, 60, 40],
+            "height": [16, 16, 16, 16],
+            "block_num": [1, 1, 2, 2],
+            "par_num": [1, 1, 1, 1],
+            "line_num": [1, 1, 1, 1],
+        }
+        result = OCRResult.from_data(data)
+        self.assertEqual(result.text().split("\n"), ["Имя файла", "Размер Дата"])
+        self.assertEqual(result.word(3)["block"], 2)
+        self.assertNotEqual(result.word(1)["line"], result.word(2)["line"])
+        self.assertEqual(result.find_phrase("файла Размер"), [])
+
+    def test_split_and_lookalike_words(self):
+        """Надпись, разбитая на рамки или с латинскими буквами, находится с общей рамкой"""
+        result = OCRResult.from_data(login_page())
+        match = result.find("Вход/Регистрация")
+        self.assertEqual(match.score, 1.0)
+        self.assertEqual(match.text, "Bxод / Регистрация")
+        self.assertEqual(match.box, (20, 10, 170, 16))
+
+        match = result.find("Sign in with Google")
+        self.assertEqual(match.kind, "fuzzy")
+        self.assertEqual(match.text, "Sign in with Googie")
+        self.assertEqual(match.box, (300, 100, 190, 18))
+        self.assertIsNone(result.find("Sign out"))
+
+    def test_bounded_edit_distances(self):
+        """Расстояния до всех кандидатов сразу; больше порога — порог + 1"""
+        self.assertEqual(fold_text("«Вход»"), fold_text("Bxод"))
+        distances = edit_distances("kitten", ["sitting", "kitten", "", "mitten", "kit"], 3)
+        self.assertEqual(list(distances), [3, 0, 4, 1, 3])
+        self.assertEqual(list(edit_distances("kitten", ["sitting", "abc"], 1)), [2, 2])
+
+
+def login_page():
+    """Страница входа: OCR разбил надписи на рамки и спутал буквы"""
+    rows = [
+        ("Bxод", 90, 20, 10, 40, 16, 1),        # латинские B и x
+        ("/", 80, 64, 10, 6, 16, 1),
+        ("Регистрация", 91, 74, 10, 116, 16, 1),
+        ("Sign", 93, 300, 100, 40, 18, 2),
+        ("in", 94, 346, 100, 14, 18, 2),
+        ("with", 92, 366, 100, 40, 18, 2),
+        ("Googie", 85, 412, 100, 78, 18, 2),     # l распознана как i
+        ("Sign", 92, 300, 200, 40, 18, 3),
+        ("up", 94, 346, 200, 20, 18, 3),
+    ]
+    keys = ("text", "conf", "left", "top", "width", "height", "block_num")
+    return {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Тесты для модуля parallel_ocr.py
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.parallel_ocr import ParallelOCR, split_bands
+
+
+class BlobTesseract:
+    """
+    Заглушка pytesseract: каждое "слово" — прямоугольник своей яркости,
+    распознается как w<яркость>; вызов занимает delay секунд.
+    """
+
+    class Output:
+        DICT = "dict"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def image_to_data(self, image, lang=None, config="", output_type=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+        for value in np.unique(image[image > 0]):
+            ys, xs = np.nonzero(image == value)
+            data["text"].append(f"w{value}")
+            data["conf"].append(90)
+            data["left"].append(int(xs.min()))
+            data["top"].append(int(ys.min()))
+            data["width"].append(int(xs.max() - xs.min() + 1))
+            data["height"].append(int(ys.max() - ys.min() + 1))
+        with self._lock:
+            self.active -= 1
+        return data
+
+
+def page(height=1080, width=1920, line=30, pitch=45):
+    """Кадр со строками "слов" по всей высоте (строки попадают и на границы полос)"""
+    frame = np.zeros((height, width), dtype=np.uint8)
+    value = 1
+    for row in range(5, height - line, pitch):
+        for col in range(20, width - 300, 400):
+            frame[row:row + line, col:col + 250] = value
+            value = value % 250 + 1
+    return frame
+
+
+def words(data):
+    return sorted(zip(data["text"], data["left"], data["top"], data["width"], data["height"]))
+
+
+class TestParallelOCR(unittest.TestCase):
+    """Тесты для параллельного распознавания кадра полосами"""
+
+    def test_split_bands_partition(self):
+        """Свои зоны полос покрывают кадр без пересечений, полосы перекрываются"""
+        bands = split_bands(1080, 8, 64)
+        self.assertEqual(len(bands), 6)   # полосы не ниже MIN_BAND_HEIGHT
+        self.assertEqual(bands[0][2], 0)
+        self.assertEqual(bands[-1][3], 1080)
+        for (_, bottom, _, own_bottom), (top, _, own_top, _) in zip(bands, bands[1:]):
+            self.assertEqual(own_bottom, own_top)
+            self.assertEqual(bottom - top, 64)
+        self.assertEqual(split_bands(100, 8, 64), [(0, 100, 0, 100)])
+
+    def test_same_words_as_single_pass(self):
+        """Слова совпадают с распознаванием кадра целиком: без дублей и обрывков"""
+        frame = page()
+        single = BlobTesseract()
+        expected = words(single.image_to_data(frame))
+
+        ocr = ParallelOCR(BlobTesseract(), workers=8, overlap=64)
+        try:
+            result = words(ocr.image_to_data(frame))
+        finally:
+            ocr.shutdown()
+
+        self.assertEqual(result, expected)
+
+    def test_bands_run_in_parallel(self):
+        """Полосы распознаются одновременно"""
+        engine = BlobTesseract(delay=0.2)
+        ocr = ParallelOCR(engine, workers=4, overlap=64)
+        try:
+            started = time.monotonic()
+            ocr.image_to_data(page())
+            elapsed = time.monotonic() - started
+        finally:
+            ocr.shutdown()
+
+        self.assertEqual(engine.calls, 4)
+        self.assertEqual(engine.max_active, 4)
+        self.assertLess(elapsed, 0.6)
+
+    def test_small_image_single_call(self):
+        """Небольшое изображение распознается одним вызовом, без пула"""
+        engine = BlobTesseract()
+        ocr = ParallelOCR(engine, workers=8)
+        frame = np.zeros((120, 400), dtype=np.uint8)
+        frame[10:30, 10:100] = 7
+        self.assertEqual(ocr.image_to_string(frame), "w7")
+        self.assertEqual(engine.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
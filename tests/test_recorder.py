@@ -0,0 +1,67 @@
+"""
+Тесты для модуля recorder.py
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.mock_modules import MockInputStream
+from utils.recorder import UtteranceRecorder
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+
+
+def silence(seconds, hiss=0.002):
+    return np.random.default_rng(0).normal(0, hiss, int(seconds * RATE)).astype(np.float32)
+
+
+class TestUtteranceRecorder(unittest.TestCase):
+    """Тесты для записи реплики до конца речи"""
+    
+    def recorder(self, signal, **kwargs):
+        factory = lambda **stream_kwargs: MockInputStream(signal=signal, **stream_kwargs)
+        return UtteranceRecorder(factory, **kwargs)
+    
+    def test_stops_at_end_of_speech(self):
+        """Запись заканчивается после паузы в конце речи, начало фразы сохраняется"""
+        signal = np.concatenate([silence(2.0), tone(1.0), silence(3.0)])
+        samples, info = self.recorder(signal, end_silence_ms=500, preroll_ms=200).record()
+        
+        self.assertEqual(info["reason"], "end_of_speech")
+        self.assertTrue(info["speech"])
+        # 0.2 с предыстории + 1 с речи + 0.5 с паузы (с точностью до блока)
+        self.assertAlmostEqual(samples.size / RATE, 1.7, delta=0.1)
+        # Ведущая тишина перезаписана в кольцевом буфере, речь начинается после предыстории
+        self.assertLess(np.abs(samples[:int(0.15 * RATE)]).max(), 0.05)
+        self.assertGreater(np.abs(samples[int(0.25 * RATE):int(1.1 * RATE)]).max(), 0.2)
+    
+    def test_no_speech_timeout(self):
+        """Если речь не началась, запись заканчивается по таймауту ожидания"""
+        samples, info = self.recorder(silence(10.0), start_timeout=1.0).record()
+        
+        self.assertEqual(info["reason"], "no_speech")
+        self.assertFalse(info["speech"])
+        self.assertEqual(samples.size, 0)
+    
+    def test_max_length_guard(self):
+        """Длинная речь обрезается по максимальной длине"""
+        signal = np.concatenate([silence(0.5), tone(10.0)])
+        samples, info = self.recorder(signal, max_seconds=2.0, preroll_ms=0).record()
+        
+        self.assertEqual(info["reason"], "max_length")
+        self.assertAlmostEqual(samples.size / RATE, 2.0, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
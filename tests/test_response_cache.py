@@ -0,0 +1,95 @@
+"""
+Тесты для модуля response_cache.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.response_cache import ResponseCache, normalize_query, classify_query, same_terms
+
+
+class TestResponseCache(unittest.TestCase):
+    """Тесты для кэша ответов"""
+    
+    def response(self, message):
+        return {"status": 200, "gptMessage": message, "source": "browser_chat"}
+    
+    def test_normalized_exact_match(self):
+        """Вопрос находится в кэше без учета регистра, знаков препинания и слов-паразитов"""
+        cache = ResponseCache(similarity_threshold=None)
+        self.assertTrue(cache.put("Погода в Алматы", self.response("В Алматы +20")))
+        
+        self.assertEqual(normalize_query("Джарвис, какая погода в Алматы?"), "погода в алматы")
+        self.assertEqual(cache.get("Джарвис, какая погода в Алматы?")["gptMessage"], "В Алматы +20")
+        self.assertIsNone(cache.get("Погода в Астане"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_similar_question(self):
+        """Похожий вопрос находится по близости триграмм, но не при разных числах"""
+        cache = ResponseCache(similarity_threshold=0.8)
+        cache.put("Кто написал Войну и мир", self.response("Лев Толстой"))
+        cache.put("Сколько будет 2 плюс 2", self.response("4"))
+        
+        self.assertEqual(cache.get("Кто написал роман Войну и мир")["gptMessage"], "Лев Толстой")
+        self.assertIsNone(cache.get("Сколько будет 3 плюс 2"))
+        self.assertIsNone(cache.get("Погода в Астане"))
+        self.assertEqual(cache.stats()["similar_hits"], 1)
+    
+    def test_ttl_by_category(self):
+        """Погода устаревает быстрее фактических ответов, вопросы о времени не кэшируются"""
+        self.assertEqual(classify_query(normalize_query("Какая погода в Алматы")), "weather")
+        self.assertEqual(classify_query(normalize_query("Какие новости")), "news")
+        self.assertEqual(classify_query(normalize_query("Кто написал Войну и мир")), "factual")
+        
+        cache = ResponseCache(ttls={"weather": 60, "factual": 3600}, similarity_threshold=None)
+        with patch("core.response_cache.time.monotonic", return_value=1000.0):
+            cache.put("Погода в Алматы", self.response("+20"))
+            cache.put("Кто написал Войну и мир", self.response("Лев Толстой"))
+            self.assertFalse(cache.put("Который час сейчас", self.response("12:00")))
+        
+        with patch("core.response_cache.time.monotonic", return_value=1100.0):
+            self.assertIsNone(cache.get("Погода в Алматы"))
+            self.assertIsNotNone(cache.get("Кто написал Войну и мир"))
+    
+    def test_commands_and_follow_ups_not_cached(self):
+        """Команды, уточнения и реплики без вопросительного слова не кэшируются"""
+        cache = ResponseCache()
+        for text in ("включи свет в спальне", "почему", "расскажи подробнее", "а он кто", "Париж"):
+            self.assertFalse(cache.put(text, self.response("ответ")), text)
+            self.assertIsNone(cache.get(text), text)
+        self.assertEqual(classify_query(normalize_query("что такое фотосинтез"), "что такое фотосинтез"), "factual")
+        self.assertEqual(cache.stats()["entries"], 0)
+    
+    def test_similar_question_needs_same_terms(self):
+        """Близкие по триграммам вопросы с другим глаголом или отрицанием не совпадают"""
+        self.assertFalse(same_terms("включи свет в спальне", "выключи свет в спальне"))
+        self.assertFalse(same_terms("кто написал войну и мир", "кто не написал войну и мир"))
+        self.assertTrue(same_terms("кто написал войну и мир", "кто написал роман войну и мир"))
+        
+        cache = ResponseCache(similarity_threshold=0.5)
+        cache.put("Где находится Эйфелева башня", self.response("В Париже"))
+        self.assertIsNone(cache.get("Где не находится Эйфелева башня"))
+        self.assertIsNone(cache.get("Где строится Эйфелева башня"))
+    
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованный ответ"""
+        cache = ResponseCache(max_entries=2, similarity_threshold=None)
+        cache.put("Какая столица Франции", self.response("Париж"))
+        cache.put("Какая столица Италии", self.response("Рим"))
+        cache.get("Какая столица Франции")
+        cache.put("Какая столица Испании", self.response("Мадрид"))
+        
+        self.assertIsNotNone(cache.get("Какая столица Франции"))
+        self.assertIsNone(cache.get("Какая столица Италии"))
+        self.assertIsNotNone(cache.get("Какая столица Испании"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
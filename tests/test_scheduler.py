@@ -0,0 +1,152 @@
+"""
+Тесты для модуля scheduler.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.scheduler import (
+    RequestScheduler, QueueFullError, RequestCancelled, PRIORITY_CONTROL, PRIORITY_BACKGROUND,
+    current_request, request_cancelled, check_cancelled
+)
+from utils.async_loop import BackgroundLoop
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """Тесты для планировщика запросов"""
+    
+    def setUp(self):
+        self.scheduler = RequestScheduler(max_workers=1, max_queue=3)
+        self.release = threading.Event()
+    
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+    
+    def block(self):
+        self.release.wait(5)
+        return "blocked"
+    
+    def test_requests_run_on_pool(self):
+        """Запросы выполняются в рабочем потоке и получают номера"""
+        first = self.scheduler.submit("chat", lambda x: x * 2, 21)
+        second = self.scheduler.submit("chat", threading.current_thread)
+        
+        self.assertEqual(first.result(timeout=5), 42)
+        self.assertIsNot(second.result(timeout=5), threading.current_thread())
+        self.assertEqual(second.request_id, first.request_id + 1)
+    
+    def test_new_request_supersedes_stale(self):
+        """Новая реплика отменяет незавершенные запросы того же типа"""
+        running = self.scheduler.submit("chat", self.block)
+        while running.state != "running":
+            time.sleep(0.01)
+        queued = self.scheduler.submit("chat", lambda: "stale")
+        other = self.scheduler.submit("stt", lambda: "text")
+        latest = self.scheduler.submit("chat", lambda: "fresh", supersede=True)
+        
+        self.assertTrue(running.cancelled)
+        self.assertEqual(running.cancel_reason, "superseded")
+        self.assertTrue(queued.done())
+        self.assertFalse(other.cancelled)
+        
+        self.release.set()
+        self.assertEqual(latest.result(timeout=5), "fresh")
+        self.assertEqual(other.result(timeout=5), "text")
+    
+    def test_priority_and_queue_depth(self):
+        """Управляющие запросы выполняются первыми, очередь ограничена"""
+        order = []
+        self.scheduler.submit("chat", self.block)
+        while self.scheduler.status()["running"] == 0:
+            time.sleep(0.01)
+        self.scheduler.submit("background", order.append, "background", priority=PRIORITY_BACKGROUND)
+        self.scheduler.submit("chat", order.append, "chat")
+        control = self.scheduler.submit("control", order.append, "control", priority=PRIORITY_CONTROL)
+        
+        self.assertEqual(self.scheduler.queue_depth(), 3)
+        with self.assertRaises(QueueFullError):
+            self.scheduler.submit("chat", order.append, "overflow")
+        
+        self.release.set()
+        control.result(timeout=5)
+        while self.scheduler.queue_depth():
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(order, ["control", "chat", "background"])
+    
+    def test_cancellation_visible_in_background_loop(self):
+        """Отмена запроса видна в корутинах, запущенных из него на фоновом цикле"""
+        loop = BackgroundLoop(name="test-scheduler-loop")
+        started = threading.Event()
+        
+        async def check():
+            started.set()
+            await asyncio.sleep(0.1)
+            return request_cancelled()
+        
+        try:
+            request = self.scheduler.submit("chat", lambda: loop.submit(check()).result(5))
+            started.wait(5)
+            request.cancel()
+            # Выполняющийся запрос доходит до конца, но видит, что отменен
+            self.assertTrue(request.future.result(timeout=5))
+        finally:
+            loop.stop()
+
+    
+    def test_check_cancelled_interrupts_running_request(self):
+        """Долгая операция, проверяющая отмену, прерывается и освобождает рабочий поток"""
+        def poll():
+            while True:
+                check_cancelled()
+                time.sleep(0.01)
+        
+        check_cancelled()   # вне запроса планировщика ничего не происходит
+        running = self.scheduler.submit("chat", poll)
+        while running.state != "running":
+            time.sleep(0.01)
+        latest = self.scheduler.submit("chat", lambda: "fresh", supersede=True)
+        
+        self.assertEqual(latest.result(timeout=5), "fresh")
+        self.assertIsInstance(running.future.exception(timeout=5), RequestCancelled)
+
+    
+    def test_cancel_callback_cancels_background_coroutine(self):
+        """Отмена запроса отменяет корутину на фоновом цикле, которую он ждет"""
+        loop = BackgroundLoop(name="test-scheduler-cancel")
+        started = threading.Event()
+        stopped = threading.Event()
+        
+        async def generate():
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+        
+        def wait():
+            future = loop.submit(generate())
+            current_request().add_cancel_callback(future.cancel)
+            return future.result()
+        
+        try:
+            request = self.scheduler.submit("chat", wait)
+            started.wait(5)
+            latest = self.scheduler.submit("chat", lambda: "fresh", supersede=True)
+            self.assertEqual(latest.result(timeout=5), "fresh")
+            self.assertTrue(stopped.wait(5))
+        finally:
+            loop.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
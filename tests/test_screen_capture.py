@@ -0,0 +1,110 @@
+"""
+Тесты для модуля screen_capture.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.screen_capture import ScreenCapture, MssBackend, PyAutoGUIBackend, DebugFrameSaver
+from utils.mock_modules import MockPyAutoGUI
+
+
+class FakeMss:
+    """Заглушка mss.mss(): кадры BGRA, монитор 0 — все экраны, 1 — основной"""
+
+    def __init__(self):
+        self.monitors = [
+            {"left": -1920, "top": 0, "width": 3840, "height": 1080},
+            {"left": 0, "top": 0, "width": 1920, "height": 1080}
+        ]
+        self.requested = []
+
+    def grab(self, monitor):
+        self.requested.append(monitor)
+        frame = np.zeros((monitor["height"], monitor["width"], 4), dtype=np.uint8)
+        frame[:, :] = (10, 20, 30, 255)
+        return frame
+
+
+class FailingBackend:
+    name = "failing"
+
+    def grab(self, region=None):
+        raise OSError("XShm недоступен")
+
+
+class TestScreenCapture(unittest.TestCase):
+    """Тесты для захвата экрана в память"""
+
+    def test_pyautogui_backend_returns_bgr_array(self):
+        """Изображение PIL в RGB превращается в массив BGR нужного размера"""
+        red = MockPyAutoGUI()
+        red.screenshot = lambda region=None: Image.new("RGB", region[2:] if region else (40, 30), (255, 0, 0))
+        backend = PyAutoGUIBackend(red)
+
+        frame = backend.grab((5, 5, 64, 48))
+
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertEqual(frame.dtype, np.uint8)
+        self.assertTrue(frame.flags["C_CONTIGUOUS"])
+        self.assertEqual(tuple(frame[0, 0]), (0, 0, 255))
+
+    def test_mss_backend_drops_alpha_and_uses_primary_monitor(self):
+        """mss: альфа-канал отбрасывается, без области захватывается основной монитор"""
+        fake = FakeMss()
+        backend = MssBackend(factory=lambda: fake)
+
+        full = backend.grab()
+        part = backend.grab((100, 200, 32, 16))
+
+        self.assertEqual(fake.requested[0], fake.monitors[1])
+        self.assertEqual(fake.requested[1], {"left": 100, "top": 200, "width": 32, "height": 16})
+        self.assertEqual(full.shape, (1080, 1920, 3))
+        self.assertEqual(part.shape, (16, 32, 3))
+        self.assertEqual(tuple(part[0, 0]), (10, 20, 30))
+
+    def test_falls_back_when_backend_fails(self):
+        """Если основной способ захвата не сработал, используется запасной"""
+        capture = ScreenCapture(FailingBackend(), PyAutoGUIBackend(MockPyAutoGUI()))
+
+        frame = capture.grab((0, 0, 20, 10))
+
+        self.assertEqual(frame.shape, (10, 20, 3))
+        self.assertEqual(capture.stats()["fallbacks"], 1)
+
+    def test_debug_saver_samples_frames_in_background(self):
+        """Сохраняется только каждый N-й кадр, старые файлы удаляются"""
+        directory = tempfile.mkdtemp()
+        try:
+            saver = DebugFrameSaver(directory, every=3, max_files=2, max_pending=8)
+            capture = ScreenCapture(PyAutoGUIBackend(MockPyAutoGUI()), debug_saver=saver)
+
+            for _ in range(9):
+                capture.grab((0, 0, 8, 8))
+            saver.flush()
+
+            self.assertEqual(saver.saved, 3)
+            files = [name for name in os.listdir(directory) if name.endswith(".png")]
+            self.assertLessEqual(len(files), 2)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_no_debug_files_by_default(self):
+        """Без отладочного сохранения захват не пишет на диск"""
+        capture = ScreenCapture(PyAutoGUIBackend(MockPyAutoGUI()))
+        capture.grab()
+        self.assertIsNone(capture.debug_saver)
+        self.assertEqual(capture.stats()["debug_saved"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Тесты для модуля streaming_stt.py
+"""
+
+import os
+import sys
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.streaming_stt import (
+    StreamingSession, StreamingTranscriber, merge_transcripts, split_webm_header, read_element,
+    WEBM_CLUSTER_ID, WEBM_SEGMENT_ID, WEBM_TIMECODE_ID, EBML_UNKNOWN_SIZE
+)
+from utils import vad
+
+HEADER = b"\x1a\x45\xdf\xa3header"
+# Запись Opus в webm (4 с, кластеры по 1 с), записанная в режиме live, как у MediaRecorder
+RECORDING = os.path.join(os.path.dirname(__file__), "data", "recording.webm")
+SIMPLE_BLOCK_ID = b"\xa3"
+
+
+class LocalBackend:
+    """Локальная замена распознавателя: "распознает" слова, записанные в частях"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, data, content_type="audio/webm"):
+        self.calls.append(data)
+        assert data.startswith(HEADER), "окно должно начинаться с заголовка webm"
+        return data[len(HEADER):].replace(WEBM_CLUSTER_ID, b"").decode("utf-8")
+
+
+def webm_elements(data):
+    """Элементы записи webm (идентификатор, смещение) с заходом в Segment и Cluster"""
+    elements = []
+    pos = 0
+    while pos < len(data):
+        element = read_element(data, pos)
+        assert element is not None, f"недописанный элемент на смещении {pos}"
+        element_id, header_length, size = element
+        elements.append((element_id, pos))
+        if element_id in (WEBM_SEGMENT_ID, WEBM_CLUSTER_ID):
+            pos += header_length
+        else:
+            assert pos + header_length + size <= len(data), f"недописанный элемент на смещении {pos}"
+            pos += header_length + size
+    return elements
+
+
+def with_unknown_cluster_size(data):
+    """Та же запись с кластерами неизвестного размера, как их пишет MediaRecorder"""
+    result = bytearray()
+    last = 0
+    for element_id, pos in webm_elements(data):
+        if element_id == WEBM_CLUSTER_ID:
+            _, header_length, _ = read_element(data, pos)
+            result += data[last:pos] + WEBM_CLUSTER_ID + EBML_UNKNOWN_SIZE
+            last = pos + header_length
+    return bytes(result + data[last:])
+
+
+def simple_blocks(data):
+    """Аудиоблоки записи"""
+    blocks = []
+    for element_id, pos in webm_elements(data):
+        if element_id == SIMPLE_BLOCK_ID:
+            _, header_length, size = read_element(data, pos)
+            blocks.append(data[pos:pos + header_length + size])
+    return blocks
+
+
+def chunks_for(words):
+    """Части записи по одному слову; первая часть содержит заголовок"""
+    chunks = [(word + " ").encode("utf-8") for word in words]
+    chunks[0] = HEADER + WEBM_CLUSTER_ID + chunks[0]
+    return chunks
+
+
+class TestStreamingSTT(unittest.TestCase):
+    """Тесты для потокового распознавания речи"""
+    
+    def test_partial_transcripts_while_speaking(self):
+        """Частичный текст появляется во время речи, в конце распознается одно окно"""
+        words = "открой браузер и найди погоду в алматы на завтра утром".split()
+        backend = LocalBackend()
+        session = StreamingSession(backend, window_chunks=3, overlap_chunks=1)
+        
+        partials = [session.add_chunk(seq, chunk) for seq, chunk in enumerate(chunks_for(words))]
+        self.assertEqual(partials[2], "открой браузер и")
+        self.assertEqual(len(backend.calls), 3)
+        
+        self.assertEqual(session.finish(), " ".join(words))
+        self.assertEqual(len(backend.calls), 4)
+        # Последнее окно: одна часть перекрытия и одна новая
+        self.assertEqual(backend.calls[-1], HEADER + "завтра утром ".encode("utf-8"))
+    
+    def test_out_of_order_chunks(self):
+        """Части, пришедшие не по порядку, собираются по номерам"""
+        words = "какие новости сегодня".split()
+        transcriber = StreamingTranscriber(LocalBackend(), window_chunks=10)
+        chunks = chunks_for(words)
+        
+        for seq in (2, 0, 1):
+            transcriber.add_chunk("s1", seq, chunks[seq])
+        self.assertEqual(transcriber.finish("s1", total_chunks=3), "какие новости сегодня")
+        self.assertEqual(transcriber.finish("s1"), "")
+    
+    def test_merge_overlapping_windows(self):
+        """Перекрывающиеся тексты окон склеиваются без повторов"""
+        self.assertEqual(merge_transcripts("открой сайт", "сайт гугл"), "открой сайт гугл")
+        # Обрезанное границей окна слово в конце старого текста
+        self.assertEqual(merge_transcripts("найди погоду в алм", "в алматы завтра"), "найди погоду в алматы завтра")
+        # Обрезанное слово в начале нового текста
+        self.assertEqual(merge_transcripts("Привет, как дела", "ла как дела у тебя"), "Привет, как дела у тебя")
+        self.assertEqual(merge_transcripts("", "привет"), "привет")
+        self.assertEqual(merge_transcripts("привет", "пока"), "привет пока")
+    
+    def test_real_recording_windows_start_on_cluster(self):
+        """Окна из частей настоящей записи начинаются с кластера и содержат только целые блоки"""
+        with open(RECORDING, "rb") as f:
+            original = f.read()
+        header_end = next(pos for element_id, pos in webm_elements(original) if element_id == WEBM_CLUSTER_ID)
+        
+        for recording in (original, with_unknown_cluster_size(original)):
+            windows = []
+            session = StreamingSession(lambda data, content_type: windows.append(data) or "",
+                                       window_chunks=3, overlap_chunks=1)
+            # Части MediaRecorder режут запись по времени, а не по элементам
+            chunks = [recording[i:i + 1500] for i in range(0, len(recording), 1500)]
+            for seq, chunk in enumerate(chunks):
+                session.add_chunk(seq, chunk)
+            session.finish()
+            
+            self.assertGreater(len(windows), 3)
+            covered = set()
+            for window in windows:
+                self.assertTrue(window.startswith(original[:header_end]))
+                ids = [element_id for element_id, _ in webm_elements(window)]
+                # После заголовка сразу кластер с меткой времени
+                cluster = ids.index(WEBM_CLUSTER_ID)
+                self.assertNotIn(SIMPLE_BLOCK_ID, ids[:cluster])
+                self.assertEqual(ids[cluster + 1], WEBM_TIMECODE_ID)
+                covered.update(simple_blocks(window))
+                if vad.FFMPEG:
+                    self.assertIsNotNone(vad.decode_audio(window))
+            self.assertEqual(covered, set(simple_blocks(recording)))
+    
+    def test_split_webm_header(self):
+        """Заголовок webm отделяется от первого кластера"""
+        self.assertEqual(split_webm_header(HEADER + WEBM_CLUSTER_ID + b"audio"),
+                         (HEADER, WEBM_CLUSTER_ID + b"audio"))
+        self.assertEqual(split_webm_header(b"RIFF....WAVE"), (b"", b"RIFF....WAVE"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Тесты для модуля stt.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.stt import transcribe_bytes, audio_filename, MAX_AUDIO_BYTES
+
+
+class TestSTT(unittest.TestCase):
+    """Тесты для распознавания речи из памяти"""
+    
+    def test_audio_sent_from_memory(self):
+        """Аудио передается в Whisper кортежем из памяти, без временного файла"""
+        client = MagicMock()
+        client.audio.transcriptions.create.return_value = "привет"
+        data = b"\x1aE\xdf\xa3webm-data"
+        
+        with patch.object(tempfile, "NamedTemporaryFile") as temp_file:
+            text = transcribe_bytes(client, data, content_type="audio/webm;codecs=opus", language="ru")
+        
+        self.assertEqual(text, "привет")
+        temp_file.assert_not_called()
+        params = client.audio.transcriptions.create.call_args.kwargs
+        self.assertEqual(params["file"], ("audio.webm", data, "audio/webm"))
+        self.assertEqual(params["language"], "ru")
+    
+    def test_filename_by_content_type(self):
+        """Имя файла соответствует формату аудио"""
+        self.assertEqual(audio_filename("audio/ogg; codecs=opus"), "audio.ogg")
+        self.assertEqual(audio_filename("audio/x-wav"), "audio.wav")
+        self.assertEqual(audio_filename(None), "audio.webm")
+    
+    def test_empty_and_oversized_audio_rejected(self):
+        """Пустое и слишком большое аудио не отправляется"""
+        client = MagicMock()
+        with self.assertRaises(ValueError):
+            transcribe_bytes(client, b"")
+        with self.assertRaises(ValueError):
+            transcribe_bytes(client, b"\0" * (MAX_AUDIO_BYTES + 1))
+        client.audio.transcriptions.create.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,12 +6,17 @@ import os
 import sys
 import unittest
 import asyncio
+import threading
+import time
 from unittest.mock import patch, MagicMock
 
 # Добавляем корневую директорию проекта в путь
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.tts import listen, generate_audio, stop_audio
+from utils.tts import listen, generate_audio, stop_audio, split_sentences, speak_pipelined, wait_for_playback, TTSWorker, SpeechStream
+from utils.event_manager import event_manager
+from utils.async_loop import BackgroundLoop
+from utils.audio_output import AudioOutput
 
 
 class TestTTS(unittest.TestCase):
@@ -32,20 +37,19 @@ class TestTTS(unittest.TestCase):
         self.assertIn("message", result)
         self.assertIn("error", result)
     
+    @patch('utils.tts.audio_output')
     @patch('utils.tts.pygame_mixer')
-    def test_stop_audio(self, mock_pygame_mixer):
+    def test_stop_audio(self, mock_pygame_mixer, mock_audio_output):
         """Тест функции stop_audio с использованием мока"""
-        # Настраиваем мок
-        mock_pygame_mixer.quit.return_value = None
-        
         # Вызываем функцию
         result = stop_audio()
         
         # Проверяем результат
         self.assertEqual(result, "Аудиозапись остановлена")
         
-        # Проверяем, что моки были вызваны
-        mock_pygame_mixer.quit.assert_called_once()
+        # Канал останавливается, но аудиоустройство остается открытым
+        mock_audio_output.stop.assert_called_once()
+        mock_pygame_mixer.quit.assert_not_called()
     
     def test_generate_audio_basic(self):
         """Базовый тест функции generate_audio"""
@@ -65,6 +69,86 @@ class TestTTS(unittest.TestCase):
         except Exception as e:
             self.fail(f"generate_audio вызвала исключение: {e}")
 
+    
+    def test_split_sentences(self):
+        """Тест разбиения текста на предложения для конвейерной озвучки"""
+        sentences = split_sentences("Привет. Число 3.14 равно пи! Хвост без точки")
+        self.assertEqual(sentences, ["Привет.", "Число 3.14 равно пи!", "Хвост без точки"])
+    
+    @patch('utils.tts.audio_cache', None)
+    @patch('utils.tts.synthesize_bytes')
+    def test_speak_pipelined_plays_all_chunks(self, mock_synthesize):
+        """Тест конвейерной озвучки: все фрагменты проигрываются по порядку"""
+        async def fake_synthesize(text, voice):
+            return b"ID3 fake mp3"
+        mock_synthesize.side_effect = fake_synthesize
+        
+        mixer = MagicMock()
+        mixer.get_init.return_value = True
+        mixer.Channel.return_value.get_busy.return_value = False
+        
+        with patch('utils.tts.audio_output', AudioOutput(mixer)):
+            metrics = asyncio.run(speak_pipelined("Первое. Второе. Третье.", lookahead=2))
+        
+        self.assertEqual(metrics["chunks"], 3)
+        self.assertEqual(mixer.Channel.return_value.play.call_count, 3)
+        mixer.quit.assert_not_called()
+        self.assertFalse(metrics["stopped"])
+        self.assertIsNotNone(metrics["time_to_first_audio"])
+        spoken = [call.args[0] for call in mock_synthesize.call_args_list]
+        self.assertEqual(spoken, ["Первое.", "Второе.", "Третье."])
+
+    
+    @patch('utils.tts.audio_output')
+    def test_wait_for_playback_wakes_on_stop(self, mock_audio_output):
+        """Тест: запрос остановки прерывает ожидание конца клипа сразу, без опроса"""
+        mock_audio_output.is_busy.return_value = True
+        mock_audio_output.seconds_until_idle.return_value = 10.0
+        event_manager.reset_stop_audio()
+        
+        threading.Timer(0.05, event_manager.request_stop_audio).start()
+        started = time.monotonic()
+        finished = asyncio.run(wait_for_playback())
+        
+        self.assertFalse(finished)
+        self.assertLess(time.monotonic() - started, 1.0)
+        mock_audio_output.stop.assert_called()
+        event_manager.reset_stop_audio()
+    
+    def test_tts_worker_interrupts_previous(self):
+        """Тест: один исполнитель озвучки, новая реплика прерывает предыдущую"""
+        loop = BackgroundLoop(name="tts-test-loop")
+        worker = TTSWorker(loop)
+        
+        async def long_reply():
+            await asyncio.sleep(10)
+        
+        async def short_reply():
+            return threading.current_thread().name
+        
+        first = worker.submit(long_reply())
+        second = worker.submit(short_reply())
+        
+        self.assertEqual(second.result(timeout=2), "tts-test-loop")
+        self.assertTrue(first.cancelled())
+        loop.stop()
+
+    
+    def test_speech_stream_speaks_sentences_as_they_arrive(self):
+        """Тест: предложения из потока уходят в озвучку сразу, хвост — при закрытии"""
+        worker = MagicMock()
+        speech = SpeechStream(worker=worker, accept=lambda sentence: "{name}" not in sentence)
+        
+        self.assertEqual(speech.feed("Привет! Как "), ["Привет!"])
+        self.assertTrue(speech.started)
+        self.assertEqual(speech.feed("дела? Открываю {name}. Хвост"), ["Как дела?"])
+        speech.close()
+        speech.close()
+        
+        sentences = worker.speak_stream.call_args.args[0]
+        self.assertEqual(list(sentences), ["Привет!", "Как дела?", "Хвост"])
+        worker.speak_stream.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Тесты для модуля tts_cache.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tts_cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+    """Тесты для дискового кэша озвучки"""
+    
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+    
+    def tearDown(self):
+        """Удаление временных файлов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_key_depends_on_text_voice_and_engine(self):
+        """Ключ кэша различает текст, голос и движок"""
+        key = AudioCache.make_key("Открываю", "ru-RU-SvetlanaNeural")
+        self.assertEqual(key, AudioCache.make_key("Открываю", "ru-RU-SvetlanaNeural"))
+        self.assertNotEqual(key, AudioCache.make_key("Открываю", "ru-RU-DmitryNeural"))
+        self.assertNotEqual(key, AudioCache.make_key("Открываю", "ru-RU-SvetlanaNeural", engine="elevenlabs"))
+    
+    def test_hit_and_miss_statistics(self):
+        """Повторная фраза берется из кэша, статистика учитывает попадания"""
+        cache = AudioCache(self.cache_dir, max_bytes=1000)
+        key = AudioCache.make_key("Перехожу назад.", "voice")
+        self.assertIsNone(cache.get(key))
+        cache.put_bytes(key, b"\x01" * 100)
+        self.assertTrue(os.path.exists(cache.get(key)))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+    
+    def test_lru_eviction(self):
+        """При превышении бюджета вытесняется давно не использованная фраза"""
+        cache = AudioCache(self.cache_dir, max_bytes=250)
+        keys = [AudioCache.make_key(f"фраза {i}", "voice") for i in range(3)]
+        cache.put_bytes(keys[0], b"\x01" * 100)
+        cache.put_bytes(keys[1], b"\x01" * 100)
+        cache.get(keys[0])  # фраза 0 использована недавно
+        cache.put_bytes(keys[2], b"\x01" * 100)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_put_bytes(self):
+        """Аудио из памяти сохраняется в кэш без промежуточного файла"""
+        cache = AudioCache(self.cache_dir, max_bytes=1000)
+        key = AudioCache.make_key("Тестовый ответ", "voice")
+        cache.put_bytes(key, b"\x02" * 50)
+        with open(cache.get(key), "rb") as f:
+            self.assertEqual(f.read(), b"\x02" * 50)
+    
+    def test_index_survives_restart(self):
+        """Кэш восстанавливается из файлов на диске"""
+        cache = AudioCache(self.cache_dir, max_bytes=1000)
+        key = AudioCache.make_key("Прокручиваю вниз.", "voice")
+        cache.put_bytes(key, b"\x01" * 100)
+        reopened = AudioCache(self.cache_dir, max_bytes=1000)
+        self.assertIsNotNone(reopened.get(key))
+        self.assertEqual(reopened.stats()["bytes"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Тесты для модуля vad.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.vad import (
+    prepare_for_transcription, prepare_samples, speech_mask, resample, encode_wav, decode_wav,
+    TARGET_SAMPLE_RATE
+)
+
+
+def utterance(rate=44100, lead=0.5, speech=1.0, tail=2.0, hiss=0.002, channels=2):
+    """Тишина с шипением, "речь" (гармонический сигнал) и снова тишина"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(speech * rate)) / rate
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 540 * t)
+    signal = np.concatenate([
+        rng.normal(0, hiss, int(lead * rate)),
+        voice,
+        rng.normal(0, hiss, int(tail * rate))
+    ]).astype(np.float32)
+    return np.repeat(signal[:, None], channels, axis=1)
+
+
+class TestVAD(unittest.TestCase):
+    """Тесты для определения речи и подготовки аудио"""
+    
+    def test_trims_silence_and_resamples(self):
+        """Тишина по краям обрезается, стерео 44.1 кГц сводится в моно 16 кГц"""
+        samples, report = prepare_samples(utterance(), 44100)
+        
+        self.assertTrue(report["speech"])
+        self.assertEqual(samples.ndim, 1)
+        self.assertAlmostEqual(report["input_seconds"], 3.5, places=2)
+        # 1 с речи плюс запас до начала и задержка отпускания после конца
+        self.assertGreater(report["speech_seconds"], 1.0)
+        self.assertLess(report["speech_seconds"], 1.5)
+    
+    def test_hiss_and_silence_are_not_speech(self):
+        """Шипение без речи не считается речью"""
+        rng = np.random.default_rng(1)
+        samples, report = prepare_samples(rng.normal(0, 0.002, 16000).astype(np.float32), 16000)
+        
+        self.assertFalse(report["speech"])
+        self.assertEqual(samples.size, 0)
+        self.assertFalse(speech_mask(np.zeros(16000, dtype=np.float32), 16000).any())
+    
+    def test_hangover_keeps_short_pauses(self):
+        """Короткая пауза внутри фразы не разрывает речь"""
+        rate = 16000
+        t = np.arange(rate // 2) / rate
+        word = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+        pause = np.zeros(int(0.2 * rate), dtype=np.float32)
+        signal = np.concatenate([pause, word, pause, word, pause])
+        
+        mask = speech_mask(signal, rate)
+        voiced = np.flatnonzero(mask)
+        self.assertTrue(mask[voiced[0]:voiced[-1] + 1].all())
+    
+    def test_prepare_wav_for_transcription(self):
+        """WAV-запись уменьшается, отчет содержит сэкономленные байты"""
+        wav = encode_wav(utterance(channels=1)[:, 0], rate=44100)
+        
+        with patch("utils.vad.FFMPEG", None):
+            data, content_type, report = prepare_for_transcription(wav, "audio/wav")
+        
+        self.assertEqual(content_type, "audio/wav")
+        samples, rate = decode_wav(data)
+        self.assertEqual(rate, TARGET_SAMPLE_RATE)
+        self.assertEqual(report["saved_bytes"], len(wav) - len(data))
+        self.assertLess(len(data), len(wav) / 5)
+    
+    def test_undecodable_audio_passed_through(self):
+        """Без ffmpeg webm отправляется как есть"""
+        with patch("utils.vad.FFMPEG", None):
+            data, content_type, report = prepare_for_transcription(b"\x1aE\xdf\xa3webm", "audio/webm")
+        
+        self.assertEqual((data, content_type), (b"\x1aE\xdf\xa3webm", "audio/webm"))
+        self.assertFalse(report["decoded"])
+        self.assertEqual(report["saved_bytes"], 0)
+    
+    def test_resample_length(self):
+        """Передискретизация сохраняет длительность"""
+        self.assertEqual(resample(np.zeros(44100, dtype=np.float32), 44100).size, 16000)
+        self.assertEqual(resample(np.zeros(8000, dtype=np.float32), 8000).size, 16000)
+
+
+if __name__ == '__main__':
+    unittest.main()
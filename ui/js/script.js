@@ -7,6 +7,9 @@ let interimTranscript = "";
 let singleRequestMode = false;
 let micOn   = false;          // истинный флаг – НЕ сам checkbox
 let mediaRecorder, analyser, silenceTmr, audioChunks = [];
+// Потоковое распознавание: части записи отправляются на сервер во время речи
+let streamingStt = true;
+let sttSession = null, sttChunkSeq = 0;
 
 // 🎯 DOMContentLoaded – чтобы всё DOM было готово
 window.addEventListener("DOMContentLoaded", () => {
@@ -75,6 +78,40 @@ window.addEventListener("DOMContentLoaded", () => {
         d.textContent = msg;
         chatMessages.appendChild(d);
         chatMessages.scrollTop = chatMessages.scrollHeight;
+        return d;
+    }
+
+    // ✅ Потоковый ответ: части текста дописываются в одно сообщение
+    // Сообщения, которые еще дополняются потоковым ответом (по номеру запроса).
+    // replace: источник переписал ответ, delta — весь текст на данный момент
+    const streamingMessages = new Map();
+    function onAssistantDelta(delta, requestId, replace=false){
+        let message = streamingMessages.get(requestId);
+        if (!message) {
+            message = addMessageToChat("", "assistant");
+            streamingMessages.set(requestId, message);
+        }
+        if (replace) {
+            message.textContent = delta;
+        } else {
+            message.textContent += delta;
+        }
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+    eel.expose(onAssistantDelta);
+
+    // Итоговый текст заменяет потоковый (например, «Открываю …» вместо шаблона).
+    // Ответ вытесненного запроса убирается из чата.
+    function finishAssistantMessage(resp){
+        const message = streamingMessages.get(resp.requestId);
+        streamingMessages.delete(resp.requestId);
+        if (resp.superseded) {
+            message?.remove();
+        } else if (message) {
+            message.textContent = resp.gptMessage;
+        } else {
+            addMessageToChat(resp.gptMessage, "assistant");
+        }
     }
 
     
@@ -139,9 +176,14 @@ window.addEventListener("DOMContentLoaded", () => {
         const stream = await navigator.mediaDevices.getUserMedia({ audio:true });
         mediaRecorder = new MediaRecorder(stream, {mimeType:"audio/webm"});
         audioChunks.length = 0;
-        mediaRecorder.ondataavailable = e => audioChunks.push(e.data);
+        sttSession  = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        sttChunkSeq = 0;
+        mediaRecorder.ondataavailable = e => {
+            audioChunks.push(e.data);
+            if (streamingStt && e.data.size) sendAudioChunk(e.data);
+        };
         mediaRecorder.onstop          = onRecordingStop;
-        mediaRecorder.start();
+        mediaRecorder.start(1000);                 // части по 1 с для потокового распознавания
           // анализ громкости для паузы
         const ctx  = new (window.AudioContext||window.webkitAudioContext)();
         analyser   = ctx.createAnalyser();
@@ -174,22 +216,68 @@ window.addEventListener("DOMContentLoaded", () => {
         if (micOn) requestAnimationFrame(detectSilence);  // цикл пока микр. включён
     }
 //////////////////Отправка на Whisper и далее в GPT/////////////////////////////////////
+    // Аудио уходит на сервер в двоичном виде (без base64 через websocket eel)
+    async function transcribeBlob(blob) {
+        try {
+            const rsp = await fetch("/api/transcribe", {
+                method: "POST",
+                headers: { "Content-Type": blob.type || "audio/webm" },
+                body: blob
+            });
+            if (!rsp.ok) return "";
+            return (await rsp.json()).text || "";
+        } catch (err) {
+            console.error("Ошибка отправки аудио:", err);
+            return "";
+        }
+    }
+
+    // Часть записи: сервер распознает окна по мере поступления и возвращает частичный текст
+    async function sendAudioChunk(data) {
+        const url = `/api/transcribe/chunk?session=${sttSession}&seq=${sttChunkSeq++}`;
+        try {
+            const rsp = await fetch(url, {
+                method: "POST",
+                headers: { "Content-Type": data.type || "audio/webm" },
+                body: data
+            });
+            if (rsp.status === 404) { streamingStt = false; return; }   // режим отключен на сервере
+            if (!rsp.ok) return;
+            const { partial } = await rsp.json();
+            if (partial && micOn) messageText.textContent = partial;
+        } catch (err) {
+            console.error("Ошибка отправки части записи:", err);
+        }
+    }
+
+    // Конец речи: сервер дораспознает только последнее окно
+    async function finishStreamingTranscript() {
+        const url = `/api/transcribe/finish?session=${sttSession}&chunks=${sttChunkSeq}`;
+        try {
+            const rsp = await fetch(url, { method: "POST" });
+            if (!rsp.ok) return "";
+            return (await rsp.json()).text || "";
+        } catch (err) {
+            console.error("Ошибка завершения распознавания:", err);
+            return "";
+        }
+    }
+
     async function onRecordingStop() {
         const blob = new Blob(audioChunks, { type:"audio/webm" });
         audioChunks.length = 0;                     // ✅ очищаем на всякий случай
 
-        const arrBuf = await blob.arrayBuffer();
-        const b64    = btoa(String.fromCharCode(...new Uint8Array(arrBuf)));
-
-        const text   = await eel.transcribe_audio(b64)();
+        // Если потоковый режим не дал текста, отправляем запись целиком
+        let text = streamingStt ? await finishStreamingTranscript() : "";
+        if (!text.trim()) text = await transcribeBlob(blob);
         if (!text.trim()) { toggleMic(false); return; }
 
         addMessageToChat(text,"user");
         const raw = await eel.process_input(text)();
         const resp = typeof raw === "string" ? JSON.parse(raw) : raw;
 
-        addMessageToChat(resp.gptMessage,"assistant");
-        if (!resp.gptMessage.includes("{name}")) speakText(resp.gptMessage);
+        finishAssistantMessage(resp);
+        if (!resp.superseded && !resp.gptMessage.includes("{name}")) speakText(resp.gptMessage);
 
         toggleMic(false);                                    // микрофон выкл.
     }
@@ -202,8 +290,8 @@ window.addEventListener("DOMContentLoaded", () => {
         addMessageToChat(text,"user");          // ← только здесь пишем
         const raw  = await eel.process_input(text)();
         const resp = typeof raw === "string" ? JSON.parse(raw) : raw;
-        addMessageToChat(resp.gptMessage,"assistant");
-        if (!resp.gptMessage.includes("{name}")) speakText(resp.gptMessage);
+        finishAssistantMessage(resp);
+        if (!resp.superseded && !resp.gptMessage.includes("{name}")) speakText(resp.gptMessage);
       });
 
 
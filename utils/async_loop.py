@@ -0,0 +1,116 @@
+"""
+Общий фоновый цикл событий asyncio.
+
+Один долгоживущий поток держит цикл событий, на котором выполняются все
+асинхронные части обработки запроса (GPT, озвучка). Синхронный код
+(функции, вызываемые из eel) передает в него корутины через submit()/run(),
+поэтому цикл не создается и не закрывается на каждый запрос, а STT, LLM и TTS
+могут выполняться одновременно.
+"""
+
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("async_loop")
+
+
+class BackgroundLoop:
+    """
+    Цикл событий asyncio в отдельном потоке с потокобезопасным API.
+
+    Args:
+        name: Имя потока цикла событий
+    """
+
+    def __init__(self, name: str = "async-loop"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """
+        Запускает поток с циклом событий, если он еще не запущен.
+
+        Returns:
+            Работающий цикл событий
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_forever, name=self.name, daemon=True)
+            self._thread.start()
+            logger.info(f"Запущен фоновый цикл событий {self.name}")
+            return self._loop
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий (запускается при первом обращении)."""
+        return self.start()
+
+    def in_loop_thread(self) -> bool:
+        """True, если вызов сделан из потока самого цикла событий."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """
+        Планирует корутину на фоновом цикле из любого потока.
+
+        Args:
+            coro: Корутина для выполнения
+
+        Returns:
+            concurrent.futures.Future с результатом корутины
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Выполняет корутину на фоновом цикле и ждет результат.
+
+        Args:
+            coro: Корутина для выполнения
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            Результат корутины
+        """
+        if self.in_loop_thread():
+            # Ожидание из потока цикла заблокировало бы его навсегда
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() нельзя вызывать из потока цикла событий")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def call_soon(self, callback: Callable, *args):
+        """Потокобезопасно планирует вызов функции на фоновом цикле."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        """Останавливает цикл событий и ждет завершения потока."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            if not self._thread.is_alive():
+                self._loop.close()
+            self._thread = None
+            self._loop = None
+            logger.info(f"Фоновый цикл событий {self.name} остановлен")
+
+
+# Общий цикл событий для обработки запросов и озвучки
+background_loop = BackgroundLoop()
@@ -0,0 +1,205 @@
+"""
+Постоянный сервис вывода звука.
+
+Микшер pygame инициализируется один раз на все время работы процесса,
+а вся речь проигрывается через один зарезервированный канал. Остановка,
+пауза и продолжение выполняются командами канала, без закрытия
+аудиоустройства, поэтому следующая реплика начинает звучать сразу.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Optional
+
+logger = logging.getLogger("audio_output")
+
+
+class AudioOutput:
+    """
+    Владелец микшера pygame и очередь клипов для воспроизведения.
+
+    Клипы (pygame.mixer.Sound) проигрываются по порядку: текущий звучит в канале,
+    следующий стоит в очереди канала (переход без паузы), остальные ждут в deque.
+
+    Args:
+        mixer: Модуль pygame.mixer (или его заглушка)
+        channel_id: Номер зарезервированного канала для речи
+    """
+
+    def __init__(self, mixer: Any, channel_id: int = 0):
+        self._mixer = mixer
+        self._channel_id = channel_id
+        self._channel = None
+        self._pending = deque()
+        self._paused = False
+        self._paused_at = None
+        # Ожидаемое время окончания клипов, уже переданных в канал (текущий и в очереди)
+        self._ends_at = deque()
+        self._lock = threading.RLock()
+
+    def ensure_init(self) -> bool:
+        """
+        Инициализирует микшер, если он еще не открыт.
+
+        Returns:
+            True, если аудиоустройство готово к работе
+        """
+        with self._lock:
+            try:
+                if not self._mixer.get_init():
+                    self._mixer.init()
+                    logger.info("Аудиоустройство открыто")
+                if self._channel is None:
+                    # Резервируем канал, чтобы другие звуки не занимали его
+                    self._mixer.set_reserved(self._channel_id + 1)
+                    self._channel = self._mixer.Channel(self._channel_id)
+                return True
+            except Exception as e:
+                logger.error(f"Ошибка инициализации pygame: {e}")
+                self._channel = None
+                return False
+
+    def load(self, audio: Any):
+        """
+        Декодирует аудио (путь к файлу или файловый объект) в клип.
+
+        Args:
+            audio: Путь или io.BytesIO с аудиоданными
+
+        Returns:
+            Объект pygame.mixer.Sound
+        """
+        if not self.ensure_init():
+            raise RuntimeError("Аудиоустройство недоступно")
+        return self._mixer.Sound(file=audio)
+
+    def play(self, clip: Any, interrupt: bool = False):
+        """
+        Проигрывает клип или ставит его в очередь за текущими.
+
+        Args:
+            clip: Объект pygame.mixer.Sound
+            interrupt: Прервать текущее воспроизведение и очистить очередь
+        """
+        if not self.ensure_init():
+            return
+        with self._lock:
+            if interrupt:
+                self._pending.clear()
+                self._channel.stop()
+            self._pending.append(clip)
+            self._pump_locked()
+
+    def pump(self):
+        """Переносит ожидающие клипы в канал, когда в нем освобождается место."""
+        with self._lock:
+            if self._channel is not None:
+                self._pump_locked()
+
+    def _pump_locked(self):
+        if self._paused:
+            return
+        now = time.monotonic()
+        self._drop_finished(now)
+        while self._pending:
+            if not self._channel.get_busy():
+                clip = self._pending.popleft()
+                self._channel.play(clip)
+                self._ends_at = deque([now + self._clip_length(clip)])
+            elif self._channel.get_queue() is None:
+                # Очередь канала дает переход между клипами без паузы
+                clip = self._pending.popleft()
+                self._channel.queue(clip)
+                start = self._ends_at[-1] if self._ends_at else now
+                self._ends_at.append(start + self._clip_length(clip))
+            else:
+                break
+
+    @staticmethod
+    def _clip_length(clip: Any) -> float:
+        try:
+            return max(0.0, float(clip.get_length()))
+        except Exception:
+            return 0.0
+
+    def _drop_finished(self, now: float):
+        while self._ends_at and self._ends_at[0] <= now:
+            self._ends_at.popleft()
+
+    def stop(self):
+        """Останавливает воспроизведение и очищает очередь, не закрывая устройство."""
+        with self._lock:
+            self._pending.clear()
+            self._ends_at.clear()
+            self._paused = False
+            self._paused_at = None
+            if self._channel is not None:
+                self._channel.stop()
+
+    def pause(self):
+        """Ставит воспроизведение на паузу."""
+        with self._lock:
+            if not self._paused:
+                self._paused_at = time.monotonic()
+            self._paused = True
+            if self._channel is not None:
+                self._channel.pause()
+
+    def resume(self):
+        """Продолжает воспроизведение после паузы."""
+        with self._lock:
+            if self._paused_at is not None:
+                # Клипы на паузе доиграют позже на время паузы
+                shift = time.monotonic() - self._paused_at
+                self._ends_at = deque(end + shift for end in self._ends_at)
+            self._paused = False
+            self._paused_at = None
+            if self._channel is not None:
+                self._channel.unpause()
+                self._pump_locked()
+
+    def is_busy(self) -> bool:
+        """True, если что-то звучит, стоит на паузе или ждет в очереди."""
+        with self._lock:
+            if self._pending or self._paused:
+                return True
+            return self._channel is not None and bool(self._channel.get_busy())
+
+    def pending_count(self) -> int:
+        """Количество клипов, которые еще не переданы в канал."""
+        with self._lock:
+            return len(self._pending)
+
+    def seconds_until_slot(self) -> Optional[float]:
+        """
+        Оценка времени до освобождения места в очереди канала (конец текущего клипа).
+
+        Returns:
+            Секунды или None, если воспроизведение на паузе
+        """
+        with self._lock:
+            if self._paused:
+                return None
+            now = time.monotonic()
+            self._drop_finished(now)
+            return self._ends_at[0] - now if self._ends_at else 0.0
+
+    def seconds_until_idle(self) -> Optional[float]:
+        """
+        Оценка времени до окончания всех клипов, переданных в канал.
+
+        Returns:
+            Секунды или None, если воспроизведение на паузе
+        """
+        with self._lock:
+            if self._paused:
+                return None
+            now = time.monotonic()
+            self._drop_finished(now)
+            return self._ends_at[-1] - now if self._ends_at else 0.0
+
+    @property
+    def channel(self) -> Optional[Any]:
+        return self._channel
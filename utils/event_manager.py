@@ -1,22 +1,69 @@
 # utils/event_manager.py
+import asyncio
 import threading
+from typing import Callable, Optional
 
 class EventManager:
     def __init__(self):
         # Используем объект threading.Event для контроля состояния
         self._stop_audio_event = threading.Event()
-    
+        # Подписчики, которых нужно разбудить при запросе остановки
+        self._stop_listeners = []
+        self._listeners_lock = threading.Lock()
+
     def request_stop_audio(self):
-        """Устанавливает флаг остановки аудио."""
+        """Устанавливает флаг остановки аудио и будит всех подписчиков."""
         self._stop_audio_event.set()
-    
+        with self._listeners_lock:
+            listeners = list(self._stop_listeners)
+        for listener in listeners:
+            listener()
+
     def reset_stop_audio(self):
         """Сбрасывает флаг остановки аудио."""
         self._stop_audio_event.clear()
-    
+
     def should_stop_audio(self) -> bool:
         """Проверяет, установлен ли флаг остановки аудио."""
         return self._stop_audio_event.is_set()
 
+    def add_stop_listener(self, listener: Callable[[], None]):
+        """Подписывает функцию на запрос остановки аудио (вызывается из потока, запросившего остановку)."""
+        with self._listeners_lock:
+            self._stop_listeners.append(listener)
+
+    def remove_stop_listener(self, listener: Callable[[], None]):
+        """Отписывает функцию от запроса остановки аудио."""
+        with self._listeners_lock:
+            if listener in self._stop_listeners:
+                self._stop_listeners.remove(listener)
+
+    async def wait_stop_audio(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ждет запроса остановки аудио, не блокируя цикл событий.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах (None — без ограничения)
+
+        Returns:
+            True, если остановка была запрошена
+        """
+        if self.should_stop_audio():
+            return True
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        listener = lambda: loop.call_soon_threadsafe(stopped.set)
+        self.add_stop_listener(listener)
+        try:
+            # Флаг мог быть установлен между проверкой и подпиской
+            if self.should_stop_audio():
+                return True
+            await asyncio.wait_for(stopped.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self.should_stop_audio()
+        finally:
+            self.remove_stop_listener(listener)
+
 # Создаем глобальный экземпляр (при необходимости можно создать его и передавать как зависимость)
 event_manager = EventManager()
@@ -0,0 +1,322 @@
+"""
+Инкрементальное распознавание текста по изменившимся областям экрана.
+
+После клика или прокрутки большая часть экрана совпадает с предыдущим
+кадром, поэтому полный OCR каждого кадра в основном повторяет уже
+известный результат. Здесь кадр делится на плитки, которые сравниваются с
+предыдущим кадром векторно (NumPy). Tesseract запускается только на
+изменившихся областях: они расширяются на соседние плитки и до границ
+затронутых слов, а найденные слова заменяют в сохраненной раскладке слова
+этих областей. Стоимость чтения экрана растет с размером изменений, а не
+с разрешением экрана.
+
+Номера блоков и строк Tesseract сохраняются: блоки заново распознанной
+области нумеруются после уже известных, а слово, стоящее на строке
+сохраненного слова, продолжает его строку.
+
+Если изменилась большая часть кадра, его размер или язык распознавания,
+кадр распознается целиком.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.ocr import DEFAULT_LANG, Word, data_to_words, last_block, same_line, words_to_data, words_to_text
+
+logger = logging.getLogger("incremental_ocr")
+
+# Область: (x, y, ширина, высота)
+Box = Tuple[int, int, int, int]
+
+
+def changed_tiles(previous: np.ndarray, current: np.ndarray, tile: int = 64) -> np.ndarray:
+    """
+    Сравнивает два кадра по плиткам.
+
+    Args:
+        previous: Предыдущий кадр
+        current: Текущий кадр той же формы
+        tile: Размер плитки в пикселях
+
+    Returns:
+        Булева сетка (строки плиток, столбцы плиток): True — плитка изменилась
+    """
+    diff = previous != current
+    if diff.ndim == 3:
+        diff = diff.any(axis=2)
+    height, width = diff.shape
+    rows, cols = -(-height // tile), -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:height, :width] = diff
+    return padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    """Расширяет отмеченные плитки на одну соседнюю (включая диагональные)."""
+    result = mask.copy()
+    result[1:, :] |= mask[:-1, :]
+    result[:-1, :] |= mask[1:, :]
+    grown = result.copy()
+    grown[:, 1:] |= result[:, :-1]
+    grown[:, :-1] |= result[:, 1:]
+    return grown
+
+
+def tile_regions(mask: np.ndarray, tile: int, shape: Tuple[int, ...]) -> List[Box]:
+    """
+    Находит прямоугольники связных групп отмеченных плиток.
+
+    Args:
+        mask: Булева сетка плиток
+        tile: Размер плитки в пикселях
+        shape: Форма кадра (для обрезки по краям)
+
+    Returns:
+        Список областей (x, y, ширина, высота) в пикселях
+    """
+    height, width = shape[:2]
+    seen = np.zeros_like(mask)
+    regions = []
+    for row, col in zip(*np.nonzero(mask)):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(row, col)]
+        top, left, bottom, right = row, col, row, col
+        while stack:
+            r, c = stack.pop()
+            top, left, bottom, right = min(top, r), min(left, c), max(bottom, r), max(right, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < mask.shape[0] and 0 <= nc < mask.shape[1] and mask[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    stack.append((nr, nc))
+        x, y = left * tile, top * tile
+        regions.append((x, y, min(width, (right + 1) * tile) - x, min(height, (bottom + 1) * tile) - y))
+    return regions
+
+
+def _intersects(a: Box, b: Box) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _union(a: Box, b: Box) -> Box:
+    x, y = min(a[0], b[0]), min(a[1], b[1])
+    return x, y, max(a[0] + a[2], b[0] + b[2]) - x, max(a[1] + a[3], b[1] + b[3]) - y
+
+
+def _adopt_line(word: Word, kept: List[Word]) -> Word:
+    """Слово из распознанной заново области берет номера строки ближайшего сохраненного слова на той же строке."""
+    neighbours = [other for other in kept if other[8] and same_line(word, other)]
+    if not word[8] or not neighbours:
+        return word
+    center = word[2] + word[4] / 2
+    nearest = min(neighbours, key=lambda other: abs(other[2] + other[4] / 2 - center))
+    return word[:6] + nearest[6:9]
+
+
+def _merge_overlapping(regions: List[Box]) -> List[Box]:
+    merged = list(regions)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                if _intersects(merged[i], merged[j]):
+                    merged[i] = _union(merged[i], merged.pop(j))
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+
+class IncrementalOCR:
+    """
+    Распознавание текста, повторяющее OCR только для изменившихся областей кадра.
+
+    Интерфейс совпадает с OCRCache (image_to_data, image_to_string), поэтому
+    объект подставляется вместо него. У каждого вида предобработки кадра
+    (оттенки серого, бинаризация) должен быть свой экземпляр.
+
+    Args:
+        ocr: Распознаватель с методом image_to_data(image, lang, config) -> dict
+        tile: Размер плитки в пикселях
+        full_ratio: Доля площади изменений, при которой кадр распознается целиком
+        max_regions: Сколько отдельных областей распознавать (больше — объединяются)
+        margin: Отступ вокруг области в пикселях
+    """
+
+    def __init__(self, ocr=None, tile: int = 64, full_ratio: float = 0.5, max_regions: int = 4,
+                 margin: int = 4):
+        if ocr is None:
+            from utils.ocr import ocr_cache as ocr
+        self.ocr = ocr
+        self.tile = tile
+        self.full_ratio = full_ratio
+        self.max_regions = max_regions
+        self.margin = margin
+
+        self._previous: Optional[np.ndarray] = None
+        self._params: Optional[Tuple[str, str]] = None
+        self._words: List[Word] = []
+        self._lock = threading.Lock()
+        self._full = 0
+        self._incremental = 0
+        self._unchanged = 0
+        self._ocr_pixels = 0
+        self._frame_pixels = 0
+
+    def image_to_data(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> Dict[str, list]:
+        """
+        Распознает слова кадра (как pytesseract.image_to_data с Output.DICT).
+
+        Кадр не копируется и сохраняется для сравнения со следующим, поэтому
+        после вызова его нельзя изменять.
+
+        Args:
+            image: Кадр
+            lang: Языки распознавания
+            config: Дополнительные параметры Tesseract
+
+        Returns:
+            Словарь списков level, block_num, par_num, line_num, text, conf, left, top,
+            width, height (только слова)
+        """
+        with self._lock:
+            self._update(image, (lang, config))
+            words = list(self._words)
+        return words_to_data(words)
+
+    def image_to_string(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> str:
+        """
+        Распознает текст кадра: слова собираются в строки по вертикальному положению.
+
+        Args:
+            image: Кадр
+            lang: Языки распознавания
+            config: Дополнительные параметры Tesseract
+
+        Returns:
+            Текст кадра, строки разделены переводом строки
+        """
+        with self._lock:
+            self._update(image, (lang, config))
+            words = list(self._words)
+        return words_to_text(words)
+
+    def reset(self):
+        """Забывает предыдущий кадр: следующий будет распознан целиком."""
+        with self._lock:
+            self._previous = None
+            self._words = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает статистику: сколько кадров распознано целиком и частично."""
+        with self._lock:
+            return {
+                "full": self._full,
+                "incremental": self._incremental,
+                "unchanged": self._unchanged,
+                "words": len(self._words),
+                "ocr_area_ratio": round(self._ocr_pixels / self._frame_pixels, 3) if self._frame_pixels else 0.0
+            }
+
+    def _update(self, image: np.ndarray, params: Tuple[str, str]):
+        height, width = image.shape[:2]
+        self._frame_pixels += height * width
+        previous = self._previous
+        self._previous = image
+
+        if previous is None or previous.shape != image.shape or params != self._params:
+            self._params = params
+            self._full_ocr(image)
+            return
+
+        mask = changed_tiles(previous, image, self.tile)
+        if not mask.any():
+            self._unchanged += 1
+            return
+
+        regions = self._expand(tile_regions(dilate(mask), self.tile, image.shape))
+        if len(regions) > self.max_regions:
+            bounds = regions[0]
+            for region in regions[1:]:
+                bounds = _union(bounds, region)
+            regions = [bounds]
+        area = sum(w * h for _, _, w, h in regions)
+        if area >= self.full_ratio * height * width:
+            self._full_ocr(image)
+            return
+
+        kept = [word for word in self._words
+                if not any(_intersects(word[2:6], region) for region in regions)]
+        block_offset = last_block(self._words)
+        fresh = []
+        for x, y, w, h in regions:
+            words = self._recognize(image, x, y, w, h, block_offset)
+            block_offset = max(block_offset, last_block(words))
+            fresh.extend(words)
+            self._ocr_pixels += w * h
+        self._words = kept + [_adopt_line(word, kept) for word in fresh]
+        self._words.sort(key=lambda word: (word[3], word[2]))
+        self._incremental += 1
+        logger.debug(f"Распознано {len(regions)} измененных областей ({area / (height * width):.1%} кадра)")
+
+    def _expand(self, regions: List[Box]) -> List[Box]:
+        """Расширяет области до границ затронутых слов, объединяя пересекающиеся."""
+        while True:
+            expanded = []
+            for region in regions:
+                grown = True
+                while grown:
+                    grown = False
+                    for word in self._words:
+                        box = word[2:6]
+                        if _intersects(box, region) and _union(box, region) != region:
+                            region = _union(box, region)
+                            grown = True
+                expanded.append(region)
+            merged = _merge_overlapping(expanded)
+            if len(merged) == len(expanded):
+                return merged
+            # После объединения область могла задеть новые слова
+            regions = merged
+
+    def _full_ocr(self, image: np.ndarray):
+        height, width = image.shape[:2]
+        self._words = self._recognize(image, 0, 0, width, height)
+        self._ocr_pixels += height * width
+        self._full += 1
+
+    def _recognize(self, image: np.ndarray, x: int, y: int, w: int, h: int, block_offset: int = 0) -> List[Word]:
+        height, width = image.shape[:2]
+        if (x, y, w, h) == (0, 0, width, height):
+            left, top, crop = 0, 0, image
+        else:
+            # Отступ вокруг области улучшает распознавание крайних букв
+            left, top = max(0, x - self.margin), max(0, y - self.margin)
+            crop = image[top:min(height, y + h + self.margin), left:min(width, x + w + self.margin)]
+        lang, config = self._params
+        data = self.ocr.image_to_data(crop, lang=lang, config=config)
+
+        # Обрывки соседних слов из отступа не берем: эти слова остались в раскладке
+        return [word for word in data_to_words(data, left, top, block_offset)
+                if x <= word[2] + word[4] / 2 < x + w and y <= word[3] + word[5] / 2 < y + h]
+
+
+def create_screen_ocr():
+    """
+    Создает распознаватель для одного вида предобработки кадра.
+
+    Returns:
+        IncrementalOCR поверх общего кэша OCR или сам кэш, если инкрементальное
+        распознавание выключено (INCREMENTAL_OCR)
+    """
+    from core.config import INCREMENTAL_OCR, INCREMENTAL_OCR_TILE
+    from utils.ocr import ocr_cache
+    if not INCREMENTAL_OCR:
+        return ocr_cache
+    return IncrementalOCR(ocr_cache, tile=INCREMENTAL_OCR_TILE)
@@ -205,6 +205,16 @@ class MockPygame:
             logger.info("Имитация остановки всех звуков")
             return None
             
+        def set_reserved(self, count):
+            logger.info(f"Имитация резервирования каналов: count={count}")
+            return count
+            
+        def Channel(self, id):
+            logger.info(f"Имитация получения канала: id={id}")
+            channel = self.MockSound.MockChannel()
+            channel._playing = False
+            return channel
+            
         class MockMusic:
             """Заглушка для pygame.mixer.music"""
             
@@ -308,15 +318,26 @@ class MockPygame:
                 def __init__(self):
                     logger.info("Инициализирована заглушка pygame.mixer.Channel")
                     self._playing = True
+                    self._queued = None
                     
                 def play(self, sound, loops=0, maxtime=0, fade_ms=0):
                     logger.info(f"Имитация воспроизведения звука на канале: loops={loops}, maxtime={maxtime}, fade_ms={fade_ms}")
                     self._playing = True
                     return None
                     
+                def queue(self, sound):
+                    logger.info("Имитация постановки звука в очередь канала")
+                    self._queued = sound
+                    return None
+                    
+                def get_queue(self):
+                    logger.info("Имитация получения очереди канала")
+                    return self._queued
+                    
                 def stop(self):
                     logger.info("Имитация остановки звука на канале")
                     self._playing = False
+                    self._queued = None
                     return None
                     
                 def pause(self):
@@ -344,11 +365,71 @@ class MockPygame:
                     logger.info("Имитация проверки воспроизведения звука на канале")
                     return self._playing
 
+class MockInputStream:
+    """
+    Имитация потока записи: передает input_signal в callback блоками
+    по blocksize кадров из отдельного потока (быстрее реального времени).
+    """
+    
+    def __init__(self, samplerate=44100, channels=1, dtype='float32', blocksize=1024,
+                 callback=None, signal=None, **kwargs):
+        import numpy as np
+        logger.info(f"Имитация открытия потока записи: samplerate={samplerate}, channels={channels}")
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+        self.blocksize = blocksize or 1024
+        self.callback = callback
+        self.signal = np.zeros(0, dtype=dtype) if signal is None else np.asarray(signal, dtype=dtype)
+        self.active = False
+        self._thread = None
+    
+    def _feed(self):
+        import time
+        import numpy as np
+        position = 0
+        while self.active:
+            block = self.signal[position:position + self.blocksize]
+            position += self.blocksize
+            if block.shape[0] < self.blocksize:
+                block = np.concatenate([block, np.zeros(self.blocksize - block.shape[0], dtype=self.dtype)])
+            self.callback(block.reshape(-1, 1).repeat(self.channels, axis=1), self.blocksize, None, None)
+            time.sleep(0)
+    
+    def start(self):
+        import threading
+        self.active = True
+        if self.callback is not None:
+            self._thread = threading.Thread(target=self._feed, daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self.active = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+    
+    def close(self):
+        self.stop()
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+
 class MockSoundDevice:
     """Заглушка для sounddevice"""
     
     def __init__(self):
         logger.info("Инициализирована заглушка sounddevice")
+        # Сигнал, который "записывает" InputStream (после него идет тишина)
+        self.input_signal = None
+    
+    def InputStream(self, *args, **kwargs):
+        """Имитация sounddevice.InputStream (передает input_signal в callback)"""
+        kwargs.setdefault("signal", self.input_signal)
+        return MockInputStream(*args, **kwargs)
     
     def rec(self, frames, samplerate=44100, channels=1, dtype='float32', **kwargs):
         """Имитация записи аудио"""
@@ -0,0 +1,278 @@
+"""
+Кэш результатов OCR по хэшу кадра.
+
+Команды работы с экраном (analyze_screen, read_screen_text, click_on_text,
+find_text_field, click_button) каждый раз делают новый скриншот и запускают
+полный Tesseract, хотя экран чаще всего не изменился с предыдущей команды.
+Кэш хранит результаты image_to_string / image_to_data по хэшу изображения,
+поданного на распознавание, поэтому повторный запрос к неизменному экрану
+не запускает Tesseract.
+
+Хэш считается по всем строкам пикселей (crc32 по непрерывным строкам, без
+копирования кадра). Шаг row_stride > 1 ускоряет хэш, но изменение только
+в пропущенных строках (курсор, подчеркивание, тонкий штрих высотой в
+пиксель) не меняет ключ, и кэш вернет устаревший текст. Размер кэша
+ограничен, при переполнении вытесняются давно не использованные записи (LRU).
+"""
+
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+logger = logging.getLogger("ocr")
+
+# Языки распознавания по умолчанию
+DEFAULT_LANG = "rus+eng"
+
+# Слово: (текст, уверенность, x, y, ширина, высота, блок, абзац, строка).
+# Номера блока, абзаца и строки — из раскладки Tesseract (0 — неизвестны)
+Word = Tuple[str, Any, int, int, int, int, int, int, int]
+
+# Столбцы image_to_data с номерами раскладки Tesseract
+LAYOUT_KEYS = ("block_num", "par_num", "line_num")
+
+
+def data_to_words(data: Dict[str, list], dx: int = 0, dy: int = 0, block_offset: int = 0) -> List[Word]:
+    """
+    Извлекает непустые слова из результата image_to_data.
+
+    Args:
+        data: Словарь списков text, conf, left, top, width, height
+            (block_num, par_num, line_num — если есть)
+        dx: Сдвиг по горизонтали (если распознавалась часть кадра)
+        dy: Сдвиг по вертикали
+        block_offset: Сдвиг номеров блоков (чтобы блоки разных частей кадра не совпадали)
+
+    Returns:
+        Список слов с координатами в кадре
+    """
+    layout = [data.get(key) for key in LAYOUT_KEYS]
+    words = []
+    for i, text in enumerate(data["text"]):
+        text = str(text).strip()
+        if text:
+            block, paragraph, line = (int(column[i]) if column is not None else 0 for column in layout)
+            words.append((text, data["conf"][i], data["left"][i] + dx, data["top"][i] + dy,
+                          data["width"][i], data["height"][i],
+                          block + block_offset if block else 0, paragraph, line))
+    return words
+
+
+def words_to_data(words: List[Word]) -> Dict[str, list]:
+    """Собирает слова в словарь списков, как image_to_data (только уровень слов)."""
+    return {
+        "level": [5] * len(words),
+        "block_num": [word[6] for word in words],
+        "par_num": [word[7] for word in words],
+        "line_num": [word[8] for word in words],
+        "text": [word[0] for word in words],
+        "conf": [word[1] for word in words],
+        "left": [word[2] for word in words],
+        "top": [word[3] for word in words],
+        "width": [word[4] for word in words],
+        "height": [word[5] for word in words]
+    }
+
+
+def last_block(words: List[Word]) -> int:
+    """Наибольший номер блока среди слов (0, если номеров нет)."""
+    return max((word[6] for word in words), default=0)
+
+
+def same_line(a: Word, b: Word) -> bool:
+    """True, если слова стоят на одной строке по вертикальному положению."""
+    return abs(a[3] + a[5] / 2 - (b[3] + b[5] / 2)) <= max(a[5], b[5]) / 2
+
+
+def group_lines(words: List[Word]) -> List[List[int]]:
+    """
+    Группирует слова в строки.
+
+    Слова с номерами строк Tesseract группируются по ним (блок, абзац,
+    строка), поэтому колонки на одной высоте остаются разными строками.
+    Слова без номеров группируются по вертикальному положению.
+
+    Args:
+        words: Слова с координатами
+
+    Returns:
+        Номера слов по строкам: строки сверху вниз, слова в строке слева направо
+    """
+    layout: Dict[Tuple[int, int, int], List[int]] = {}
+    lines: List[List[int]] = []
+    for index in sorted(range(len(words)), key=lambda i: (words[i][3] + words[i][5] / 2, words[i][2])):
+        word = words[index]
+        if word[8]:
+            layout.setdefault(word[6:9], []).append(index)
+        elif lines and same_line(words[lines[-1][0]], word):
+            lines[-1].append(index)
+        else:
+            lines.append([index])
+    lines.extend(layout.values())
+    # Индексы в строках уже отсортированы по высоте центра: первый — верхний
+    lines.sort(key=lambda line: (words[line[0]][3] + words[line[0]][5] / 2, min(words[i][2] for i in line)))
+    return [sorted(line, key=lambda i: words[i][2]) for line in lines]
+
+
+def words_to_text(words: List[Word]) -> str:
+    """
+    Собирает текст из слов: слова группируются в строки по вертикальному
+    положению, строки идут сверху вниз, слова в строке — слева направо.
+
+    Args:
+        words: Слова с координатами
+
+    Returns:
+        Текст, строки разделены переводом строки
+    """
+    return "\n".join(" ".join(words[i][0] for i in line) for line in group_lines(words))
+
+
+def frame_hash(image: np.ndarray, row_stride: int = 1) -> Tuple[Any, ...]:
+    """
+    Вычисляет быстрый хэш изображения.
+
+    Args:
+        image: Изображение (numpy array, кадр или его часть)
+        row_stride: Учитывать каждую row_stride-ю строку (больше 1 — изменения
+            в пропущенных строках не меняют хэш)
+
+    Returns:
+        Ключ (форма, тип, шаг, crc32 строк)
+    """
+    checksum = 0
+    rows = image[::max(1, row_stride)]
+    if image.ndim > 1 and image[0].flags["C_CONTIGUOUS"]:
+        for row in rows:
+            checksum = zlib.crc32(row, checksum)
+    else:
+        # Вырезанная область: строки не непрерывны, копируем выборку
+        checksum = zlib.crc32(np.ascontiguousarray(rows))
+    return image.shape, image.dtype.str, row_stride, checksum
+
+
+class OCRCache:
+    """
+    Распознавание текста с кэшем результатов по хэшу изображения.
+
+    Args:
+        engine: Движок OCR с интерфейсом pytesseract (image_to_string, image_to_data)
+        max_entries: Максимальное количество результатов в кэше
+        row_stride: Шаг строк для хэша изображения (1 — все строки)
+        enabled: False — всегда распознавать заново
+    """
+
+    def __init__(self, engine=None, max_entries: int = 32, row_stride: int = 1, enabled: bool = True):
+        self.engine = engine if engine is not None else pytesseract
+        self.max_entries = max_entries
+        self.row_stride = row_stride
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def image_to_string(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> str:
+        """
+        Распознает текст изображения (как pytesseract.image_to_string).
+
+        Args:
+            image: Изображение
+            lang: Языки распознавания
+            config: Дополнительные параметры Tesseract
+
+        Returns:
+            Распознанный текст
+        """
+        return self._cached(
+            ("string", lang, config), image,
+            lambda: self.engine.image_to_string(image, lang=lang, config=config)
+        )
+
+    def image_to_data(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> Dict[str, list]:
+        """
+        Распознает слова с координатами (как pytesseract.image_to_data с Output.DICT).
+
+        Args:
+            image: Изображение
+            lang: Языки распознавания
+            config: Дополнительные параметры Tesseract
+
+        Returns:
+            Словарь списков text, conf, left, top, width, height и т.д.
+        """
+        data = self._cached(
+            ("data", lang, config), image,
+            lambda: self.engine.image_to_data(image, lang=lang, config=config,
+                                              output_type=self.engine.Output.DICT)
+        )
+        # Копия списков: вызывающий код не должен портить запись кэша
+        return {key: list(values) for key, values in data.items()}
+
+    def _cached(self, operation: Tuple, image: np.ndarray, compute):
+        if not self.enabled or self.max_entries <= 0:
+            return compute()
+
+        key = operation + frame_hash(image, self.row_stride)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+
+        # Tesseract работает без блокировки: параллельные запросы к разным кадрам не ждут друг друга
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def clear(self):
+        """Очищает кэш."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает статистику кэша."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0
+            }
+
+
+def _create_cache() -> OCRCache:
+    from core.config import (
+        OCR_CACHE_ENABLED, OCR_CACHE_MAX_ENTRIES, OCR_CACHE_ROW_STRIDE,
+        OCR_BACKEND, OCR_WORKERS, OCR_BAND_OVERLAP, OCR_EXECUTOR
+    )
+
+    engine = None
+    if OCR_BACKEND == "parallel":
+        from utils.parallel_ocr import ParallelOCR
+        engine = ParallelOCR(workers=OCR_WORKERS or None, overlap=OCR_BAND_OVERLAP, executor=OCR_EXECUTOR)
+    return OCRCache(engine, max_entries=OCR_CACHE_MAX_ENTRIES, row_stride=OCR_CACHE_ROW_STRIDE,
+                    enabled=OCR_CACHE_ENABLED)
+
+
+# Общий кэш OCR
+ocr_cache = _create_cache()
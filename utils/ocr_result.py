@@ -0,0 +1,313 @@
+"""
+Результат распознавания кадра с индексом слов.
+
+Один проход OCR по кадру дает таблицу слов: текст, нормализованный текст,
+уверенность, рамка, номер строки и блока. Индекс строится один раз, и по
+нему выполняются все запросы к кадру: полный текст, поиск текста для клика,
+поиск поля ввода по меткам. Поиск бывает точным, по началу слова, по
+вхождению, нечетким и по фразе из соседних слов одной строки.
+
+Нечеткий поиск сравнивает запрос сразу со всеми окнами из 1..N соседних слов
+строки (utils.text_match): надпись, разбитая OCR на несколько рамок или
+распознанная с латинскими буквами вместо кириллических, находится с общей
+рамкой за один снимок экрана.
+"""
+
+import string
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.ocr import Word, data_to_words, group_lines
+from utils.text_match import edit_distances, fold_text, max_distance_for
+
+logger = logging.getLogger("ocr_result")
+
+# Кавычки, которые OCR оставляет вокруг слов
+QUOTES = "‘’“”'\"«»„"
+
+# Порядок видов совпадений: чем раньше, тем надежнее
+MATCH_KINDS = ("exact", "phrase", "prefix", "contains", "fuzzy")
+
+# Окно нечеткого поиска может быть длиннее запроса на столько слов
+# (OCR разбивает "Вход/Регистрация" на "Вход", "/", "Регистрация")
+EXTRA_WINDOW_WORDS = 2
+
+
+def normalize_word(text: str) -> str:
+    """
+    Нормализует слово для поиска: без кавычек и крайней пунктуации,
+    в нижнем регистре, ё заменяется на е.
+
+    Args:
+        text: Слово
+
+    Returns:
+        Нормализованное слово (может быть пустым)
+    """
+    for ch in QUOTES:
+        text = text.replace(ch, "")
+    return text.strip(string.punctuation + " ").lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает фразу на нормализованные слова."""
+    return [token for token in (normalize_word(part) for part in text.split()) if token]
+
+
+class TextMatch:
+    """
+    Найденный на кадре текст.
+
+    Args:
+        text: Текст совпадения (слова кадра через пробел)
+        kind: Вид совпадения (MATCH_KINDS)
+        score: Похожесть на запрос (0-1)
+        confidence: Средняя уверенность OCR (0-1)
+        box: Рамка (x, y, ширина, высота)
+        indexes: Номера слов в таблице
+    """
+
+    def __init__(self, text: str, kind: str, score: float, confidence: float,
+                 box: Tuple[int, int, int, int], indexes: List[int]):
+        self.text = text
+        self.kind = kind
+        self.score = score
+        self.confidence = confidence
+        self.box = box
+        self.indexes = indexes
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Центр рамки."""
+        x, y, w, h = self.box
+        return x + w // 2, y + h // 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "kind": self.kind,
+            "score": round(self.score, 3),
+            "confidence": round(self.confidence, 3),
+            "box": self.box
+        }
+
+    def __repr__(self):
+        return f"TextMatch({self.text!r}, {self.kind}, box={self.box})"
+
+
+class OCRResult:
+    """
+    Таблица слов кадра с индексом для поиска.
+
+    Args:
+        words: Слова (текст, уверенность, x, y, ширина, высота, блок, абзац, строка)
+    """
+
+    def __init__(self, words: List[Word]):
+        self.texts = [word[0] for word in words]
+        self.norms = [normalize_word(text) for text in self.texts]
+        self.conf = np.array([_confidence(word[1]) for word in words], dtype=np.float32)
+        self.boxes = np.array([word[2:6] for word in words], dtype=np.int32).reshape(-1, 4)
+        self.blocks = np.array([word[6] for word in words], dtype=np.int32)
+        self.lines = np.zeros(len(words), dtype=np.int32)
+
+        # Строки: номера слов слева направо
+        self._line_words = group_lines(words)
+        for line, indexes in enumerate(self._line_words):
+            self.lines[indexes] = line
+
+        # Точный поиск и поиск по началу слова
+        self._exact: Dict[str, List[int]] = {}
+        for index, norm in enumerate(self.norms):
+            if norm:
+                self._exact.setdefault(norm, []).append(index)
+        self._sorted = sorted(self._exact)
+
+        # Свернутые слова для нечеткого поиска
+        self._folded = [fold_text(text) for text in self.texts]
+
+    @classmethod
+    def from_data(cls, data: Dict[str, list]) -> "OCRResult":
+        """
+        Строит результат из словаря image_to_data (pytesseract Output.DICT).
+
+        Args:
+            data: Словарь списков text, conf, left, top, width, height
+                (block_num, par_num, line_num — если есть)
+
+        Returns:
+            OCRResult с непустыми словами
+        """
+        return cls(data_to_words(data))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def text(self) -> str:
+        """Полный текст кадра: строки сверху вниз, слова слева направо."""
+        return "\n".join(" ".join(self.texts[i] for i in line) for line in self._line_words)
+
+    def word(self, index: int) -> Dict[str, Any]:
+        """Строка таблицы слов."""
+        return {
+            "text": self.texts[index],
+            "norm": self.norms[index],
+            "conf": float(self.conf[index]),
+            "box": tuple(int(v) for v in self.boxes[index]),
+            "line": int(self.lines[index]),
+            "block": int(self.blocks[index])
+        }
+
+    # === Поиск ===
+
+    def find_exact(self, query: str, min_conf: float = 0.0) -> List[TextMatch]:
+        """Слова, совпадающие с запросом после нормализации."""
+        return self._matches(self._exact.get(normalize_word(query), []), "exact", min_conf)
+
+    def find_prefix(self, query: str, min_conf: float = 0.0) -> List[TextMatch]:
+        """Слова, начинающиеся с запроса (длиннее него)."""
+        key = normalize_word(query)
+        if not key:
+            return []
+        indexes = []
+        position = bisect.bisect_right(self._sorted, key)
+        while position < len(self._sorted) and self._sorted[position].startswith(key):
+            indexes.extend(self._exact[self._sorted[position]])
+            position += 1
+        return self._matches(indexes, "prefix", min_conf, key)
+
+    def find_contains(self, query: str, min_conf: float = 0.0) -> List[TextMatch]:
+        """Слова, содержащие запрос внутри (не с начала)."""
+        key = normalize_word(query)
+        if not key:
+            return []
+        indexes = [i for i, norm in enumerate(self.norms) if key in norm and not norm.startswith(key)]
+        return self._matches(indexes, "contains", min_conf, key)
+
+    def find_fuzzy(self, query: str, min_conf: float = 0.0) -> List[TextMatch]:
+        """
+        Окна из соседних слов одной строки, похожие на запрос: с ошибками
+        распознавания, путаницей кириллицы и латиницы, склеенными или
+        разбитыми словами.
+
+        Args:
+            query: Слово или фраза
+            min_conf: Минимальная средняя уверенность OCR
+
+        Returns:
+            Совпадения, лучшие первыми
+        """
+        key = fold_text(query)
+        if not key:
+            return []
+        max_distance = max_distance_for(key)
+        window = len(query.split()) + EXTRA_WINDOW_WORDS
+
+        # Кандидаты: все окна, длина которых отличается от запроса не больше порога
+        candidates, windows = [], []
+        for line in self._line_words:
+            # Позиции слов с буквами или цифрами; окно включает и знаки между ними
+            positions = [p for p, i in enumerate(line) if self._folded[i]]
+            for start in range(len(positions)):
+                folded = ""
+                for end in range(start, min(start + window, len(positions))):
+                    folded += self._folded[line[positions[end]]]
+                    if len(folded) > len(key) + max_distance:
+                        break
+                    if len(folded) >= len(key) - max_distance:
+                        candidates.append(folded)
+                        windows.append(line[positions[start]:positions[end] + 1])
+        if not candidates:
+            return []
+
+        distances = edit_distances(key, candidates, max_distance)
+        matches = []
+        for position in np.nonzero(distances <= max_distance)[0]:
+            score = 1.0 - distances[position] / max(len(key), len(candidates[position]))
+            match = self._match(windows[position], "fuzzy", float(score))
+            if match.confidence >= min_conf:
+                matches.append(match)
+        return sorted(matches, key=lambda m: (-m.score, len(m.indexes), -m.confidence))
+
+    def find_phrase(self, query: str, min_conf: float = 0.0) -> List[TextMatch]:
+        """
+        Фразы из соседних слов одной строки, точно совпадающие с запросом.
+
+        Args:
+            query: Фраза из нескольких слов
+            min_conf: Минимальная средняя уверенность OCR
+
+        Returns:
+            Совпадения, лучшие первыми
+        """
+        tokens = tokenize(query)
+        if len(tokens) < 2:
+            return []
+        matches = []
+        for line in self._line_words:
+            line = [i for i in line if self.norms[i]]
+            for start in range(len(line) - len(tokens) + 1):
+                window = line[start:start + len(tokens)]
+                if all(self.norms[i] == token for i, token in zip(window, tokens)):
+                    match = self._match(window, "phrase", 1.0)
+                    if match.confidence >= min_conf:
+                        matches.append(match)
+        return sorted(matches, key=lambda m: -m.confidence)
+
+    def find(self, query: str, min_conf: float = 0.0, fuzzy: bool = True) -> Optional[TextMatch]:
+        """
+        Находит лучшее совпадение запроса: точное слово или фраза, затем
+        совпадение после свертки (похожие буквы, разбитые слова), начало
+        слова, вхождение и нечеткое совпадение.
+
+        Args:
+            query: Слово или фраза
+            min_conf: Минимальная уверенность OCR (0-1)
+            fuzzy: Искать нечеткие совпадения
+
+        Returns:
+            Лучшее совпадение или None
+        """
+        single_word = len(tokenize(query)) == 1
+        matches = self.find_exact(query, min_conf) if single_word else self.find_phrase(query, min_conf)
+        if matches:
+            return matches[0]
+
+        # Одно вычисление расстояний на все окна кадра: сначала берется
+        # совпадение без ошибок после свертки, неточное — после поиска по части слова
+        similar = self.find_fuzzy(query, min_conf) if fuzzy else []
+        if similar and similar[0].score == 1.0:
+            return similar[0]
+        if single_word:
+            for matches in (self.find_prefix(query, min_conf), self.find_contains(query, min_conf)):
+                if matches:
+                    return matches[0]
+        return similar[0] if similar else None
+
+    def _match(self, indexes: List[int], kind: str, score: float) -> TextMatch:
+        boxes = self.boxes[indexes]
+        x, y = boxes[:, 0].min(), boxes[:, 1].min()
+        right, bottom = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+        return TextMatch(" ".join(self.texts[i] for i in indexes), kind, score,
+                         float(self.conf[indexes].mean()),
+                         (int(x), int(y), int(right - x), int(bottom - y)), list(indexes))
+
+    def _matches(self, indexes: List[int], kind: str, min_conf: float, key: str = None) -> List[TextMatch]:
+        matches = []
+        for i in indexes:
+            if self.conf[i] < min_conf:
+                continue
+            score = 1.0 if key is None else len(key) / max(len(self.norms[i]), 1)
+            matches.append(self._match([i], kind, score))
+        return sorted(matches, key=lambda m: (-m.score, -m.confidence))
+
+
+def _confidence(value: Any) -> float:
+    """Уверенность Tesseract (0-100, -1 — нет данных) в диапазоне 0-1."""
+    try:
+        return max(0.0, float(value)) / 100
+    except (TypeError, ValueError):
+        return 0.0
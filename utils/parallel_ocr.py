@@ -0,0 +1,165 @@
+"""
+Параллельное распознавание текста горизонтальными полосами.
+
+Tesseract распознает кадр в одном потоке, и на полном экране 1920x1080 или
+4K это основная часть задержки click_on_text. Здесь кадр делится на
+перекрывающиеся горизонтальные полосы, которые распознаются параллельно, а
+слова собираются обратно в координаты кадра.
+
+Дубли в зонах перекрытия отбрасываются без сравнения рамок: граница между
+соседними полосами проходит по середине перекрытия, и слово берется только
+из той полосы, которой принадлежит его центр. Если перекрытие не меньше
+высоты строки, эта полоса видит слово целиком, а обрывок слова в соседней
+полосе имеет центр на чужой стороне границы.
+
+pytesseract запускает отдельный процесс tesseract на каждый вызов, поэтому
+для параллельной работы на всех ядрах достаточно пула потоков (executor
+"thread"), и кадр не копируется между процессами. Пул процессов ("process")
+тоже поддерживается, но полосы кадра копируются в рабочие процессы.
+"""
+
+import os
+import math
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.ocr import DEFAULT_LANG, Word, data_to_words, last_block, words_to_data, words_to_text
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+logger = logging.getLogger("parallel_ocr")
+
+# Полосы ниже этой высоты не делятся дальше: запуск tesseract дороже выигрыша
+MIN_BAND_HEIGHT = 160
+
+
+def split_bands(height: int, bands: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Делит высоту кадра на перекрывающиеся полосы.
+
+    Args:
+        height: Высота кадра
+        bands: Количество полос
+        overlap: Перекрытие соседних полос в пикселях
+
+    Returns:
+        Список (начало полосы, конец полосы, начало своей зоны, конец своей зоны);
+        свои зоны полос не пересекаются и вместе покрывают весь кадр
+    """
+    bands = max(1, min(bands, height // MIN_BAND_HEIGHT or 1))
+    step = math.ceil(height / bands)
+    half = overlap // 2
+    result = []
+    for index in range(bands):
+        own_top = index * step
+        own_bottom = min(height, own_top + step)
+        if own_top >= own_bottom:
+            break
+        top = 0 if index == 0 else max(0, own_top - half)
+        bottom = height if own_bottom == height else min(height, own_bottom + overlap - half)
+        result.append((top, bottom, own_top, own_bottom))
+    return result
+
+
+def _tesseract_band(band: np.ndarray, lang: str, config: str) -> Dict[str, list]:
+    """Распознает полосу через pytesseract (функция модуля: ее можно вызвать в другом процессе)."""
+    return pytesseract.image_to_data(band, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+
+class ParallelOCR:
+    """
+    Движок OCR с интерфейсом pytesseract, распознающий полосы кадра параллельно.
+
+    Объект подставляется в OCRCache вместо модуля pytesseract.
+
+    Args:
+        engine: Движок для одной полосы с интерфейсом pytesseract (None — pytesseract)
+        workers: Количество параллельных распознаваний (None — по числу ядер)
+        overlap: Перекрытие полос в пикселях (не меньше высоты строки текста)
+        executor: "thread" или "process" (только с pytesseract)
+    """
+
+    class Output:
+        DICT = "dict"
+
+    def __init__(self, engine=None, workers: Optional[int] = None, overlap: int = 64,
+                 executor: str = "thread"):
+        if executor == "process" and engine is not None:
+            raise ValueError("Пул процессов поддерживается только с pytesseract")
+        self.engine = engine
+        self.workers = workers or os.cpu_count() or 1
+        self.overlap = overlap
+        self.executor = executor
+        self._pool = None
+        self._lock = threading.Lock()
+        # Каждый процесс tesseract — в один поток, иначе параллельные процессы мешают друг другу
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def _get_pool(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.executor == "process":
+                    self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                                       thread_name_prefix="ocr")
+            return self._pool
+
+    def _recognize_band(self, band: np.ndarray, lang: str, config: str) -> Dict[str, list]:
+        if self.engine is None:
+            return _tesseract_band(band, lang, config)
+        return self.engine.image_to_data(band, lang=lang, config=config, output_type=self.engine.Output.DICT)
+
+    def recognize(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> List[Word]:
+        """
+        Распознает слова кадра по полосам.
+
+        Args:
+            image: Кадр
+            lang: Языки распознавания
+            config: Дополнительные параметры Tesseract
+
+        Returns:
+            Слова с координатами в кадре, без дублей из зон перекрытия
+        """
+        bands = split_bands(image.shape[0], self.workers, self.overlap)
+        if len(bands) == 1:
+            return data_to_words(self._recognize_band(image, lang, config))
+
+        pool = self._get_pool()
+        task = _tesseract_band if self.executor == "process" else self._recognize_band
+        futures = [pool.submit(task, image[top:bottom], lang, config) for top, bottom, _, _ in bands]
+
+        words = []
+        block_offset = 0
+        for (top, _, own_top, own_bottom), future in zip(bands, futures):
+            # Блоки каждой полосы нумеруются после блоков предыдущих полос
+            band = data_to_words(future.result(), 0, top, block_offset)
+            block_offset = max(block_offset, last_block(band))
+            words.extend(word for word in band if own_top <= word[3] + word[5] / 2 < own_bottom)
+        words.sort(key=lambda word: (word[3], word[2]))
+        logger.debug(f"Распознано {len(words)} слов в {len(bands)} полосах")
+        return words
+
+    def image_to_data(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "",
+                      output_type: Any = None) -> Dict[str, list]:
+        """Распознает слова кадра (как pytesseract.image_to_data с Output.DICT)."""
+        return words_to_data(self.recognize(image, lang, config))
+
+    def image_to_string(self, image: np.ndarray, lang: str = DEFAULT_LANG, config: str = "") -> str:
+        """Распознает текст кадра, собирая слова в строки."""
+        return words_to_text(self.recognize(image, lang, config))
+
+    def shutdown(self):
+        """Останавливает пул распознавания."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
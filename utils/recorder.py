@@ -0,0 +1,193 @@
+"""
+Запись одной реплики с микрофона до конца речи.
+
+Вместо записи фиксированной длительности поток sounddevice.InputStream
+передает блоки в callback, который складывает их в кольцевой буфер и
+сразу определяет речь по энергии и частоте пересечений нуля (пороги те
+же, что в utils/vad.py). Запись заканчивается, когда после речи прошло
+end_silence_ms тишины, когда речь так и не началась за start_timeout
+секунд или когда реплика достигла max_seconds.
+
+Кольцевой буфер хранит предысторию: до начала речи старые блоки
+перезаписываются, а начало фразы (preroll_ms) сохраняется. Запись сразу
+идет с частотой 16 кГц в моно, поэтому результат передается в
+распознавание без временного файла и передискретизации.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.vad import (
+    TARGET_SAMPLE_RATE, ENERGY_RATIO, MIN_ENERGY, MAX_SPEECH_ZCR, STRONG_ENERGY_RATIO, to_mono, resample
+)
+
+logger = logging.getLogger("recorder")
+
+# Сколько подряд блоков с речью нужно, чтобы считать, что речь началась
+SPEECH_START_BLOCKS = 2
+# Скорость подстройки шумового фона в паузах
+NOISE_ADAPT_RATE = 0.05
+# Верхняя граница начальной оценки шума (если запись начинается сразу с речи)
+INITIAL_NOISE = 1e-4
+
+
+class UtteranceRecorder:
+    """
+    Записывает реплику с микрофона, останавливаясь по окончании речи.
+
+    Args:
+        stream_factory: Конструктор потока записи (sounddevice.InputStream)
+        sample_rate: Частота записи
+        block_ms: Длина блока callback в миллисекундах
+        max_seconds: Максимальная длина реплики
+        start_timeout: Сколько секунд ждать начала речи
+        end_silence_ms: Сколько миллисекунд тишины после речи завершают запись
+        preroll_ms: Сколько миллисекунд до начала речи сохранить
+    """
+
+    def __init__(self, stream_factory: Callable, sample_rate: int = TARGET_SAMPLE_RATE, block_ms: int = 30,
+                 max_seconds: float = 15.0, start_timeout: float = 5.0, end_silence_ms: int = 700,
+                 preroll_ms: int = 300):
+        self.stream_factory = stream_factory
+        self.sample_rate = sample_rate
+        self.block_ms = block_ms
+        self.max_seconds = max_seconds
+        self.start_timeout = start_timeout
+        self.end_silence_ms = end_silence_ms
+        self.preroll_ms = preroll_ms
+
+    def record(self) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Записывает одну реплику.
+
+        Returns:
+            Пара (моно-сигнал float32 с частотой 16 кГц, сведения о записи).
+            Если речь не началась, сигнал пустой.
+        """
+        try:
+            return self._record(self.sample_rate)
+        except Exception as e:
+            # Устройство может не поддерживать 16 кГц: пишем с частотой по умолчанию
+            logger.warning(f"Не удалось записать с частотой {self.sample_rate} Гц: {e}")
+            samples, info = self._record(None)
+            return resample(samples, info["device_rate"], self.sample_rate), info
+
+    def _record(self, sample_rate: Optional[int]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        state = _RecordingState(self, sample_rate or 0)
+        kwargs = {"channels": 1, "dtype": "float32", "callback": state.callback}
+        if sample_rate:
+            kwargs["samplerate"] = sample_rate
+            kwargs["blocksize"] = state.block_frames
+
+        started = time.monotonic()
+        stream = self.stream_factory(**kwargs)
+        if not sample_rate:
+            state.configure(int(stream.samplerate))
+        with stream:
+            # Запас по времени на случай, если устройство перестало присылать блоки
+            finished = state.done.wait(self.start_timeout + self.max_seconds + 1.0)
+        if not finished:
+            logger.warning("Поток записи не завершился вовремя")
+
+        samples = state.result()
+        info = {
+            "device_rate": state.rate,
+            "speech": state.speech_started,
+            "reason": state.reason or "timeout",
+            "seconds": round(samples.size / state.rate, 3) if state.rate else 0.0,
+            "elapsed": round(time.monotonic() - started, 3)
+        }
+        logger.info(f"Запись завершена ({info['reason']}): {info['seconds']} с")
+        return samples, info
+
+
+class _RecordingState:
+    """Состояние одной записи: кольцевой буфер и определение конца речи в callback."""
+
+    def __init__(self, recorder: UtteranceRecorder, rate: int):
+        self.recorder = recorder
+        self.done = threading.Event()
+        self.speech_started = False
+        self.reason = None
+        self._lock = threading.Lock()
+        if rate:
+            self.configure(rate)
+
+    def configure(self, rate: int):
+        recorder = self.recorder
+        self.rate = rate
+        self.block_frames = max(1, rate * recorder.block_ms // 1000)
+        self.preroll_frames = rate * recorder.preroll_ms // 1000
+        self.max_frames = int(recorder.max_seconds * rate)
+        self.start_frames = int(recorder.start_timeout * rate)
+        self.end_silence_frames = rate * recorder.end_silence_ms // 1000
+
+        self._buffer = np.zeros(self.preroll_frames + self.max_frames, dtype=np.float32)
+        self._written = 0           # всего записано кадров
+        self._speech_from = None    # номер кадра, с которого начинается результат
+        self._speech_blocks = 0
+        self._silence_frames = 0
+        self._noise = None
+
+    def callback(self, indata, frames, time_info, status):
+        if self.done.is_set():
+            return
+        block = to_mono(indata)
+        with self._lock:
+            self._write(block)
+            self._detect(block)
+
+    def _write(self, block: np.ndarray):
+        # Кольцевая запись: до начала речи старые кадры перезаписываются
+        size = self._buffer.size
+        positions = (self._written + np.arange(block.size)) % size
+        self._buffer[positions] = block
+        self._written += block.size
+
+    def _detect(self, block: np.ndarray):
+        energy = float(np.mean(block * block)) if block.size else 0.0
+        signs = np.signbit(block)
+        zcr = float(np.mean(signs[1:] != signs[:-1])) if block.size > 1 else 0.0
+
+        if self._noise is None:
+            self._noise = min(energy, INITIAL_NOISE)
+        threshold = max(self._noise * ENERGY_RATIO, MIN_ENERGY)
+        voiced = energy > threshold and (zcr < MAX_SPEECH_ZCR or energy > threshold * STRONG_ENERGY_RATIO)
+
+        if not self.speech_started:
+            if voiced:
+                self._speech_blocks += 1
+                if self._speech_blocks >= SPEECH_START_BLOCKS:
+                    self.speech_started = True
+                    start = self._written - self._speech_blocks * block.size - self.preroll_frames
+                    self._speech_from = max(0, start, self._written - self._buffer.size)
+            else:
+                self._speech_blocks = 0
+                # Шумовой фон подстраивается только в паузах; вниз — сразу
+                self._noise = min(energy, self._noise + NOISE_ADAPT_RATE * (energy - self._noise))
+            if not self.speech_started and self._written >= self.start_frames:
+                self._finish("no_speech")
+            return
+
+        self._silence_frames = 0 if voiced else self._silence_frames + block.size
+        if self._silence_frames >= self.end_silence_frames:
+            self._finish("end_of_speech")
+        elif self._written - self._speech_from >= self._buffer.size:
+            self._finish("max_length")
+
+    def _finish(self, reason: str):
+        self.reason = reason
+        self.done.set()
+
+    def result(self) -> np.ndarray:
+        """Записанная реплика от начала речи (с предысторией) до конца записи."""
+        with self._lock:
+            if not self.speech_started:
+                return np.zeros(0, dtype=np.float32)
+            end = min(self._written, self._speech_from + self._buffer.size)
+            positions = np.arange(self._speech_from, end) % self._buffer.size
+            return self._buffer[positions].copy()
@@ -0,0 +1,277 @@
+"""
+Захват экрана в память.
+
+Кадр возвращается как массив NumPy в формате BGR (uint8, как у OpenCV) без
+записи PNG на диск: кодирование и повторное чтение PNG кадра 1080p или 4K
+занимает десятки миллисекунд на каждый клик.
+
+Основной способ захвата — mss (на X11 через XShm, на Windows через GDI):
+он копирует кадр прямо в буфер. Если mss не установлена или захват не
+удался, используется pyautogui.screenshot().
+
+Сохранение кадров для отладки включается отдельно (SCREENSHOT_DEBUG_SAVE):
+сохраняется каждый N-й кадр, запись идет в фоновом потоке, а при
+заполненной очереди кадр просто пропускается.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger("screen_capture")
+
+# Область экрана: (x, y, ширина, высота)
+Region = Tuple[int, int, int, int]
+
+
+class MssBackend:
+    """
+    Захват экрана через mss.
+
+    Объект mss привязан к соединению с X-сервером и не потокобезопасен,
+    поэтому у каждого потока свой экземпляр.
+    """
+
+    name = "mss"
+
+    def __init__(self, factory=None):
+        if factory is None and mss is None:
+            raise RuntimeError("mss не установлена")
+        self._factory = factory or mss.mss
+        self._local = threading.local()
+
+    def _instance(self):
+        instance = getattr(self._local, "instance", None)
+        if instance is None:
+            instance = self._local.instance = self._factory()
+        return instance
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        instance = self._instance()
+        if region:
+            x, y, width, height = region
+            monitor = {"left": x, "top": y, "width": width, "height": height}
+        else:
+            # Основной монитор: его координаты совпадают с координатами pyautogui.click
+            monitors = instance.monitors
+            monitor = monitors[1] if len(monitors) > 1 else monitors[0]
+        shot = np.asarray(instance.grab(monitor))
+        # mss отдает BGRA; отбрасываем альфа-канал одной копией
+        return np.ascontiguousarray(shot[:, :, :3])
+
+
+class PyAutoGUIBackend:
+    """Захват экрана через pyautogui.screenshot() (изображение PIL в RGB)."""
+
+    name = "pyautogui"
+
+    def __init__(self, gui=None):
+        if gui is None:
+            import pyautogui as gui
+        self._gui = gui
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        image = self._gui.screenshot(region=region) if region else self._gui.screenshot()
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+class DebugFrameSaver:
+    """
+    Выборочное асинхронное сохранение кадров для отладки.
+
+    Args:
+        directory: Директория для кадров
+        every: Сохранять каждый N-й кадр
+        max_files: Сколько последних кадров хранить
+        max_pending: Размер очереди записи (лишние кадры пропускаются)
+    """
+
+    def __init__(self, directory: str = "screenshots", every: int = 10, max_files: int = 50,
+                 max_pending: int = 2):
+        self.directory = directory
+        self.every = max(1, every)
+        self.max_files = max_files
+        self.saved = 0
+        self.dropped = 0
+        self._count = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def offer(self, frame: np.ndarray) -> bool:
+        """
+        Предлагает кадр к сохранению.
+
+        Args:
+            frame: Кадр BGR
+
+        Returns:
+            True, если кадр поставлен в очередь записи
+        """
+        with self._lock:
+            self._count += 1
+            if (self._count - 1) % self.every:
+                return False
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="screenshot-saver", daemon=True)
+                self._worker.start()
+        try:
+            # Копия: вызывающий код может изменить кадр до записи
+            self._queue.put_nowait((time.time(), frame.copy()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0):
+        """Ждет, пока очередь записи опустеет."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _work(self):
+        while True:
+            timestamp, frame = self._queue.get()
+            try:
+                self._save(timestamp, frame)
+            except Exception as e:
+                logger.error(f"Ошибка при сохранении кадра для отладки: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _save(self, timestamp: float, frame: np.ndarray):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = os.path.join(self.directory, f"screenshot_{int(timestamp * 1000)}_{self.saved:05d}.png")
+        if cv2 is not None:
+            cv2.imwrite(filename, frame)
+        else:
+            from PIL import Image
+            Image.fromarray(frame[:, :, ::-1]).save(filename)
+        self.saved += 1
+        logger.debug(f"Кадр для отладки сохранен: {filename}")
+        self._prune()
+
+    def _prune(self):
+        files = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith("screenshot_") and name.endswith(".png")
+        )
+        for name in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class ScreenCapture:
+    """
+    Захват экрана в массив NumPy с запасным способом и отладочным сохранением.
+
+    Args:
+        backend: Основной способ захвата (None — без него)
+        fallback: Запасной способ захвата
+        debug_saver: Сохранение кадров для отладки (None — не сохранять)
+    """
+
+    def __init__(self, backend=None, fallback=None, debug_saver: Optional[DebugFrameSaver] = None):
+        self.backend = backend
+        self.fallback = fallback
+        self.debug_saver = debug_saver
+        self.frames = 0
+        self.fallbacks = 0
+        self.last_ms = 0.0
+
+    @property
+    def available(self) -> bool:
+        """True, если есть хотя бы один способ захвата."""
+        return self.backend is not None or self.fallback is not None
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        """
+        Захватывает экран или его область.
+
+        Args:
+            region: Кортеж (x, y, width, height); None — весь основной монитор
+
+        Returns:
+            Кадр BGR формы (высота, ширина, 3), uint8
+
+        Raises:
+            RuntimeError: Если нет ни одного способа захвата
+        """
+        started = time.perf_counter()
+        frame = None
+        if self.backend is not None:
+            try:
+                frame = self.backend.grab(region)
+            except Exception as e:
+                if self.fallback is None:
+                    raise
+                logger.warning(f"Захват через {self.backend.name} не удался, используем {self.fallback.name}: {e}")
+                self.fallbacks += 1
+        if frame is None:
+            if self.fallback is None:
+                raise RuntimeError("Нет доступного способа захвата экрана")
+            frame = self.fallback.grab(region)
+
+        self.frames += 1
+        self.last_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"Кадр {frame.shape[1]}x{frame.shape[0]} захвачен за {self.last_ms:.1f} мс")
+        if self.debug_saver is not None:
+            self.debug_saver.offer(frame)
+        return frame
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает статистику захвата."""
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "fallback": self.fallback.name if self.fallback else None,
+            "frames": self.frames,
+            "fallbacks": self.fallbacks,
+            "last_ms": round(self.last_ms, 1),
+            "debug_saved": self.debug_saver.saved if self.debug_saver else 0
+        }
+
+
+def _create_capture() -> ScreenCapture:
+    from core.config import (
+        SCREEN_CAPTURE_BACKEND, SCREENSHOT_DEBUG_SAVE, SCREENSHOT_DEBUG_EVERY, SCREENSHOT_DEBUG_DIR
+    )
+
+    backend = None
+    if SCREEN_CAPTURE_BACKEND in ("auto", "mss"):
+        try:
+            backend = MssBackend()
+        except Exception as e:
+            logger.info(f"mss недоступна, захват экрана через pyautogui: {e}")
+
+    fallback = None
+    try:
+        fallback = PyAutoGUIBackend()
+    except Exception as e:
+        # pyautogui без графического интерфейса падает при импорте не только с ImportError
+        logger.warning(f"pyautogui недоступна для захвата экрана: {e}")
+
+    saver = DebugFrameSaver(SCREENSHOT_DEBUG_DIR, every=SCREENSHOT_DEBUG_EVERY) if SCREENSHOT_DEBUG_SAVE else None
+    return ScreenCapture(backend, fallback, saver)
+
+
+# Общий захват экрана
+screen_capture = _create_capture()
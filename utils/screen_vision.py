@@ -26,12 +26,55 @@ except ImportError:
     from utils.mock_modules import MockPyAutoGUI
     pyautogui = MockPyAutoGUI()
 
+from utils.screen_capture import screen_capture
+from utils.ocr import frame_hash
+from utils.ocr_result import OCRResult
+from utils.incremental_ocr import create_screen_ocr
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
 # Директория для сохранения скриншотов
 SCREENSHOTS_DIR = "screenshots"
 
+# Распознавание текста с повторным OCR только изменившихся областей
+screen_ocr = create_screen_ocr()
+
+# Последний результат OCR: (хэш кадра, OCRResult)
+_last_result = (None, None)
+
+def read_screen(screenshot: np.ndarray, region: Optional[Tuple[int, int, int, int]] = None) -> OCRResult:
+    """
+    Распознает кадр одним проходом OCR и возвращает таблицу слов с индексом.
+    
+    Полный текст, поиск текста для клика и поиск полей ввода используют
+    один и тот же результат: повторный вызов для того же кадра не запускает
+    OCR и не строит индекс заново.
+    
+    Args:
+        screenshot: Изображение в формате numpy array (BGR).
+        region: Кортеж (x, y, width, height) — распознать только эту область.
+    
+    Returns:
+        OCRResult с координатами слов относительно переданной области.
+    """
+    global _last_result
+    
+    if region:
+        x, y, w, h = region
+        screenshot = screenshot[y:y+h, x:x+w]
+    
+    # Оттенки серого: один вид предобработки для всех запросов к кадру
+    gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY) if screenshot.ndim == 3 else screenshot
+    key = frame_hash(gray)
+    cached_key, cached = _last_result
+    if cached is not None and cached_key == key:
+        return cached
+    
+    result = OCRResult.from_data(screen_ocr.image_to_data(gray, lang='rus+eng'))
+    _last_result = (key, result)
+    return result
+
 def ensure_screenshots_dir():
     """Проверяет и создает директорию для скриншотов, если она не существует."""
     if not os.path.exists(SCREENSHOTS_DIR):
@@ -55,27 +98,9 @@ def capture_screenshot(region: Optional[Tuple[int, int, int, int]] = None) -> Op
         return np.zeros((600, 800, 3), dtype=np.uint8)
     
     try:
-        ensure_screenshots_dir()
-        
-        # Захватываем скриншот
-        if region:
-            screenshot = pyautogui.screenshot(region=region)
-        else:
-            screenshot = pyautogui.screenshot()
-        
-        # Конвертируем в numpy array
-        screenshot_np = np.array(screenshot)
-        
-        # Конвертируем из RGB в BGR (для OpenCV)
-        screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-        
-        # Сохраняем скриншот для отладки
-        timestamp = int(time.time())
-        filename = f"{SCREENSHOTS_DIR}/screenshot_{timestamp}.png"
-        cv2.imwrite(filename, screenshot_cv)
-        logger.info(f"Скриншот сохранен: {filename}")
-        
-        return screenshot_cv
+        # Кадр захватывается прямо в массив BGR, без записи PNG на диск
+        # (сохранение для отладки включается через SCREENSHOT_DEBUG_SAVE)
+        return screen_capture.grab(region)
     except Exception as e:
         logger.error(f"Ошибка при захвате скриншота: {e}")
         return None
@@ -126,23 +151,8 @@ def extract_text_from_screenshot(screenshot: np.ndarray, region: Optional[Tuple[
         return "Пример текста на экране (заглушка OCR)"
     
     try:
-        # Если указана область, вырезаем ее
-        if region:
-            x, y, w, h = region
-            roi = screenshot[y:y+h, x:x+w]
-        else:
-            roi = screenshot
-        
-        # Конвертируем в оттенки серого
-        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        
-        # Применяем пороговую обработку для улучшения распознавания
-        _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-        
-        # Извлекаем текст
-        text = pytesseract.image_to_string(thresh, lang='rus+eng')
-        
-        return text.strip()
+        # Текст собирается из общей таблицы слов кадра (строки сверху вниз)
+        return read_screen(screenshot, region).text().strip()
     except Exception as e:
         logger.error(f"Ошибка при извлечении текста из скриншота: {e}")
         return ""
@@ -164,47 +174,15 @@ def find_element_by_text(screenshot: np.ndarray, text: str, threshold: float = 0
         return (100, 100, 200, 50)  # Заглушка - координаты элемента
     
     try:
-        # Конвертируем в оттенки серого
-        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        
-        # Применяем OCR для поиска всех текстовых блоков
-        data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT, lang='rus+eng')
-        
-        # Ищем совпадения с точным текстом
-        exact_matches = []
-        partial_matches = []
-        
-        for i, word in enumerate(data['text']):
-            confidence = float(data['conf'][i]) / 100
-            if confidence < threshold:
-                continue
-                
-            if text.lower() == word.lower():
-                # Точное совпадение
-                exact_matches.append((i, confidence))
-            elif text.lower() in word.lower():
-                # Частичное совпадение
-                partial_matches.append((i, confidence))
-        
-        # Сначала проверяем точные совпадения
-        if exact_matches:
-            # Берем совпадение с наивысшей уверенностью
-            best_match = max(exact_matches, key=lambda x: x[1])
-            i = best_match[0]
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-            logger.info(f"Найдено точное совпадение для текста '{text}' с уверенностью {best_match[1]:.2f}")
-            return (x, y, w, h)
-        
-        # Если точных совпадений нет, используем частичные
-        if partial_matches:
-            best_match = max(partial_matches, key=lambda x: x[1])
-            i = best_match[0]
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-            logger.info(f"Найдено частичное совпадение для текста '{text}' в '{data['text'][i]}' с уверенностью {best_match[1]:.2f}")
-            return (x, y, w, h)
+        # Ищем по общей таблице слов кадра: точное слово или фраза, затем
+        # начало слова, вхождение и нечеткое совпадение
+        match = read_screen(screenshot).find(text, min_conf=threshold)
+        if match is None:
+            logger.warning(f"Текст '{text}' не найден на экране")
+            return None
         
-        logger.warning(f"Текст '{text}' не найден на экране")
-        return None
+        logger.info(f"Найдено совпадение ({match.kind}) для текста '{text}' в '{match.text}' с уверенностью {match.confidence:.2f}")
+        return match.box
     except Exception as e:
         logger.error(f"Ошибка при поиске элемента по тексту: {e}")
         return None
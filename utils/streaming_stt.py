@@ -0,0 +1,432 @@
+"""
+Потоковое распознавание речи, пока пользователь еще говорит.
+
+Браузер отправляет части записи MediaRecorder (timeslice) по мере их
+появления. Сессия распознает перекрывающиеся окна из последних частей и
+склеивает их тексты по совпадающим словам, поэтому частичный текст готов
+уже во время речи, а после ее окончания остается распознать только
+последнее окно.
+
+Заголовок webm (EBML, Segment, Tracks) есть только в первой части, а части
+MediaRecorder не обязаны начинаться с кластера и даже с целого элемента.
+Поэтому запись разбирается по элементам EBML (WebmStream): окно начинается
+с первого целого элемента внутри кластера, перед ним ставятся заголовок
+записи и начало кластера с его меткой времени, а недописанный элемент в
+конце окна отбрасывается. Для других форматов окно — заголовок первой
+части и сами части.
+
+Распознаватель подключаемый: это любая функция (data, content_type) -> str,
+например functools.partial(transcribe_bytes, client) или локальная замена в тестах.
+"""
+
+import re
+import time
+import uuid
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("streaming_stt")
+
+# Распознаватель: (аудио, MIME-тип) -> текст
+TranscriptionBackend = Callable[..., str]
+
+# Идентификатор элемента Cluster в webm: с него начинаются аудиоданные
+WEBM_CLUSTER_ID = b"\x1f\x43\xb6\x75"
+# Идентификаторы элементов EBML, которые нужны для разбора записи
+EBML_HEADER_ID = b"\x1a\x45\xdf\xa3"
+WEBM_SEGMENT_ID = b"\x18\x53\x80\x67"
+WEBM_TIMECODE_ID = b"\xe7"
+# Размер "неизвестен": кластер продолжается до следующего кластера (как у MediaRecorder)
+EBML_UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def split_webm_header(chunk: bytes) -> Tuple[bytes, bytes]:
+    """
+    Отделяет заголовок webm от аудиоданных первой части записи.
+
+    Args:
+        chunk: Первая часть записи MediaRecorder
+
+    Returns:
+        Пара (заголовок, аудиоданные); для других форматов заголовок пустой
+    """
+    index = chunk.find(WEBM_CLUSTER_ID)
+    if index <= 0:
+        return b"", chunk
+    return chunk[:index], chunk[index:]
+
+
+def _vint_length(first: int) -> int:
+    """Длина числа переменной длины EBML по первому байту (9 — недопустимое число)."""
+    return 9 - first.bit_length() if first else 9
+
+
+def read_element(data: bytes, pos: int) -> Optional[Tuple[bytes, int, Optional[int]]]:
+    """
+    Читает заголовок элемента EBML.
+
+    Args:
+        data: Данные записи
+        pos: Смещение начала элемента
+
+    Returns:
+        (идентификатор, длина заголовка, размер содержимого или None, если размер
+        неизвестен) или None, если заголовок еще не получен целиком
+
+    Raises:
+        ValueError: Если данные не являются элементом EBML
+    """
+    if pos >= len(data):
+        return None
+    id_length = _vint_length(data[pos])
+    size_pos = pos + id_length
+    if id_length > 4:
+        raise ValueError(f"Некорректный идентификатор элемента EBML на смещении {pos}")
+    if size_pos >= len(data):
+        return None
+    size_length = _vint_length(data[size_pos])
+    if size_length > 8:
+        raise ValueError(f"Некорректный размер элемента EBML на смещении {pos}")
+    end = size_pos + size_length
+    if end > len(data):
+        return None
+    mask = (1 << (7 * size_length)) - 1
+    size = int.from_bytes(data[size_pos:end], "big") & mask
+    return bytes(data[pos:size_pos]), end - pos, None if size == mask else size
+
+
+class WebmStream:
+    """
+    Запись webm, разбираемая по элементам по мере поступления частей.
+
+    Запоминает заголовок записи (все до первого кластера), метку времени
+    каждого кластера и границы целых элементов внутри кластеров, чтобы окно
+    можно было собрать с любого места записи.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.header = b""
+        self._pos = 0                   # данные до этого смещения разобраны
+        self._starts: List[int] = []    # смещения элементов внутри кластеров
+        self._ids: List[bytes] = []
+        self._cluster_of: List[int] = []
+        self._timecodes: List[bytes] = []
+
+    @property
+    def parsed(self) -> int:
+        """Смещение, до которого в записи только целые элементы."""
+        return self._pos
+
+    def append(self, chunk: bytes):
+        """
+        Добавляет часть записи и разбирает полученные целиком элементы.
+
+        Raises:
+            ValueError: Если данные не являются записью webm
+        """
+        self.data += chunk
+        while True:
+            element = read_element(self.data, self._pos)
+            if element is None:
+                return
+            element_id, header_length, size = element
+            if element_id == WEBM_SEGMENT_ID:
+                self._pos += header_length
+                continue
+            if element_id == WEBM_CLUSTER_ID:
+                if not self._timecodes:
+                    self.header = bytes(self.data[:self._pos])
+                self._timecodes.append(b"")
+                self._pos += header_length
+                continue
+            if size is None:
+                raise ValueError("Элемент webm неизвестного размера вне кластера")
+            end = self._pos + header_length + size
+            if end > len(self.data):
+                return
+            if self._timecodes:
+                if element_id == WEBM_TIMECODE_ID and not self._timecodes[-1]:
+                    self._timecodes[-1] = bytes(self.data[self._pos:end])
+                self._starts.append(self._pos)
+                self._ids.append(element_id)
+                self._cluster_of.append(len(self._timecodes) - 1)
+            self._pos = end
+
+    def window(self, start: int, end: int) -> bytes:
+        """
+        Собирает окно записи из данных между смещениями start и end.
+
+        Окно начинается с первого целого элемента не раньше start: перед ним
+        ставятся заголовок записи и начало его кластера (с меткой времени),
+        недописанный элемент в конце отбрасывается.
+
+        Args:
+            start: Смещение начала окна в записи
+            end: Смещение конца окна в записи
+
+        Returns:
+            Окно в формате webm или b"", если в нем нет целых элементов
+        """
+        end = min(end, self._pos)
+        index = bisect.bisect_left(self._starts, start)
+        if not self.header or index >= len(self._starts) or self._starts[index] >= end:
+            return b""
+        cluster = WEBM_CLUSTER_ID + EBML_UNKNOWN_SIZE
+        if self._ids[index] != WEBM_TIMECODE_ID:
+            cluster += self._timecodes[self._cluster_of[index]]
+        return self.header + cluster + bytes(self.data[self._starts[index]:end])
+
+
+def _norm(word: str) -> str:
+    return word.lower().replace("ё", "е")
+
+
+def merge_transcripts(committed: str, window_text: str, max_overlap: int = 12) -> str:
+    """
+    Склеивает текст, распознанный ранее, с текстом следующего окна.
+
+    Окна перекрываются, поэтому начало нового текста повторяет конец старого.
+    Ищется самое длинное совпадение конца старого текста с началом нового;
+    крайние слова могут быть обрезаны границей окна, поэтому допускается
+    пропуск одного последнего слова старого текста и одного первого слова нового.
+
+    Args:
+        committed: Текст, распознанный ранее
+        window_text: Текст нового окна
+        max_overlap: Максимальная длина совпадения в словах
+
+    Returns:
+        Объединенный текст
+    """
+    old_words = committed.split()
+    new_words = window_text.split()
+    if not old_words:
+        return window_text.strip()
+    if not new_words:
+        return committed.strip()
+
+    old_norm = [" ".join(WORD_RE.findall(_norm(word))) for word in old_words]
+    new_norm = [" ".join(WORD_RE.findall(_norm(word))) for word in new_words]
+
+    best = None  # (длина совпадения, отброшено старых, пропущено новых)
+    for dropped in (0, 1):
+        for skipped in (0, 1):
+            old_end = len(old_norm) - dropped
+            longest = min(max_overlap, old_end, len(new_norm) - skipped)
+            for length in range(longest, 0, -1):
+                if old_norm[old_end - length:old_end] == new_norm[skipped:skipped + length]:
+                    if best is None or length > best[0]:
+                        best = (length, dropped, skipped)
+                    break
+
+    if best is None:
+        return " ".join(old_words + new_words)
+    length, dropped, skipped = best
+    return " ".join(old_words[:len(old_words) - dropped] + new_words[skipped + length:])
+
+
+class StreamingSession:
+    """
+    Сессия потокового распознавания одной реплики.
+
+    Args:
+        backend: Распознаватель (data, content_type) -> str
+        content_type: MIME-тип записи
+        window_chunks: Сколько новых частей накопить перед распознаванием окна
+        overlap_chunks: Сколько частей предыдущего окна повторить в следующем
+    """
+
+    def __init__(self, backend: TranscriptionBackend, content_type: str = "audio/webm",
+                 window_chunks: int = 4, overlap_chunks: int = 2):
+        self.backend = backend
+        self.content_type = content_type
+        self.window_chunks = window_chunks
+        self.overlap_chunks = overlap_chunks
+
+        self.transcript = ""
+        self.windows = 0
+        self.updated_at = time.monotonic()
+
+        self._header = b""
+        self._chunks: List[bytes] = []
+        self._webm: Optional[WebmStream] = None
+        self._chunk_ends: List[int] = []    # смещения концов частей в записи webm
+        self._done_offset = 0       # до этого смещения записи окна уже собраны
+        self._pending: Dict[int, bytes] = {}
+        self._done_until = 0        # части до этого номера уже распознаны
+        self._finished = False
+        self._lock = threading.Lock()
+        self._arrived = threading.Condition(threading.Lock())
+
+    @property
+    def chunk_count(self) -> int:
+        """Количество частей, полученных по порядку."""
+        return len(self._chunks)
+
+    def add_chunk(self, seq: int, data: bytes) -> str:
+        """
+        Добавляет часть записи и распознает окно, если накопилось достаточно частей.
+
+        Args:
+            seq: Порядковый номер части (с 0); части могут прийти не по порядку
+            data: Содержимое части
+
+        Returns:
+            Частичный текст реплики
+        """
+        with self._arrived:
+            self.updated_at = time.monotonic()
+            self._pending[seq] = data
+            while self.chunk_count in self._pending:
+                chunk = self._pending.pop(self.chunk_count)
+                if not self._chunks:
+                    if chunk.startswith(EBML_HEADER_ID):
+                        self._webm = WebmStream()
+                    self._header, chunk = split_webm_header(chunk)
+                self._chunks.append(chunk)
+                self._append_webm(self._header + chunk if self.chunk_count == 1 else chunk)
+            self._arrived.notify_all()
+
+        # Пока распознается предыдущее окно, часть просто копится до следующего
+        if not self._lock.acquire(blocking=False):
+            return self.transcript
+        try:
+            if not self._finished and self.chunk_count - self._done_until >= self.window_chunks:
+                self._transcribe_window(self.chunk_count)
+            return self.transcript
+        finally:
+            self._lock.release()
+
+    def finish(self, total_chunks: Optional[int] = None, timeout: float = 10.0) -> str:
+        """
+        Завершает реплику: распознает последнее окно и возвращает итоговый текст.
+
+        Args:
+            total_chunks: Сколько частей отправил браузер (ждать опоздавшие)
+            timeout: Сколько ждать опоздавшие части
+
+        Returns:
+            Итоговый текст реплики
+        """
+        if total_chunks is not None:
+            deadline = time.monotonic() + timeout
+            with self._arrived:
+                while self.chunk_count < total_chunks:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning(f"Получено {self.chunk_count} частей из {total_chunks}")
+                        break
+                    self._arrived.wait(remaining)
+
+        with self._lock:
+            if not self._finished and self.chunk_count > self._done_until:
+                self._transcribe_window(self.chunk_count)
+            self._finished = True
+            return self.transcript
+
+    def _append_webm(self, chunk: bytes):
+        if self._webm is None:
+            return
+        try:
+            self._webm.append(chunk)
+            self._chunk_ends.append(len(self._webm.data))
+        except ValueError as e:
+            logger.warning(f"Запись не разобрана как webm, окна собираются из частей: {e}")
+            self._webm = None
+
+    def _window(self, start: int, end: int) -> bytes:
+        if self._webm is None or not self._webm.header:
+            return self._header + b"".join(self._chunks[start:end])
+        # Элемент, не вошедший целиком в предыдущее окно, начинает следующее
+        offset = self._chunk_ends[start - 1] if start else 0
+        offset = min(offset, self._done_offset)
+        self._done_offset = min(self._chunk_ends[end - 1], self._webm.parsed)
+        return self._webm.window(offset, self._chunk_ends[end - 1])
+
+    def _transcribe_window(self, end: int):
+        start = max(0, self._done_until - self.overlap_chunks)
+        with self._arrived:
+            audio = self._window(start, end)
+        started = time.monotonic()
+        text = self.backend(audio, content_type=self.content_type) or ""
+        self.transcript = merge_transcripts(self.transcript, text.strip())
+        self._done_until = end
+        self.windows += 1
+        logger.info(
+            f"Окно {self.windows} (части {start}-{end - 1}) распознано за "
+            f"{time.monotonic() - started:.2f} с: {self.transcript[-60:]}"
+        )
+
+
+class StreamingTranscriber:
+    """
+    Реестр сессий потокового распознавания.
+
+    Args:
+        backend: Распознаватель (data, content_type) -> str
+        window_chunks: Размер шага окна в частях (см. StreamingSession)
+        overlap_chunks: Перекрытие окон в частях
+        session_ttl: Через сколько секунд без новых частей сессия удаляется
+    """
+
+    def __init__(self, backend: TranscriptionBackend, window_chunks: int = 4,
+                 overlap_chunks: int = 2, session_ttl: float = 120.0):
+        self.backend = backend
+        self.window_chunks = window_chunks
+        self.overlap_chunks = overlap_chunks
+        self.session_ttl = session_ttl
+        self._sessions: Dict[str, StreamingSession] = {}
+        self._lock = threading.Lock()
+
+    def session(self, session_id: Optional[str] = None, content_type: str = "audio/webm") -> Tuple[str, StreamingSession]:
+        """
+        Возвращает сессию по идентификатору, создавая ее при первом обращении.
+
+        Args:
+            session_id: Идентификатор сессии (None — создать новую)
+            content_type: MIME-тип записи для новой сессии
+
+        Returns:
+            Пара (идентификатор, сессия)
+        """
+        with self._lock:
+            self._drop_expired()
+            session_id = session_id or uuid.uuid4().hex
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = StreamingSession(self.backend, content_type=content_type,
+                                           window_chunks=self.window_chunks,
+                                           overlap_chunks=self.overlap_chunks)
+                self._sessions[session_id] = session
+            return session_id, session
+
+    def get(self, session_id: str) -> Optional[StreamingSession]:
+        """Возвращает существующую сессию, не создавая новую."""
+        with self._lock:
+            self._drop_expired()
+            return self._sessions.get(session_id)
+
+    def add_chunk(self, session_id: str, seq: int, data: bytes, content_type: str = "audio/webm") -> str:
+        """Добавляет часть записи в сессию и возвращает частичный текст."""
+        _, session = self.session(session_id, content_type=content_type)
+        return session.add_chunk(seq, data)
+
+    def finish(self, session_id: str, total_chunks: Optional[int] = None) -> str:
+        """Завершает сессию и возвращает итоговый текст."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return ""
+        return session.finish(total_chunks)
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        for session_id in [key for key, session in self._sessions.items()
+                           if now - session.updated_at > self.session_ttl]:
+            logger.info(f"Сессия распознавания {session_id} удалена по таймауту")
+            del self._sessions[session_id]
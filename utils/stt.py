@@ -0,0 +1,80 @@
+"""
+Распознавание речи из аудио в памяти.
+
+Аудио от интерфейса приходит как двоичные данные (webm/ogg/wav) и
+передается в Whisper API прямо из памяти, без base64 и временных файлов.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger("stt")
+
+# Расширение файла по MIME-типу: по имени файла Whisper определяет формат
+AUDIO_EXTENSIONS = {
+    "audio/webm": "webm",
+    "video/webm": "webm",
+    "audio/ogg": "ogg",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+    "audio/mpeg": "mp3",
+    "audio/mp4": "mp4",
+    "audio/m4a": "m4a",
+    "audio/x-m4a": "m4a",
+}
+
+# Максимальный размер загружаемого аудио (ограничение Whisper API — 25 МБ)
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
+
+def audio_filename(content_type: Optional[str]) -> str:
+    """
+    Имя файла для загрузки по MIME-типу ("audio/webm;codecs=opus" -> "audio.webm").
+
+    Args:
+        content_type: MIME-тип аудио
+
+    Returns:
+        Имя файла с расширением формата
+    """
+    mime = (content_type or "").split(";")[0].strip().lower()
+    return f"audio.{AUDIO_EXTENSIONS.get(mime, 'webm')}"
+
+
+def transcribe_bytes(client, data: bytes, content_type: str = "audio/webm",
+                     language: Optional[str] = None, model: str = "whisper-1") -> str:
+    """
+    Распознает речь в аудио из памяти через Whisper API.
+
+    Args:
+        client: Клиент OpenAI
+        data: Аудио (содержимое файла webm/ogg/wav/mp3)
+        content_type: MIME-тип аудио
+        language: Язык речи (например, "ru"), None — определить автоматически
+        model: Модель распознавания
+
+    Returns:
+        Распознанный текст
+
+    Raises:
+        ValueError: Если аудио пустое или больше MAX_AUDIO_BYTES
+    """
+    if not data:
+        raise ValueError("Пустое аудио")
+    if len(data) > MAX_AUDIO_BYTES:
+        raise ValueError(f"Аудио слишком большое: {len(data)} байт")
+
+    mime = (content_type or "audio/webm").split(";")[0].strip()
+    params = {
+        "model": model,
+        # Файл передается кортежем (имя, содержимое, тип), без записи на диск
+        "file": (audio_filename(content_type), data, mime),
+        "response_format": "text"
+    }
+    if language:
+        params["language"] = language
+
+    text = client.audio.transcriptions.create(**params)
+    logger.info(f"Распознано {len(data)} байт аудио: {text[:50]}...")
+    return text
@@ -0,0 +1,96 @@
+"""
+Нечеткое сравнение текста с результатом OCR.
+
+Tesseract с языками rus+eng путает похожие кириллические и латинские буквы
+("Вход" распознается как "Bxод"), склеивает и разбивает слова, а надписи
+вроде "Вход/Регистрация" или "Sign in with Google" занимают несколько рамок.
+Поэтому текст сравнивается после свертки: нижний регистр, похожие буквы
+приводятся к одной, пробелы и знаки препинания убираются.
+
+Расстояние Левенштейна до всех кандидатов считается одновременно (NumPy):
+строки динамического программирования обновляются для всех кандидатов
+сразу, а зависимость внутри строки раскрывается через накопленный минимум.
+Расстояние ограничено сверху: значения больше порога не уточняются, и
+расчет останавливается, когда все кандидаты вышли за порог.
+"""
+
+from typing import List
+
+import numpy as np
+
+# Похожие буквы кириллицы и латиницы (после перевода в нижний регистр)
+CONFUSABLES = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h",
+    "о": "o", "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j"
+})
+
+# Допустимая доля ошибок от длины запроса
+MAX_ERROR_RATIO = 0.25
+# Запросы короче этой длины сравниваются без ошибок (после свертки)
+MIN_FUZZY_LENGTH = 4
+
+
+def fold_text(text: str) -> str:
+    """
+    Сворачивает текст для сравнения: нижний регистр, похожие кириллические и
+    латинские буквы совпадают, остаются только буквы и цифры.
+
+    Args:
+        text: Исходный текст
+
+    Returns:
+        Свернутый текст
+    """
+    return "".join(ch for ch in text.lower().translate(CONFUSABLES) if ch.isalnum())
+
+
+def max_distance_for(query: str) -> int:
+    """Допустимое расстояние для свернутого запроса."""
+    if len(query) < MIN_FUZZY_LENGTH:
+        return 0
+    return max(1, int(len(query) * MAX_ERROR_RATIO))
+
+
+def edit_distances(query: str, candidates: List[str], max_distance: int) -> np.ndarray:
+    """
+    Вычисляет ограниченное расстояние Левенштейна от запроса до всех кандидатов.
+
+    Args:
+        query: Запрос
+        candidates: Строки-кандидаты
+        max_distance: Порог: расстояния больше него возвращаются как max_distance + 1
+
+    Returns:
+        Массив расстояний (int32) в порядке кандидатов
+    """
+    cap = max_distance + 1
+    count = len(candidates)
+    if count == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    lengths = np.array([len(candidate) for candidate in candidates], dtype=np.int64)
+    width = int(lengths.max())
+    if not query:
+        return np.minimum(lengths, cap).astype(np.int32)
+
+    # Коды символов кандидатов, дополненные -1 (дополнение не влияет на столбцы до длины строки)
+    codes = np.full((count, max(width, 1)), -1, dtype=np.int32)
+    for index, candidate in enumerate(candidates):
+        if candidate:
+            codes[index, :len(candidate)] = np.frombuffer(candidate.encode("utf-32-le"), dtype=np.int32)
+    codes = codes[:, :width]
+
+    columns = np.arange(width + 1, dtype=np.int32)
+    row = np.broadcast_to(np.minimum(columns, cap), (count, width + 1)).copy()
+    for i, char in enumerate(query, start=1):
+        cost = (codes != ord(char)).astype(np.int32)
+        # Замена (по диагонали) и удаление (сверху); вставка (слева) — через накопленный минимум
+        step = np.empty_like(row)
+        step[:, 0] = i
+        np.minimum(row[:, :-1] + cost, row[:, 1:] + 1, out=step[:, 1:])
+        row = np.minimum.accumulate(step - columns, axis=1) + columns
+        np.minimum(row, cap, out=row)
+        if row.min() >= cap:
+            return np.full(count, cap, dtype=np.int32)
+
+    return row[np.arange(count), lengths].astype(np.int32)
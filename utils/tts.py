@@ -4,11 +4,15 @@
 """
 
 import os
+import io
+import re
 import time
 import asyncio
 import threading
 import logging
-from pathlib import Path
+import concurrent.futures
+import queue
+from typing import Callable, Iterable, List, Optional, Tuple, Union
 
 # Проверяем, есть ли доступ к графическому интерфейсу
 try:
@@ -30,7 +34,18 @@ import edge_tts
 # Импортируем централизованный менеджер событий
 from utils.event_manager import event_manager
 # Импортируем настройки TTS из config.py
-from core.config import TTS_DEFAULT_VOICE
+from core.config import (
+    TTS_DEFAULT_VOICE, TTS_PIPELINE, TTS_PIPELINE_LOOKAHEAD,
+    TTS_CACHE_ENABLED, TTS_CACHE_MAX_MB, TTS_CACHE_MAX_TEXT_LEN,
+    LISTEN_MAX_SECONDS, LISTEN_START_TIMEOUT, LISTEN_END_SILENCE_MS
+)
+from utils.tts_cache import AudioCache
+from utils.audio_output import AudioOutput
+from utils.async_loop import BackgroundLoop, background_loop
+from core.scheduler import request_cancelled
+from utils.stt import transcribe_bytes
+from utils.vad import prepare_samples, encode_wav, encode_opus
+from utils.recorder import UtteranceRecorder
 
 # Настройка логирования
 logging.basicConfig(
@@ -46,16 +61,38 @@ logger = logging.getLogger("tts")
 # Создаем директорию для аудио, если она не существует
 os.makedirs("audio", exist_ok=True)
 
+# Сервис вывода звука: микшер открывается один раз на все время работы
+audio_output = AudioOutput(pygame_mixer)
+
+# Ожидание конца клипа: минимальный шаг перепроверки и шаг на паузе (в секундах)
+MIN_RECHECK_INTERVAL = 0.01
+PAUSED_RECHECK_INTERVAL = 0.25
+
+# Кэш синтезированных фраз (повторяющиеся ответы не синтезируются заново)
+audio_cache = AudioCache("audio/cache", max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024) if TTS_CACHE_ENABLED else None
+
 def stop_audio():
     """Останавливает озвучку при вызове."""
     event_manager.request_stop_audio()  # Устанавливаем флаг остановки
     try:
-        pygame_mixer.quit()  # Полностью сбрасываем аудиосистему
+        audio_output.stop()  # Останавливаем канал, не закрывая аудиоустройство
         logger.info("🔇 Озвучка остановлена (через вызов stop_audio).")
     except Exception as e:
         logger.error(f"Ошибка при остановке аудио: {e}")
     return "Аудиозапись остановлена"
 
+def pause_audio():
+    """Ставит озвучку на паузу."""
+    audio_output.pause()
+    logger.info("⏸️ Озвучка на паузе.")
+    return "Аудиозапись на паузе"
+
+def resume_audio():
+    """Продолжает озвучку после паузы."""
+    audio_output.resume()
+    logger.info("▶️ Озвучка продолжена.")
+    return "Аудиозапись продолжена"
+
 def listen_capslock():
     """Отслеживает нажатие CapsLock и останавливает озвучку."""
     while True:
@@ -71,16 +108,21 @@ def listen_capslock():
 # capslock_thread = threading.Thread(target=listen_capslock, daemon=True)
 # capslock_thread.start()
 
-async def generate_audio(text: str, output_file: str = "audio/message.mp3", voice: str = TTS_DEFAULT_VOICE):
+async def generate_audio(text: str, output_file: Optional[str] = None, voice: str = TTS_DEFAULT_VOICE,
+                         pipelined: bool = None):
     """
     Генерирует аудио и воспроизводит его.
     
     Использует edge_tts для генерации аудио, а затем воспроизводит его через pygame.
+    Аудио собирается в памяти из потока edge_tts и передается микшеру напрямую,
+    без промежуточных файлов. Текст из нескольких предложений по умолчанию
+    озвучивается конвейером (см. speak_pipelined).
     
     Args:
         text: Текст для преобразования в речь
-        output_file: Путь к выходному аудиофайлу
+        output_file: Опционально. Путь, куда дополнительно сохранить аудио
         voice: Голос для синтеза речи
+        pipelined: Озвучивать ли по предложениям (None — по настройке TTS_PIPELINE)
         
     Returns:
         None
@@ -88,64 +130,427 @@ async def generate_audio(text: str, output_file: str = "audio/message.mp3", voic
     if not text or not text.strip():
         logger.warning("Попытка озвучить пустой текст")
         return
+    
+    if pipelined is None:
+        pipelined = TTS_PIPELINE and output_file is None and len(split_sentences(text)) > 1
+    if pipelined:
+        await speak_pipelined(text, voice=voice)
+        return
         
     event_manager.reset_stop_audio()
-    
-    # Создаем директорию для аудио, если она не существует
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
 
     try:
-        # Инициализация pygame
-        try:
-            pygame_mixer.quit()
-            pygame_mixer.init()
-        except Exception as e:
-            logger.error(f"Ошибка инициализации pygame: {e}")
-            # Пробуем еще раз с задержкой
-            time.sleep(0.5)
-            pygame_mixer.init()
-
-        # Генерация аудио
+        # Генерация аудио (или готовая фраза из кэша)
         try:
             logger.info(f"Генерация аудио для текста: {text[:50]}...")
-            tts = edge_tts.Communicate(text, voice)
-            await tts.save(output_file)
-            logger.info(f"Аудио сохранено в {output_file}")
+            audio = await get_speech_audio(text, voice)
+            if output_file:
+                save_audio(audio, output_file)
+                logger.info(f"Аудио сохранено в {output_file}")
         except Exception as e:
             logger.error(f"Ошибка генерации аудио: {e}")
             return
 
-        # Воспроизведение аудио
+        # Воспроизведение аудио прямо из памяти через постоянный канал
         try:
-            pygame_mixer.music.load(output_file)
-            pygame_mixer.music.play()
+            audio_output.play(audio_output.load(audio), interrupt=True)
             logger.info("Воспроизведение аудио начато")
         except Exception as e:
             logger.error(f"Ошибка воспроизведения аудио: {e}")
             return
 
         # Ожидание окончания воспроизведения
-        while pygame_mixer.music.get_busy():
-            if event_manager.should_stop_audio():
-                pygame_mixer.music.stop()
-                pygame_mixer.quit()
-                logger.info("🔇 Озвучка была остановлена.")
-                return
-            time.sleep(0.1)
-            
-        logger.info("Воспроизведение аудио завершено")
+        if await wait_for_playback():
+            logger.info("Воспроизведение аудио завершено")
+        else:
+            logger.info("🔇 Озвучка была остановлена.")
 
     except Exception as e:
         logger.error(f"Неожиданная ошибка воспроизведения: {e}")
-    finally:
-        # Очистка ресурсов
+
+async def wait_for_playback(max_pending: int = None) -> bool:
+    """
+    Ждет, пока сервис вывода доиграет клипы (или очередь станет короче max_pending).
+    
+    Вместо опроса канала ожидание длится до расчетного конца клипа и
+    прерывается сразу, как только приходит запрос остановки.
+    
+    Args:
+        max_pending: Если указано, ждать только пока в очереди не станет меньше клипов
+        
+    Returns:
+        False, если во время ожидания была запрошена остановка
+    """
+    while True:
+        if event_manager.should_stop_audio():
+            audio_output.stop()
+            return False
+        audio_output.pump()
+        if max_pending is None:
+            if not audio_output.is_busy():
+                return True
+            delay = audio_output.seconds_until_idle()
+        else:
+            if audio_output.pending_count() < max_pending:
+                return True
+            delay = audio_output.seconds_until_slot()
+        # На паузе конец клипа неизвестен — проверяем состояние реже
+        timeout = PAUSED_RECHECK_INTERVAL if delay is None else max(delay, MIN_RECHECK_INTERVAL)
+        if await event_manager.wait_stop_audio(timeout):
+            audio_output.stop()
+            return False
+
+class TTSWorker:
+    """
+    Единственный исполнитель озвучки на общем фоновом цикле событий.
+    
+    Все ответы озвучиваются на одном цикле, без отдельного потока и
+    asyncio.run на каждую реплику. Новая реплика прерывает предыдущую.
+    
+    Args:
+        loop: Фоновый цикл событий (по умолчанию общий background_loop)
+    """
+    
+    def __init__(self, loop: BackgroundLoop = None):
+        self._loop = loop or background_loop
+        self._current = None
+        self._lock = threading.Lock()
+    
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        Запускает корутину озвучки, прерывая текущую.
+        
+        Args:
+            coro: Корутина (generate_audio или speak_pipelined)
+            
+        Returns:
+            concurrent.futures.Future с результатом корутины
+        """
+        if request_cancelled():
+            # Ответ вытесненного запроса не должен прерывать озвучку нового
+            coro.close()
+            future = concurrent.futures.Future()
+            future.set_result(None)
+            return future
+        with self._lock:
+            if self._current is not None and not self._current.done():
+                self._current.cancel()
+            self._current = self._loop.submit(coro)
+            return self._current
+    
+    def speak(self, text: str, voice: str = TTS_DEFAULT_VOICE) -> concurrent.futures.Future:
+        """Озвучивает текст целиком (см. generate_audio)."""
+        return self.submit(generate_audio(text, voice=voice))
+    
+    def speak_stream(self, sentences: Iterable[str], voice: str = TTS_DEFAULT_VOICE) -> concurrent.futures.Future:
+        """Озвучивает предложения по мере их поступления (см. speak_pipelined)."""
+        return self.submit(speak_pipelined(sentences, voice=voice))
+
+# Общий исполнитель озвучки для всех ответов
+tts_worker = TTSWorker()
+
+class SpeechStream:
+    """
+    Озвучивает текст, который приходит частями (поток ответа модели).
+    
+    Завершенные предложения сразу передаются в конвейер озвучки,
+    незаконченный хвост ждет следующих частей или close().
+    
+    Args:
+        voice: Голос для синтеза речи
+        accept: Фильтр предложений (False — предложение не озвучивается)
+        worker: Исполнитель озвучки (по умолчанию общий tts_worker)
+    """
+    
+    def __init__(self, voice: str = TTS_DEFAULT_VOICE, accept: Callable[[str], bool] = None,
+                 worker: TTSWorker = None):
+        self.voice = voice
+        self.job = None
+        self._accept = accept
+        self._worker = worker or tts_worker
+        self._buffer = ""
+        self._text = ""
+        self._sentences = None
+        self._closed = False
+    
+    @property
+    def started(self) -> bool:
+        """True, если озвучка уже началась."""
+        return self.job is not None
+    
+    def feed(self, delta: str) -> List[str]:
+        """
+        Добавляет часть текста и озвучивает завершенные предложения.
+        
+        Args:
+            delta: Очередная часть текста
+            
+        Returns:
+            Список предложений, переданных в озвучку
+        """
+        self._text += delta
+        ready, self._buffer = pop_sentences(self._buffer + delta)
+        return [sentence for sentence in ready if self._put(sentence)]
+    
+    def rewrite(self, text: str) -> List[str]:
+        """
+        Заменяет весь полученный текст (источник переписал уже выданную часть).
+        
+        Предложения, уже переданные в озвучку, не повторяются: незаконченный
+        хвост заменяется продолжением из нового текста.
+        
+        Args:
+            text: Полный текст на данный момент
+            
+        Returns:
+            Список предложений, переданных в озвучку
+        """
+        done = len(self._text) - len(self._buffer)
+        if not text.startswith(self._text[:done]):
+            logger.warning("Переписан уже озвученный текст, продолжаем озвучку с той же позиции")
+        self._text = text[:done]
+        self._buffer = ""
+        return self.feed(text[done:])
+    
+    def discard_pending(self):
+        """Отбрасывает незаконченный хвост, не озвучивая его."""
+        self._buffer = ""
+    
+    def close(self, speak_tail: bool = True):
+        """
+        Завершает поток: озвучивает хвост и сообщает конвейеру, что текста больше не будет.
+        
+        Args:
+            speak_tail: Озвучить ли хвост без завершающего знака препинания
+        """
+        if self._closed:
+            return
+        if speak_tail and self._buffer.strip():
+            self._put(self._buffer.strip())
+        self._buffer = ""
+        self._closed = True
+        if self._sentences is not None:
+            self._sentences.put(None)
+    
+    def _put(self, sentence: str) -> bool:
+        if self._closed or (self._accept is not None and not self._accept(sentence)):
+            return False
+        if self._sentences is None:
+            # Конвейер читает предложения из очереди, пока не придет None
+            self._sentences = queue.Queue()
+            self.job = self._worker.speak_stream(iter(self._sentences.get, None), voice=self.voice)
+        self._sentences.put(sentence)
+        return True
+
+# Конец предложения: знак препинания, за которым уже идет пробел, или перевод строки
+SENTENCE_END_RE = re.compile(r"[.!?…]+(?=\s)|\n")
+
+def pop_sentences(buffer: str) -> Tuple[List[str], str]:
+    """
+    Выделяет из накопленного текста завершенные предложения.
+    
+    Args:
+        buffer: Текст, полученный из потока на данный момент
+        
+    Returns:
+        Кортеж (список готовых предложений, незавершенный остаток)
+    """
+    sentences = []
+    pos = 0
+    for match in SENTENCE_END_RE.finditer(buffer):
+        sentence = buffer[pos:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        pos = match.end()
+    return sentences, buffer[pos:]
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Разбивает готовый текст на предложения для конвейерной озвучки.
+    
+    Args:
+        text: Текст для разбиения
+        
+    Returns:
+        Список предложений
+    """
+    sentences, rest = pop_sentences(text)
+    if rest.strip():
+        sentences.append(rest.strip())
+    return sentences
+
+# Метрики последней конвейерной озвучки (время до первого звука и т.д.)
+last_tts_metrics = {}
+
+async def synthesize_bytes(text: str, voice: str = TTS_DEFAULT_VOICE) -> bytes:
+    """
+    Синтезирует речь через edge_tts, собирая поток аудио в памяти.
+    
+    Args:
+        text: Текст для преобразования в речь
+        voice: Голос для синтеза речи
+        
+    Returns:
+        MP3-данные
+    """
+    buffer = io.BytesIO()
+    tts = edge_tts.Communicate(text, voice)
+    async for chunk in tts.stream():
+        if chunk["type"] == "audio":
+            buffer.write(chunk["data"])
+    return buffer.getvalue()
+
+def save_audio(audio: Union[str, io.BytesIO], output_file: str):
+    """
+    Сохраняет аудио (путь из кэша или буфер в памяти) в файл.
+    
+    Args:
+        audio: Результат get_speech_audio()
+        output_file: Путь к выходному аудиофайлу
+    """
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if isinstance(audio, str):
+        with open(audio, "rb") as src, open(output_file, "wb") as dst:
+            dst.write(src.read())
+    else:
+        with open(output_file, "wb") as dst:
+            dst.write(audio.getvalue())
+
+async def get_speech_audio(text: str, voice: str = TTS_DEFAULT_VOICE) -> Union[str, io.BytesIO]:
+    """
+    Возвращает аудио для текста: путь к файлу из кэша или буфер в памяти после синтеза.
+    
+    Короткие фразы после синтеза сохраняются в кэш, поэтому повторная
+    озвучка той же фразы тем же голосом не обращается к сети.
+    Результат можно передать напрямую в pygame (Sound или music.load).
+    
+    Args:
+        text: Текст для преобразования в речь
+        voice: Голос для синтеза речи
+        
+    Returns:
+        Путь к файлу кэша или io.BytesIO с MP3-данными
+    """
+    cacheable = audio_cache is not None and len(text) <= TTS_CACHE_MAX_TEXT_LEN
+    if cacheable:
+        key = AudioCache.make_key(text, voice, engine="edge-tts")
+        cached = audio_cache.get(key)
+        if cached:
+            logger.info(f"Фраза взята из кэша озвучки: {text[:50]}")
+            return cached
+    
+    data = await synthesize_bytes(text, voice)
+    if not data:
+        raise RuntimeError("edge_tts не вернул аудиоданные")
+    
+    if cacheable:
         try:
-            if pygame_mixer.get_init():
-                pygame_mixer.quit()
-        except:
-            pass
+            audio_cache.put_bytes(key, data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить фразу в кэш озвучки: {e}")
+    return io.BytesIO(data)
+
+async def speak_pipelined(text: Union[str, Iterable[str]], voice: str = TTS_DEFAULT_VOICE,
+                          lookahead: int = TTS_PIPELINE_LOOKAHEAD) -> dict:
+    """
+    Конвейерная озвучка: предложение N играет, пока синтезируются следующие.
+    
+    Предложения синтезируются параллельно, но не более lookahead штук наперед,
+    и ставятся в очередь канала pygame, поэтому между ними нет пауз.
+    Между фрагментами проверяется event_manager.should_stop_audio().
+    
+    Args:
+        text: Текст целиком или итератор предложений (может блокироваться,
+              например, читать из очереди потокового ответа)
+        voice: Голос для синтеза речи
+        lookahead: Сколько предложений может синтезироваться наперед
+        
+    Returns:
+        Словарь с метриками: time_to_first_audio, total_time, chunks, stopped
+    """
+    global last_tts_metrics
+    started = time.monotonic()
+    metrics = {"time_to_first_audio": None, "total_time": None, "chunks": 0, "stopped": False}
+    event_manager.reset_stop_audio()
+    
+    sentences = iter(split_sentences(text)) if isinstance(text, str) else iter(text)
+    slots = asyncio.Semaphore(max(1, lookahead))
+    pending = asyncio.Queue()
+    
+    async def synthesize_chunk(index: int, sentence: str):
+        try:
+            # Sound декодирует аудио из памяти, временные файлы не создаются
+            return audio_output.load(await get_speech_audio(sentence, voice))
+        except Exception as e:
+            logger.error(f"Ошибка генерации фрагмента {index}: {e}")
+            return None
+    
+    async def produce():
+        index = 0
+        try:
+            while not event_manager.should_stop_audio():
+                # Итератор может блокироваться (поток ответа), поэтому читаем его в потоке
+                sentence = await asyncio.to_thread(next, sentences, None)
+                if sentence is None:
+                    break
+                if not sentence.strip():
+                    continue
+                await slots.acquire()
+                await pending.put(asyncio.create_task(synthesize_chunk(index, sentence)))
+                index += 1
+        finally:
+            await pending.put(None)
+    
+    if not audio_output.ensure_init():
+        return metrics
+    # Новая реплика прерывает предыдущую
+    audio_output.stop()
+    
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            task = await pending.get()
+            if task is None:
+                break
+            sound = await task
+            slots.release()
+            if event_manager.should_stop_audio():
+                metrics["stopped"] = True
+                break
+            if sound is None:
+                continue
+            
+            # Ждем, пока в очереди канала освободится место, и ставим фрагмент без паузы
+            if not await wait_for_playback(max_pending=1):
+                metrics["stopped"] = True
+                break
+            audio_output.play(sound)
+            
+            metrics["chunks"] += 1
+            if metrics["time_to_first_audio"] is None:
+                metrics["time_to_first_audio"] = time.monotonic() - started
+                logger.info(f"Время до первого звука: {metrics['time_to_first_audio']:.2f} с")
+        
+        if metrics["chunks"] and not metrics["stopped"]:
+            metrics["stopped"] = not await wait_for_playback()
+    except Exception as e:
+        logger.error(f"Ошибка конвейерного воспроизведения: {e}")
+    finally:
+        producer.cancel()
+        # Отменяем синтез фрагментов, которые уже не будут проиграны
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
+    
+    if metrics["stopped"]:
+        logger.info("🔇 Озвучка была остановлена.")
+    metrics["total_time"] = time.monotonic() - started
+    last_tts_metrics = metrics
+    logger.info(f"Конвейерная озвучка завершена: {metrics}")
+    return metrics
 
 def listen(awake=False) -> dict:
     """
@@ -159,7 +564,6 @@ def listen(awake=False) -> dict:
     """
     try:
         import os
-        import tempfile
         from openai import OpenAI
         
         # Получаем API ключ из переменных окружения
@@ -175,60 +579,44 @@ def listen(awake=False) -> dict:
         # Пытаемся импортировать модули для записи аудио
         try:
             import sounddevice as sd
-            import soundfile as sf
         except (ImportError, OSError) as e:
             logger.warning(f"Не удалось импортировать модули для записи аудио: {e}")
             logger.info("Используем заглушки для записи аудио")
-            from utils.mock_modules import mock_sounddevice as sd, mock_soundfile as sf
+            from utils.mock_modules import mock_sounddevice as sd
         
-        import numpy as np
+        # Запись идет до конца речи (но не дольше LISTEN_MAX_SECONDS) сразу в 16 кГц моно
+        recorder = UtteranceRecorder(
+            sd.InputStream,
+            max_seconds=LISTEN_MAX_SECONDS,
+            start_timeout=LISTEN_START_TIMEOUT,
+            end_silence_ms=LISTEN_END_SILENCE_MS
+        )
+        logger.info(f"Слушаю... (до {LISTEN_MAX_SECONDS} секунд)")
+        recording, info = recorder.record()
+        sample_rate = recorder.sample_rate
+        if not info["speech"]:
+            logger.info("Речь не обнаружена")
+            return {"message": "", "error": False}
         
-        # Параметры записи
-        sample_rate = 44100  # Частота дискретизации
-        duration = 5  # Длительность записи в секундах
-        
-        logger.info("Слушаю... (запись 5 секунд)")
+        # Тишина по краям обрезается, запись сводится в моно 16 кГц (общий этап VAD)
+        samples, report = prepare_samples(recording, sample_rate)
+        if not report["speech"]:
+            logger.info("Речь в записи не найдена")
+            return {"message": "", "error": False}
+        data = encode_opus(samples) or encode_wav(samples)
+        logger.info(
+            f"VAD: {report['input_seconds']} с -> {report['speech_seconds']} с речи, "
+            f"{recording.nbytes} -> {len(data)} байт"
+        )
         
         try:
-            # Записываем аудио
-            recording = sd.rec(int(duration * sample_rate), samplerate=sample_rate, channels=1)
-            sd.wait()  # Ждем окончания записи
-        except Exception as e:
-            logger.error(f"Ошибка при записи аудио: {e}")
-            # В случае ошибки создаем пустой массив для тестирования
-            recording = np.zeros((int(duration * sample_rate), 1), dtype='float32')
-            logger.info("Создан пустой аудиофайл для тестирования")
-        
-        # Создаем временный файл для сохранения аудио
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            tmp_path = tmp.name
+            # Отправляем на распознавание из памяти, без временного файла
+            response = transcribe_bytes(
+                client, data,
+                content_type="audio/ogg" if data[:4] == b"OggS" else "audio/wav",
+                language="ru"  # Указываем русский язык
+            )
             
-        try:
-            # Сохраняем аудио во временный файл
-            sf.write(tmp_path, recording, sample_rate)
-            logger.info(f"Аудио сохранено во временный файл: {tmp_path}")
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении аудио: {e}")
-            # В случае ошибки создаем пустой файл
-            with open(tmp_path, 'wb') as f:
-                f.write(b'\x00' * 44)  # Минимальный заголовок WAV
-            logger.info("Создан пустой WAV файл для тестирования")
-        
-        # Для тестирования в среде без аудиоустройства
-        if os.path.getsize(tmp_path) < 1000:  # Если файл слишком маленький
-            logger.warning("Файл слишком маленький, возвращаем тестовый текст")
-            return {"message": "тестовый текст для проверки распознавания", "error": False}
-        
-        try:
-            # Отправляем на распознавание
-            with open(tmp_path, "rb") as audio_file:
-                response = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text",
-                    language="ru"  # Указываем русский язык
-                )
-                
             text = response.lower()  # Преобразуем в нижний регистр для совместимости
             logger.info(f"Распознано: {text}")
             return {"message": text, "error": False}
@@ -237,13 +625,6 @@ def listen(awake=False) -> dict:
             message = f"Ошибка при распознавании речи через Whisper API: {e}"
             logger.error(message)
             return {"message": message, "error": True}
-        finally:
-            # Удаляем временный файл
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except Exception as e:
-                logger.error(f"Ошибка при удалении временного файла: {e}")
             
     except Exception as e:
         message = f"Ошибка при распознавании речи: {e}"
@@ -0,0 +1,170 @@
+"""
+Дисковый кэш синтезированной речи.
+
+Ключ — хэш от (текст, голос, движок), поэтому повторяющиеся фразы
+("Открываю …", "Перехожу назад." и т.п.) проигрываются сразу, без сетевого
+вызова edge_tts. Размер кэша ограничен, при превышении удаляются давно
+не использованные файлы (LRU). Порядок использования хранится во времени
+модификации файлов и переживает перезапуск приложения.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger("tts_cache")
+
+
+class AudioCache:
+    """
+    Кэш аудиофайлов с вытеснением давно не использованных записей.
+
+    Args:
+        cache_dir: Директория для файлов кэша
+        max_bytes: Максимальный суммарный размер кэша в байтах
+        extension: Расширение файлов кэша
+    """
+
+    def __init__(self, cache_dir: str = "audio/cache", max_bytes: int = 50 * 1024 * 1024,
+                 extension: str = ".mp3"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, voice: str, engine: str = "edge-tts") -> str:
+        """
+        Вычисляет ключ кэша для фразы.
+
+        Args:
+            text: Озвучиваемый текст
+            voice: Голос синтеза
+            engine: Движок синтеза речи
+
+        Returns:
+            Шестнадцатеричный хэш SHA-256
+        """
+        payload = "\x00".join((engine, voice, text.strip()))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def _load_index(self):
+        """Восстанавливает индекс из файлов на диске (старые файлы — первыми на вытеснение)."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.extension):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+
+        if files:
+            logger.info(f"Загружен кэш озвучки: {len(self._entries)} файлов, {self._size} байт")
+        self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает путь к закэшированному аудио или None.
+
+        Args:
+            key: Ключ, полученный из make_key()
+
+        Returns:
+            Путь к файлу или None при промахе
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            path = self._path(key)
+            if not os.path.exists(path):
+                # Файл удалили снаружи — забываем запись
+                self._size -= self._entries.pop(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> Optional[str]:
+        """
+        Добавляет в кэш аудио, синтезированное в памяти.
+
+        Args:
+            key: Ключ, полученный из make_key()
+            data: Аудиоданные
+
+        Returns:
+            Путь к файлу в кэше или None, если данные не поместились
+        """
+        size = len(data)
+        if size == 0 or size > self.max_bytes:
+            return None
+
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._register(key, size)
+        return path
+
+    def _register(self, key: str, size: int):
+        """Учитывает новый файл в индексе и вытесняет лишнее."""
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи, пока кэш не уложится в бюджет."""
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+            logger.debug(f"Из кэша озвучки вытеснен файл {key}")
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику попаданий и промахов кэша."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._size
+            }
@@ -0,0 +1,324 @@
+"""
+Определение речи (VAD) и подготовка аудио к распознаванию.
+
+Запись из браузера заканчивается примерно двумя секундами тишины (таймер
+детектора тишины в интерфейсе), а в начале часто есть шум. Перед отправкой
+в Whisper аудио сводится в моно, передискретизируется в 16 кГц и обрезается
+по границам речи. Речь определяется по кадрам: энергия кадра выше
+адаптивного порога и небольшая частота пересечений нуля (шипение и щелчки
+пересекают ноль намного чаще голоса). Задержка отпускания (hangover)
+сохраняет короткие паузы внутри фразы и затухающие окончания слов.
+
+Все вычисления векторизованы в NumPy. Форматы кроме WAV (webm/ogg)
+декодируются через ffmpeg, если он установлен; иначе аудио отправляется
+как есть.
+"""
+
+import io
+import wave
+import shutil
+import logging
+import subprocess
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("vad")
+
+# Частота дискретизации, которую ожидает Whisper
+TARGET_SAMPLE_RATE = 16000
+# Длина кадра анализа
+FRAME_MS = 20
+# Порог энергии: во сколько раз кадр речи громче шумового фона (10-й перцентиль)
+ENERGY_RATIO = 4.0
+# Минимальный порог энергии (для записей без шума, float в диапазоне [-1, 1])
+MIN_ENERGY = 1e-5
+# Кадры с большей частотой пересечений нуля считаются шумом, если они не намного громче порога
+MAX_SPEECH_ZCR = 0.35
+STRONG_ENERGY_RATIO = 10.0
+# Задержка отпускания и запас перед началом речи (мс)
+HANGOVER_MS = 300
+PREROLL_MS = 100
+
+FFMPEG = shutil.which("ffmpeg")
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """
+    Сводит многоканальный сигнал в моно.
+
+    Args:
+        samples: Массив (кадры,) или (кадры, каналы)
+
+    Returns:
+        Одномерный массив float32
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    return samples.reshape(-1)
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    Передискретизирует моно-сигнал линейной интерполяцией.
+
+    При понижении частоты сигнал сначала сглаживается скользящим средним,
+    чтобы высокие частоты не наложились на речевой диапазон.
+
+    Args:
+        samples: Моно-сигнал
+        rate: Исходная частота дискретизации
+        target_rate: Требуемая частота дискретизации
+
+    Returns:
+        Сигнал с частотой target_rate
+    """
+    if rate == target_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    ratio = rate / target_rate
+    if ratio > 1:
+        width = int(np.ceil(ratio))
+        samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    length = int(round(samples.size / ratio))
+    positions = np.arange(length, dtype=np.float64) * ratio
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def frame_features(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Энергия и частота пересечений нуля для каждого кадра.
+
+    Args:
+        samples: Моно-сигнал
+        rate: Частота дискретизации
+        frame_ms: Длина кадра в миллисекундах
+
+    Returns:
+        Пара массивов (энергия, доля пересечений нуля) длиной в число кадров
+    """
+    frame_len = max(1, rate * frame_ms // 1000)
+    count = samples.size // frame_len
+    if count == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    frames = samples[:count * frame_len].reshape(count, frame_len)
+    energy = np.mean(frames * frames, axis=1)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy, zcr
+
+
+def speech_mask(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS,
+                hangover_ms: int = HANGOVER_MS, preroll_ms: int = PREROLL_MS) -> np.ndarray:
+    """
+    Определяет кадры с речью.
+
+    Args:
+        samples: Моно-сигнал
+        rate: Частота дискретизации
+        frame_ms: Длина кадра в миллисекундах
+        hangover_ms: Сколько миллисекунд после речи еще считать речью
+        preroll_ms: Сколько миллисекунд перед речью считать речью
+
+    Returns:
+        Булев массив по кадрам
+    """
+    energy, zcr = frame_features(samples, rate, frame_ms)
+    if energy.size == 0:
+        return np.zeros(0, dtype=bool)
+
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(noise_floor * ENERGY_RATIO, MIN_ENERGY)
+    voiced = (energy > threshold) & ((zcr < MAX_SPEECH_ZCR) | (energy > threshold * STRONG_ENERGY_RATIO))
+
+    # Расширяем найденную речь вперед (hangover) и назад (preroll) сверткой
+    after = hangover_ms // frame_ms
+    before = preroll_ms // frame_ms
+    kernel = np.ones(after + before + 1)
+    spread = np.convolve(voiced.astype(np.float32), kernel, mode="full")
+    # Кадр i считается речью, если речь есть в кадрах [i - after, i + before]
+    return spread[before:before + voiced.size] > 0
+
+
+def trim_silence(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> Tuple[np.ndarray, bool]:
+    """
+    Обрезает тишину и шум до начала и после конца речи.
+
+    Args:
+        samples: Моно-сигнал
+        rate: Частота дискретизации
+        frame_ms: Длина кадра в миллисекундах
+
+    Returns:
+        Пара (обрезанный сигнал, найдена ли речь)
+    """
+    mask = speech_mask(samples, rate, frame_ms)
+    voiced = np.flatnonzero(mask)
+    if voiced.size == 0:
+        return samples[:0], False
+    frame_len = max(1, rate * frame_ms // 1000)
+    start = voiced[0] * frame_len
+    end = min(samples.size, (voiced[-1] + 1) * frame_len)
+    return samples[start:end], True
+
+
+def encode_wav(samples: np.ndarray, rate: int = TARGET_SAMPLE_RATE) -> bytes:
+    """
+    Кодирует моно-сигнал float32 в WAV (PCM 16 бит) в памяти.
+
+    Args:
+        samples: Моно-сигнал в диапазоне [-1, 1]
+        rate: Частота дискретизации
+
+    Returns:
+        Содержимое WAV-файла
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def encode_opus(samples: np.ndarray, rate: int = TARGET_SAMPLE_RATE, bitrate: str = "24k") -> Optional[bytes]:
+    """
+    Кодирует моно-сигнал в ogg/opus через ffmpeg (в несколько раз меньше WAV).
+
+    Returns:
+        Содержимое ogg-файла или None, если ffmpeg недоступен
+    """
+    if FFMPEG is None:
+        return None
+    try:
+        result = subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-f", "f32le", "-ar", str(rate), "-ac", "1",
+             "-i", "pipe:0", "-c:a", "libopus", "-b:a", bitrate, "-f", "ogg", "pipe:1"],
+            input=np.asarray(samples, dtype="<f4").tobytes(), capture_output=True, timeout=30, check=True
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.warning(f"Не удалось закодировать opus через ffmpeg: {e}")
+        return None
+    return result.stdout
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Декодирует WAV (PCM 8/16/32 бит) в массив float32.
+
+    Returns:
+        Пара (сигнал формы (кадры, каналы), частота дискретизации)
+    """
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Неподдерживаемая разрядность WAV: {width * 8} бит")
+    return samples.reshape(-1, channels), rate
+
+
+def decode_audio(data: bytes, content_type: str = "audio/webm") -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Декодирует аудио в сигнал float32.
+
+    WAV декодируется встроенными средствами, остальные форматы — через ffmpeg
+    (сразу в моно 16 кГц).
+
+    Args:
+        data: Содержимое аудиофайла
+        content_type: MIME-тип аудио
+
+    Returns:
+        Пара (сигнал, частота дискретизации) или None, если декодировать нельзя
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return decode_wav(data)
+        except (wave.Error, ValueError, EOFError) as e:
+            logger.warning(f"Не удалось декодировать WAV: {e}")
+            return None
+    if FFMPEG is None:
+        return None
+    try:
+        result = subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "f32le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "pipe:1"],
+            input=data, capture_output=True, timeout=30, check=True
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.warning(f"Не удалось декодировать {content_type} через ffmpeg: {e}")
+        return None
+    return np.frombuffer(result.stdout, dtype="<f4").copy(), TARGET_SAMPLE_RATE
+
+
+def prepare_samples(samples: np.ndarray, rate: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Сводит в моно, передискретизирует в 16 кГц и обрезает тишину.
+
+    Args:
+        samples: Сигнал (кадры,) или (кадры, каналы)
+        rate: Частота дискретизации
+
+    Returns:
+        Пара (подготовленный сигнал 16 кГц, отчет)
+    """
+    mono = resample(to_mono(samples), rate)
+    trimmed, speech = trim_silence(mono, TARGET_SAMPLE_RATE)
+    return trimmed, {
+        "speech": speech,
+        "input_seconds": round(mono.size / TARGET_SAMPLE_RATE, 3),
+        "speech_seconds": round(trimmed.size / TARGET_SAMPLE_RATE, 3)
+    }
+
+
+def prepare_for_transcription(data: bytes, content_type: str = "audio/webm") -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    Готовит запись к отправке в Whisper: моно 16 кГц без тишины по краям
+    (ogg/opus, если есть ffmpeg, иначе WAV).
+
+    Args:
+        data: Содержимое аудиофайла
+        content_type: MIME-тип аудио
+
+    Returns:
+        Тройка (аудио, MIME-тип, отчет). Если аудио нельзя декодировать,
+        возвращается исходное; если речи нет, аудио пустое.
+    """
+    decoded = decode_audio(data, content_type)
+    if decoded is None:
+        return data, content_type, {"decoded": False, "input_bytes": len(data),
+                                    "output_bytes": len(data), "saved_bytes": 0}
+
+    trimmed, report = prepare_samples(*decoded)
+    output, output_type = b"", "audio/wav"
+    if report["speech"]:
+        output = encode_opus(trimmed)
+        if output:
+            output_type = "audio/ogg"
+        else:
+            output = encode_wav(trimmed)
+    report.update({
+        "decoded": True,
+        "input_bytes": len(data),
+        "output_bytes": len(output),
+        "saved_bytes": len(data) - len(output)
+    })
+    # Сжатый webm может оказаться меньше WAV: тогда отправляем исходный файл
+    if report["speech"] and len(output) >= len(data):
+        report.update({"output_bytes": len(data), "saved_bytes": 0})
+        return data, content_type, report
+    logger.info(
+        f"VAD: {report['input_seconds']} с -> {report['speech_seconds']} с речи, "
+        f"сэкономлено {report['saved_bytes']} байт"
+    )
+    return output, output_type, report